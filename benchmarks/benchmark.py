@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+Offline benchmarks of pytion internals. Network is not used: API answers are generated.
+
+python benchmarks/benchmark.py                  # run all cases
+python benchmarks/benchmark.py block_array -r 5 # run selected cases
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import json  # noqa: E402
+from datetime import datetime  # noqa: E402
+
+from pytion.models import BlockArray, Page, PageArray, Model, _parse_iso_time  # noqa: E402
+from pytion.query import JSONCodec, query_pages  # noqa: E402
+from pytion.columnar import Columns  # noqa: E402
+from pytion.fulltext import FullTextIndex  # noqa: E402
+from pytion.parallel import parse_parallel  # noqa: E402
+from pytion.snapshot import SnapshotStore  # noqa: E402
+from pytion.export import read_export  # noqa: E402
+from pytion.replay import Replayer, ReplayResponse, ReplayedRequest  # noqa: E402
+from pytion import Notion  # noqa: E402
+
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(func: Callable[[], Callable[[], object]]) -> Callable[[], Callable[[], object]]:
+    """
+    Register benchmark case. The case prepares data and returns the function to be measured
+    """
+    CASES[func.__name__] = func
+    return func
+
+
+def rich_text(text: str) -> List[Dict]:
+    return [{
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default"
+        },
+        "plain_text": text,
+        "href": None,
+    }]
+
+
+def user(n: int) -> Dict:
+    return {"object": "user", "id": f"01c67faf-3aba-45ff-aa02-2407f87c86{n % 4:02d}"}
+
+
+def block(n: int) -> Dict:
+    types = ["paragraph", "heading_2", "bulleted_list_item", "to_do", "code", "quote", "divider", "image"]
+    type_ = types[n % len(types)]
+    content = {"rich_text": rich_text(f"Block number {n} with some text"), "color": "default"}
+    if type_ == "to_do":
+        content["checked"] = bool(n % 2)
+    elif type_ == "code":
+        content["language"] = "python"
+        content["caption"] = []
+    elif type_ == "divider":
+        content = {}
+    elif type_ == "image":
+        content = {"caption": [], "type": "file", "file": {
+            "url": f"https://s3.us-west-2.amazonaws.com/secure.notion-static.com/{n}/image.png",
+            "expiry_time": "2022-05-13T11:02:00.000Z",
+        }}
+    return {
+        "object": "block",
+        "id": f"8a920ba7-dc1d-4961-811e-{n:012d}",
+        "parent": {"type": "page_id", "page_id": "82ee5677-402f-4481-9a5d-a3302273400a"},
+        "created_time": f"2022-05-{n % 28 + 1:02d}T10:01:00.000Z",
+        "last_edited_time": "2022-05-13T11:02:00.000Z",
+        "created_by": user(n),
+        "last_edited_by": user(n + 1),
+        "has_children": False,
+        "archived": False,
+        "type": type_,
+        type_: content,
+    }
+
+
+def page(n: int) -> Dict:
+    return {
+        "object": "page",
+        "id": f"878d6284-88d9-4894-ab14-{n:012d}",
+        "created_time": f"2022-05-{n % 28 + 1:02d}T10:01:00.000Z",
+        "last_edited_time": "2022-05-13T11:02:00.000Z",
+        "created_by": user(n),
+        "last_edited_by": user(n + 1),
+        "cover": None,
+        "icon": None,
+        "parent": {"type": "database_id", "database_id": "0e953909-9cff-456d-89e4-4684d6b6c701"},
+        "archived": False,
+        "url": f"https://www.notion.so/{n}",
+        "properties": {
+            "Name": {"id": "title", "type": "title", "title": rich_text(f"Page number {n}")},
+            "Notes": {"id": "a%3Ab", "type": "rich_text", "rich_text": rich_text("some notes")},
+            "Count": {"id": "c%3Ad", "type": "number", "number": n},
+            "Done": {"id": "e%3Af", "type": "checkbox", "checkbox": bool(n % 2)},
+            "Status": {"id": "g%3Ah", "type": "select", "select": {"id": "1", "name": f"opt{n % 5}", "color": "red"}},
+            "Tags": {"id": "i%3Aj", "type": "multi_select", "multi_select": [
+                {"id": "1", "name": "tag1", "color": "red"}, {"id": "2", "name": f"tag{n % 7}", "color": "blue"}
+            ]},
+            "When": {"id": "k%3Al", "type": "date", "date": {
+                "start": f"2022-06-{n % 28 + 1:02d}T00:00:00.000+03:00", "end": None, "time_zone": None
+            }},
+            "Created": {"id": "m%3An", "type": "created_time", "created_time": "2022-05-12T10:01:00.000Z"},
+            "Link": {"id": "o%3Ap", "type": "url", "url": "https://example.com"},
+            "Relation": {"id": "q%3Ar", "type": "relation", "relation": [
+                {"id": "04262843-082a-478d-97f7-41948a32613b"}
+            ], "has_more": False},
+        },
+    }
+
+
+@case
+def block_array() -> Callable[[], object]:
+    """BlockArray of 2000 blocks"""
+    data = [block(n) for n in range(2000)]
+    return lambda: BlockArray(data)
+
+
+@case
+def block_dispatch() -> Callable[[], object]:
+    """BlockArray of 5000 blocks without text (type dispatch cost)"""
+    types = ["divider", "table_of_contents", "breadcrumb", "unsupported", "equation", "link_preview"]
+    data = []
+    for n in range(5000):
+        b = block(n)
+        del b[b["type"]], b["created_by"], b["last_edited_by"], b["created_time"], b["last_edited_time"]
+        b["type"] = types[n % len(types)]
+        b[b["type"]] = {}
+        data.append(b)
+    return lambda: BlockArray(data)
+
+
+@case
+def page_array() -> Callable[[], object]:
+    """PageArray of 1000 database rows"""
+    data = [page(n) for n in range(1000)]
+    return lambda: PageArray(data)
+
+
+def timestamps() -> List[str]:
+    # 50000 timestamps with 1000 distinct values like in big database
+    return [
+        f"2022-{n % 12 + 1:02d}-{n % 28 + 1:02d}T{n % 24:02d}:{n % 60:02d}:00.000Z" if n % 3
+        else f"2022-{n % 12 + 1:02d}-{n % 28 + 1:02d}T00:00:00.000+03:00"
+        for n in range(1000)
+    ] * 50
+
+
+@case
+def page_array_compact() -> Callable[[], object]:
+    """PageArray of 5000 database rows without API dicts (reference for parallel case)"""
+    data = [page(n) for n in range(5000)]
+    return lambda: PageArray(data, keep_raw=False)
+
+
+@case
+def page_array_parallel() -> Callable[[], object]:
+    """the same rows by parse_parallel() with a process per CPU (pool is started before)"""
+    data = [page(n) for n in range(5000)]
+    workers = max(os.cpu_count() or 1, 2)
+    parse_parallel(data, workers)
+    return lambda: parse_parallel(data, workers)
+
+
+@case
+def iso_time() -> Callable[[], object]:
+    """50000 timestamps by Model.format_iso_time (cached)"""
+    data = timestamps()
+    return lambda: [Model.format_iso_time(t) for t in data]
+
+
+@case
+def iso_time_uncached() -> Callable[[], object]:
+    """50000 timestamps by the decoder without cache"""
+    data = timestamps()
+    return lambda: [_parse_iso_time.__wrapped__(t) for t in data]
+
+
+@case
+def iso_time_stdlib() -> Callable[[], object]:
+    """50000 timestamps by datetime.fromisoformat (reference)"""
+    data = timestamps()
+    return lambda: [datetime.fromisoformat(t.replace("Z", "+00:00")) for t in data]
+
+
+@case
+def columns() -> Callable[[], object]:
+    """Columns of 5000 rows from API dicts"""
+    data = [page(n) for n in range(5000)]
+    return lambda: Columns(data)
+
+
+@case
+def columns_by_pages() -> Callable[[], object]:
+    """the same table by PageArray and PropertyValue loop (reference)"""
+    data = [page(n) for n in range(5000)]
+
+    def table():
+        pages = PageArray(data)
+        return {name: [p.properties[name].value for p in pages] for name in pages[0].properties}
+    return table
+
+
+@case
+def index_lookup() -> Callable[[], object]:
+    """20 lookups by Status and Tags indexes of 5000 pages"""
+    pages = PageArray([page(n) for n in range(5000)])
+    status, tags = pages.create_index("Status"), pages.create_index("Tags")
+    return lambda: [(status.get(f"opt{n % 5}"), tags.get(f"tag{n % 7}")) for n in range(20)]
+
+
+@case
+def index_scan() -> Callable[[], object]:
+    """the same 20 lookups by query_pages() scan of 5000 pages (reference)"""
+    pages = PageArray([page(n) for n in range(5000)])
+    return lambda: [(
+        query_pages(pages, {"property": "Status", "select": {"equals": f"opt{n % 5}"}}),
+        query_pages(pages, {"property": "Tags", "multi_select": {"contains": f"tag{n % 7}"}}),
+    ) for n in range(20)]
+
+
+@case
+def fulltext_search() -> Callable[[], object]:
+    """20 BM25 queries to FullTextIndex of 200 pages with 50 blocks"""
+    index = FullTextIndex()
+    for n in range(200):
+        index.add_page(Page(**page(n)), BlockArray([block(n * 50 + i) for i in range(50)]))
+    return lambda: [index.search(f"number {n * 97} text") for n in range(20)]
+
+
+def query_response() -> bytes:
+    # answer of database query with 5000 rows (~10 MB)
+    return json.dumps({"object": "list", "results": [page(n) for n in range(5000)], "has_more": False}).encode()
+
+
+def snapshot(path: str) -> None:
+    # the same 5000 pages in NDJSON export and in the snapshot store
+    records = [{"object": "page", "id": data["id"].replace("-", ""), "data": data, "blocks": [block(n)]}
+               for n, data in enumerate(page(n) for n in range(5000))]
+    with open(os.path.join(path, "export.ndjson"), "w") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+    with SnapshotStore(path, "a") as store:
+        for record in records:
+            store.add_record(record)
+
+
+@case
+def snapshot_get() -> Callable[[], object]:
+    """20 pages with blocks by ID from SnapshotStore of 5000 pages"""
+    path = tempfile.mkdtemp()
+    snapshot(path)
+    store = SnapshotStore(path)
+    ids = store.ids()[::250]
+    return lambda: [(store.get(id_), store.blocks(id_)) for id_ in ids]
+
+
+@case
+def snapshot_read_export() -> Callable[[], object]:
+    """the same 20 pages from NDJSON export by read_export() (reference)"""
+    path = tempfile.mkdtemp()
+    snapshot(path)
+    os.remove(os.path.join(path, SnapshotStore.index_name))
+    ids = [f"878d6284-88d9-4894-ab14-{n:012d}".replace("-", "") for n in range(0, 5000, 250)]
+
+    def run():
+        records = read_export(path)
+        return [(Page(**records[id_]["data"]), BlockArray(records[id_]["blocks"])) for id_ in ids]
+    return run
+
+
+@case
+def json_stdlib() -> Callable[[], object]:
+    """decode 5000 rows query response by stdlib json"""
+    data = query_response()
+    return lambda: json.loads(data)
+
+
+@case
+def json_codec() -> Callable[[], object]:
+    """decode 5000 rows query response by default JSONCodec (orjson if installed)"""
+    data = query_response()
+    codec = JSONCodec()
+    return lambda: codec.loads(data)
+
+
+@case
+def json_codec_dumps() -> Callable[[], object]:
+    """encode 5000 rows by default JSONCodec"""
+    data = json.loads(query_response())
+    codec = JSONCodec()
+    return lambda: codec.dumps(data)
+
+
+class PagedQuery(object):
+    """
+    Transport which answers database query by 50 pages of 100 rows (`start_cursor` of the body)
+    """
+    def request(self, method: str, url: str, **kwargs):
+        cursor = int(json.loads(kwargs.get("data") or b"{}").get("start_cursor", 0))
+        has_more = cursor < 4900
+        content = json.dumps({
+            "object": "list", "results": [page(n) for n in range(cursor, cursor + 100)],
+            "has_more": has_more, "next_cursor": str(cursor + 100) if has_more else None,
+        }).encode()
+        return ReplayResponse(200, content, ReplayedRequest(method.upper(), url, None))
+
+
+@case
+def replay_query() -> Callable[[], object]:
+    """paginated query of 5000 rows replayed from Recorder file (requests, decoding, PageArray)"""
+    path = os.path.join(tempfile.mkdtemp(), "query.ndjson.gz")
+    db_id = "0e9539099cff456d89e44684d6b6c701"
+    no = Notion(token="secret_token", transport=PagedQuery())
+    with no.session.record(path):
+        no.databases.db_query(db_id)
+    no = Notion(token="secret_token", transport=Replayer(path))
+    return lambda: no.databases.db_query(db_id)
+
+
+def python(code: str) -> Callable[[], object]:
+    # new interpreter: import time is measured without modules cached by this process
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    return lambda: subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, check=True)
+
+
+FIRST_REQUEST = """
+import pytion
+from requests import Response
+from requests.adapters import BaseAdapter
+
+class Adapter(BaseAdapter):
+    def send(self, request, **kwargs):
+        response = Response()
+        response.status_code = 200
+        response._content = b'{"object": "list", "results": [], "has_more": false}'
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+no = pytion.Notion(token="secret_token")
+no.session.session.mount("https://", Adapter())
+no.search("pytion")
+"""
+
+
+@case
+def startup() -> Callable[[], object]:
+    """python interpreter startup (reference for import cases)"""
+    return python("pass")
+
+
+@case
+def import_time() -> Callable[[], object]:
+    """`import pytion` in new interpreter (with startup)"""
+    return python("import pytion")
+
+
+@case
+def first_request() -> Callable[[], object]:
+    """import, Notion() and the first request by local transport in new interpreter (with startup)"""
+    return python(FIRST_REQUEST)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="*", help=f"cases to run: {', '.join(CASES)}")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="repeats (the best one is shown)")
+    args = parser.parse_args()
+
+    for name in args.cases or CASES:
+        if name not in CASES:
+            parser.error(f"unknown case {name}")
+        func = CASES[name]()
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:<24} {best * 1000:>10.2f} ms   {CASES[name].__doc__}")
+
+
+if __name__ == "__main__":
+    main()
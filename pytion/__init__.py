@@ -42,4 +42,9 @@ def setup_logging(
         logger.addHandler(file_handler)
 
 
-setup_logging(level=envs.LOGGING_BASE_LEVEL, to_console=envs.LOGGING_TO_CONSOLE, filename=envs.LOGGING_FILE)
+# handlers are configured on demand (`setup_logging()`) or if they are enabled in envs
+if envs.LOGGING_TO_CONSOLE or envs.LOGGING_FILE:
+    setup_logging(level=envs.LOGGING_BASE_LEVEL, to_console=envs.LOGGING_TO_CONSOLE, filename=envs.LOGGING_FILE)
+else:
+    logging.getLogger(__name__).addHandler(logging.NullHandler())
+    logging.getLogger(__name__).setLevel(envs.LOGGING_BASE_LEVEL)
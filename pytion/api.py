@@ -2,12 +2,19 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional, Union, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from typing import Optional, Union, Dict, List, Iterable, Iterator
 
 import pytion.envs as envs
-from pytion.query import Request, Filter, Sort
+from pytion.query import Request, Filter, Sort, JSONCodec, query_pages
 from pytion.models import Database, Page, Block, BlockArray, PropertyValue, PageArray, LinkTo, RichTextArray, Property
-from pytion.models import ElementArray, User
+from pytion.models import ElementArray, User, Interner
+from pytion.relations import RelationResolver
+from pytion.export import Exporter
+from pytion.markdown import parse_markdown, chunk_blocks
+from pytion.titles import TitleIndex
+from pytion.schema import SchemaCache
 
 
 Models = Union[Database, Page, Block, BlockArray, PropertyValue, PageArray, ElementArray]
@@ -15,15 +22,52 @@ logger = logging.getLogger(__name__)
 
 
 class Notion(object):
-    def __init__(self, token: Optional[str] = None, version: Optional[str] = None):
+    def __init__(
+            self, token: Optional[str] = None, version: Optional[str] = None,
+            keep_raw: Optional[bool] = None, lazy: Optional[bool] = None, intern_objects: bool = False,
+            codec: Optional[JSONCodec] = None, tokens: Optional[List[str]] = None, rate_limit: float = 3.0,
+            transport: Optional[object] = None, single_flight: bool = True, validate_properties: bool = False,
+            parse_workers: int = 0,
+    ):
         """
         Creates main API object.
 
-        :param token:   provide your integration API token. If None - find the file `token`
-        :param version: provide non hardcoded API version
+        :param token:       provide your integration API token. If None - find the file `token`
+        :param version:     provide non hardcoded API version
+        :param keep_raw:    keep original API dicts in `.raw` attr of models (`envs.KEEP_RAW_DATA` by default)
+        :param lazy:        decode attrs of models on first access (`envs.LAZY_MODELS` by default)
+        :param intern_objects:  share equal User and LinkTo objects between all results of this client
+                                (they must not be modified then: the change is seen by every result)
+        :param codec:       JSON encoder/decoder of requests (orjson if installed, else stdlib json)
+        :param tokens:      tokens of several integrations shared into the same workspace instead of `token`.
+                            Every request is sent by the least loaded one (see `pytion.tokens.TokenPool`)
+        :param rate_limit:  requests per second of every token of `tokens`
+        :param transport:   object which sends requests instead of HTTP session: `request(method, url, **kwargs)`.
+                            `replay.Replayer` answers by recorded responses (see `Request.record()`)
+        :param single_flight:   concurrent identical GET requests (from several threads) share one request and
+                                its decoded result (see `query.SingleFlight`)
+        :param validate_properties:  properties of pages created and updated in databases are checked
+                                     by cached database schema before the request (see `Notion.schemas`).
+                                     It takes an extra GET of every database (skipped if it is not readable)
+        :param parse_workers:  build models of large results (1000+ objects) by this number of processes
+                               (see `pytion.parallel.parse_parallel`). Use with `keep_raw=False`:
+                               kept API dicts are sent back by workers too. Lazy models are not built in parallel
         """
         self.version = version if version else envs.NOTION_VERSION
-        self.session = Request(api=self, token=token)
+        self.model_options = {
+            "keep_raw": envs.KEEP_RAW_DATA if keep_raw is None else keep_raw,
+            "lazy": envs.LAZY_MODELS if lazy is None else lazy,
+            "interner": Interner() if intern_objects else None,
+        }
+        self.session = Request(
+            api=self, token=token, codec=codec, tokens=tokens, rate_limit=rate_limit, transport=transport,
+            single_flight=single_flight,
+        )
+        self.relations = RelationResolver(self)
+        self.titles = TitleIndex()
+        self.schemas = SchemaCache(self)
+        self.validate_properties = validate_properties
+        self.parse_workers = parse_workers
         logger.debug(f"API object created. Version {envs.NOTION_VERSION}")
 
     def search(
@@ -52,15 +96,57 @@ class Notion(object):
             "post", "search", sort=sort_last_edited_time, filter_=filter_, limit=limit, data=data
         )
         if "results" in result and isinstance(result["results"], list):
-            data = ElementArray(result["results"])
+            data = ElementArray(result["results"], workers=self.parse_workers, **self.model_options)
             for item in data:
                 if isinstance(item, Page):
                     self.pages.get_page_properties(title_only=True, obj=item)
+            self.titles.update(data)
             return Element(api=self, name="search", obj=data)
         else:
             logger.warning("Results list is not found")
             return None
 
+    def with_options(self, **model_options) -> Notion:
+        """
+        Client which shares the session, caches and settings of this one, but builds models with other local attrs
+
+        :param model_options:  `keep_raw`, `lazy`, `interner`
+
+        `no.with_options(keep_raw=True).pages.get("1234").obj.raw`
+        """
+        client = object.__new__(Notion)
+        client.__dict__.update(self.__dict__)
+        client.model_options = {**self.model_options, **model_options}
+        return client
+
+    def export(
+            self, path: str, format_: str = "ndjson", workers: int = 4, max_depth: int = 10,
+            checkpoint_every: int = 50, assets: bool = False,
+    ) -> Dict[str, int]:
+        """
+        Exports every page (with blocks) and database shared with the integration. See `pytion.export.Exporter`.
+        Records contain API dicts as they are received (`keep_raw` of the client does not matter)
+
+        :param path:        output directory. Next run to the same directory resumes the export
+                            and skips objects which were not edited since the previous snapshot
+        :param format_:     `ndjson` - single `export.ndjson` file (one record per line)
+                            `tree` - `pages/ID.json` and `databases/ID.json` files
+                            `snapshot` - `snapshot.data` and `snapshot.idx` of `pytion.snapshot.SnapshotStore`
+                            (random access to objects and blocks by ID)
+        :param workers:     max number of objects crawled concurrently
+        :param max_depth:   max depth of nested blocks
+        :param checkpoint_every:  save progress after every N written objects
+        :param assets:      download files of blocks to `assets` directory while Notion-hosted URLs are valid
+        :return:            counters: `exported`, `skipped`, `failed`
+
+        `no.export("backup", format_="snapshot", assets=True)`
+        """
+        exporter = Exporter(
+            self, path, format_=format_, workers=workers, max_depth=max_depth, checkpoint_every=checkpoint_every,
+            assets=assets,
+        )
+        return exporter.run()
+
     def __len__(self):
         return 1
 
@@ -106,15 +192,19 @@ class Element(object):
             raw_obj = self.api.session.method(
                 method="get", path=self.name, id_=id_, after_path=_after_path, limit=limit
             )
+        options = self.api.model_options
         if raw_obj["object"] == "list":
+            workers = self.api.parse_workers
             if self.name == "pages":
-                self.obj = PageArray(raw_obj["results"])
+                self.obj = PageArray(raw_obj["results"], workers=workers, **options)
             elif self.name == "blocks":
-                self.obj = BlockArray(raw_obj["results"])
+                self.obj = BlockArray(raw_obj["results"], workers=workers, **options)
             else:
-                self.obj = ElementArray(raw_obj["results"])
+                self.obj = ElementArray(raw_obj["results"], workers=workers, **options)
         else:
-            self.obj = self.class_map[raw_obj["object"]](**raw_obj)
+            self.obj = self.class_map[raw_obj["object"]](**raw_obj, **options)
+            if isinstance(self.obj, Database):
+                self.api.schemas.update(self.obj)
         return self
 
     def get_parent(self, id_: Optional[str] = None) -> Optional[Element]:
@@ -177,7 +267,8 @@ class Element(object):
         if child["object"] != "list":
             logger.warning(f"List of Blocks expected. Received\n{child}")
             return None
-        return Element(api=self.api, name="blocks", obj=BlockArray(child["results"]))
+        blocks = BlockArray(child["results"], workers=self.api.parse_workers, **self.api.model_options)
+        return Element(api=self.api, name="blocks", obj=blocks)
 
     def get_block_children_recursive(
         self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
@@ -214,7 +305,7 @@ class Element(object):
         )
         ba = BlockArray([])
         for b in child["results"]:
-            block_obj = Block(level=_cur_depth, **b)
+            block_obj = Block(level=_cur_depth, **b, **self.api.model_options)
             ba.append(block_obj)
             # Do not get subpages if not force
             if block_obj.type == "child_page" and not force:
@@ -227,6 +318,49 @@ class Element(object):
 
         return Element(api=self.api, name="blocks", obj=ba)
 
+    def iter_block_children_recursive(
+            self, id_: Optional[str] = None, max_depth: int = 10, block: Optional[Block] = None,
+            force: bool = False, _cur_depth: int = 0,
+    ) -> Iterator[Block]:
+        """
+        Yields children Block objects recursive in document order while they are retrieved
+        (page by page of API results), so the whole content is never kept in memory
+
+        :param id_:
+        :param block:       you can provide a Block object instead to get his children
+        :param max_depth:   how deep use the recursion (block inside block inside block etc.)
+        :param force:       get blocks in subpages too
+
+        `with open("page.md", "w") as f:`
+        `    MarkdownWriter(f).write_all(no.blocks.iter_block_children_recursive("PAGE ID"))`
+        """
+        if isinstance(id_, str) and "-" in id_:
+            id_ = id_.replace("-", "")
+        obj = block if block else self.obj
+        if obj:
+            id_ = obj.id
+        cursor = None
+        while True:
+            after_path = "children"
+            if cursor:
+                after_path += "?" + urlencode({"start_cursor": cursor})
+            child = self.api.session.method(
+                method="get", path="blocks", id_=id_, after_path=after_path, pagination_loop=True
+            )
+            for b in child.get("results", []):
+                block_obj = Block(level=_cur_depth, **b, **self.api.model_options)
+                yield block_obj
+                if block_obj.type == "child_page" and not force:
+                    continue
+                if block_obj.has_children and _cur_depth < max_depth:
+                    # fresh Element: `self.obj` would replace ID of the child
+                    yield from Element(api=self.api, name="blocks").iter_block_children_recursive(
+                        id_=block_obj.id, max_depth=max_depth, force=force, _cur_depth=_cur_depth + 1
+                    )
+            cursor = child.get("next_cursor") if child.get("has_more") else None
+            if not cursor:
+                return
+
     def get_page_property(self, property_id: str, id_: Optional[str] = None, limit: int = 0) -> Optional[Element]:
         """
         DEPRECATED
@@ -253,7 +387,10 @@ class Element(object):
         property_obj = self.api.session.method(
             method="get", path=self.name, id_=id_, after_path="properties/"+property_id, limit=limit
         )
-        return Element(api=self.api, name=f"pages/{id_}/properties", obj=PropertyValue(property_obj, property_id))
+        return Element(
+            api=self.api, name=f"pages/{id_}/properties",
+            obj=PropertyValue(property_obj, property_id, **self.api.model_options)
+        )
 
     def get_page_properties(self, title_only: bool = False, obj: Optional[Page] = None) -> None:
         """
@@ -280,6 +417,42 @@ class Element(object):
             return
         logger.warning("You must provide a Page to retrieve properties")
 
+    def get_truncated_properties(self, workers: int = 8, obj: Optional[Union[Page, PageArray]] = None) -> int:
+        """
+        Page objects contain only first 25 items of `relation`, `people`, `title` and `rich_text` values.
+        Retrieves full values of every truncated property (`PropertyValue.is_truncated`) of Page or PageArray
+        by paginated property item requests. Requests are concurrent
+
+        :param workers: max number of concurrent requests
+        :param obj:     Page or PageArray (`self.obj` by default)
+        :return:        number of retrieved properties
+
+        `pages = no.databases.get("1234").db_query()`
+        `pages.get_truncated_properties()`
+        """
+        obj = obj if obj else self.obj
+        if not isinstance(obj, (Page, PageArray)):
+            logger.warning("Page or PageArray must be provided. use .get() or .db_query() before")
+            return 0
+        truncated = [
+            (page, name, pv)
+            for page in ([obj] if isinstance(obj, Page) else obj)
+            for name, pv in page.properties.items()
+            if isinstance(pv, PropertyValue) and pv.id and pv.is_truncated
+        ]
+        if not truncated:
+            return 0
+        logger.info(f"Retrieving {len(truncated)} truncated properties")
+        pages = Element(api=self.api, name="pages")
+        with ThreadPoolExecutor(max_workers=min(workers, len(truncated))) as pool:
+            results = list(pool.map(lambda item: pages.get_page_property(item[2].id, id_=item[0].id), truncated))
+        for (page, name, pv), result in zip(truncated, results):
+            result.obj.name = name
+            page.properties[name] = result.obj
+            if pv.type == "title":
+                page.title = result.obj.value if result.obj.value else ""
+        return len(truncated)
+
     def db_query(
             self,
             id_: Optional[str] = None,
@@ -301,7 +474,8 @@ class Element(object):
         )
         if r["object"] != "list":
             return None
-        return Element(api=self.api, name="pages", obj=PageArray(r["results"]))
+        pages = PageArray(r["results"], workers=self.api.parse_workers, **self.api.model_options)
+        return Element(api=self.api, name="pages", obj=pages)
 
     def db_filter(self, title: str = None, **kwargs) -> Optional[Element]:
         """
@@ -345,6 +519,48 @@ class Element(object):
         logger.warning("Database must be provided. use .get() before")
         return None
 
+    def local_query(
+            self, filter_: Union[Filter, Dict, None] = None, sorts: Union[Sort, List[Dict], None] = None, limit: int = 0
+    ) -> Optional[Element]:
+        """
+        Filters and sorts already fetched pages without requests (same semantics as `db_query()`)
+
+        :param filter_:  Filter object or filter dict in API format (`and`/`or` are supported)
+        :param sorts:    Sort object or list of sort dicts in API format
+        :param limit:    max number of pages to be returned (0 = return all)
+        :return:         self.obj -> PageArray
+
+        `pages = no.databases.get("1234").db_query()`
+        `pages.local_query(Filter(property_name="Done", property_type="checkbox"), Sort("Name", "descending"))`
+        """
+        if not isinstance(self.obj, PageArray):
+            logger.warning("Only PageArray can be queried locally. use .db_query() before")
+            return None
+        return Element(api=self.api, name="pages", obj=query_pages(self.obj, filter_, sorts, limit))
+
+    def resolve_relations(
+            self, property_name: Optional[str] = None, depth: int = 1, workers: Optional[int] = None
+    ) -> Optional[Element]:
+        """
+        Retrieves pages linked by relation properties of current Page or PageArray.
+        Every related page is requested once per client (see `Notion.relations` cache), requests are concurrent
+
+        :param property_name:   relation property name (all relation properties if None)
+        :param depth:           number of hops (relations of related pages are resolved too if > 1)
+        :param workers:         max number of concurrent requests (`no.relations.workers` by default)
+        :return:                Element with PageArray of reached pages.
+                                Every relation PropertyValue gets `.pages` attr with its resolved pages
+
+        `tasks = no.databases.get("1234").db_query()`
+        `tasks.resolve_relations("Project")`
+        `print(tasks.obj[0].properties["Project"].pages)`
+        """
+        if not isinstance(self.obj, (Page, PageArray)):
+            logger.warning("Page or PageArray must be provided. use .get() or .db_query() before")
+            return None
+        pages = self.api.relations.resolve(self.obj, property_name, depth, workers)
+        return Element(api=self.api, name="pages", obj=pages)
+
     def db_create(
             self,
             database_obj: Optional[Database] = None,
@@ -383,7 +599,8 @@ class Element(object):
                 title = RichTextArray.create(title)
             db = Database.create(parent=parent, properties=properties, title=title, description=description)
         created_db = self.api.session.method(method="post", path=self.name, data=db.get())
-        self.obj = Database(**created_db)
+        self.obj = Database(**created_db, **self.api.model_options)
+        self.api.schemas.update(self.obj)
         return self
 
     def db_update(
@@ -418,7 +635,8 @@ class Element(object):
         if properties:
             patch["properties"] = {name: value.get() for name, value in properties.items()}
         updated_db = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
-        self.obj = Database(**updated_db)
+        self.obj = Database(**updated_db, **self.api.model_options)
+        self.api.schemas.update(self.obj)
         return self
 
     def page_create(
@@ -458,8 +676,9 @@ class Element(object):
             if children and not isinstance(children, BlockArray):
                 children = BlockArray(children, create=True)
             page = Page.create(parent=parent, properties=properties, title=title, children=children)
+        self._validate_properties(page.parent, page.properties, create=True)
         created_page = self.api.session.method(method="post", path=self.name, data=page.get())
-        self.obj = Page(**created_page)
+        self.obj = Page(**created_page, **self.api.model_options)
         return self
 
     def page_update(
@@ -480,18 +699,27 @@ class Element(object):
             id_ = id_.replace("-", "")
         if self.obj:
             id_ = self.obj.id
+        if title:
+            properties = {**(properties or {}), "title": PropertyValue.create("title", title)}
+        if properties and isinstance(self.obj, Page):
+            self._validate_properties(self.obj.parent, properties)
         patch = {}
         if properties:
             patch["properties"] = {name: p.get() for name, p in properties.items()}
-        if title:
-            patch.setdefault("properties", {})
-            patch["properties"]["title"] = PropertyValue.create("title", title).get()
         # if archived:
         patch["archived"] = archived
         updated_page = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
-        self.obj = Page(**updated_page)
+        self.obj = Page(**updated_page, **self.api.model_options)
         return self
 
+    def _validate_properties(
+            self, parent: Optional[LinkTo], properties: Dict[str, PropertyValue], create: bool = False,
+    ) -> None:
+        # raises ValidationError before the request if properties do not match the schema of parent database
+        if not self.api.validate_properties or parent is None or parent.type != "database_id":
+            return
+        self.api.schemas.validate(parent.id, properties, create=create)
+
     def block_update(
             self, id_: Optional[str] = None, block_obj: Optional[Block] = None,
             new_text: Optional[str] = None, archived: bool = False
@@ -534,7 +762,7 @@ class Element(object):
         patch = {"archived": archived}
         patch.update(self.obj.get())
         updated_block = self.api.session.method(method="patch", path=self.name, id_=id_, data=patch)
-        self.obj = Block(**updated_block)
+        self.obj = Block(**updated_block, **self.api.model_options)
         return self
 
     def block_append(
@@ -572,7 +800,79 @@ class Element(object):
         new_blocks = self.api.session.method(
             method="patch", path="blocks", id_=id_, after_path="children", data=data
         )
-        return Element(api=self.api, name="blocks", obj=BlockArray(new_blocks["results"]))
+        return Element(
+            api=self.api, name="blocks", obj=BlockArray(new_blocks["results"], **self.api.model_options)
+        )
+
+    def by_title(self, title: str, fuzzy: bool = True, threshold: float = 0.3) -> Optional[str]:
+        """
+        Resolves page or database title to ID by local title index (`Notion.titles`) which is filled by search
+        results. Search request is sent only if neither the title nor a similar one (if `fuzzy`) is known yet
+
+        :param title:       title of page or database
+        :param fuzzy:       similar title is allowed if the exact one is not found
+        :param threshold:   min trigram similarity (0..1) of similar title
+        :return:            ID or None
+
+        `page_id = no.pages.by_title("Q3 Roadmap")`
+        `db_id = no.databases.by_title("Tasks", fuzzy=False)`
+        """
+        if self.name not in ["pages", "databases"]:
+            logger.warning("Method supports `pages` or `databases` only")
+            return None
+        object_type = self.name[:-1]
+        id_ = self.api.titles.resolve(title, object_type, fuzzy=fuzzy, threshold=threshold)
+        if id_ is None:
+            self.api.search(title, object_type=object_type)
+            id_ = self.api.titles.resolve(title, object_type, fuzzy=fuzzy, threshold=threshold)
+        return id_
+
+    def block_append_markdown(self, markdown: Union[str, Iterable[str]], id_: Optional[str] = None) -> int:
+        """
+        Imports Markdown document: parsed blocks are appended by chunks of max allowed size while parsing goes.
+        Children which are nested deeper than API allows in one request (or more than 100 children)
+        are appended to the created blocks by next requests
+
+        :param markdown:    Markdown string or iterable of lines (file opened in text mode for ex.)
+        :param id_:         provide id of block or page if `self.obj` is empty
+        :return:            number of append requests
+
+        `with open("doc.md") as f:`
+        `    no.pages.block_append_markdown(f, "PAGE ID")`
+        """
+        if self.name not in ["blocks", "pages"]:
+            logger.warning("Method supports `blocks` or `pages` only")
+            return 0
+        if self.obj:
+            id_ = self.obj.id
+        return self._append_chunks(id_, parse_markdown(markdown))
+
+    def _append_chunks(self, id_: str, blocks: Iterable[Block]) -> int:
+        requests = 0
+        for chunk in chunk_blocks(blocks):
+            created = self.api.blocks.block_append(id_, blocks=chunk)
+            requests += 1
+            for block, new_block in zip(chunk, created.obj):
+                requests += self._append_deferred(block, new_block.id, block.nesting)
+        return requests
+
+    def _append_deferred(self, block: Block, id_: str, nesting: int) -> int:
+        children = getattr(block, "child_blocks", None)
+        if not children:
+            return 0
+        if nesting == 0 and block.type != "table":
+            return self._append_chunks(id_, children)
+        sent, rest = children[:Block.max_children], children[Block.max_children:]
+        requests = 0
+        if any(_has_deferred(child, max(nesting - 1, 0)) for child in sent):
+            # IDs of created children are needed to append their children
+            created = self.api.blocks.get_block_children(id_).obj
+            requests += 1
+            for child, new_child in zip(sent, created):
+                requests += self._append_deferred(child, new_child.id, max(nesting - 1, 0))
+        if rest:
+            requests += self._append_chunks(id_, rest)
+        return requests
 
     def get_myself(self) -> Element:
         """
@@ -606,3 +906,13 @@ class Element(object):
 
     def __str__(self):
         return self.__repr__()
+
+
+def _has_deferred(block: Block, nesting: int) -> bool:
+    # block has children which are not sent with it
+    children = getattr(block, "child_blocks", None)
+    if not children:
+        return False
+    if nesting == 0 and block.type != "table" or len(children) > Block.max_children:
+        return True
+    return any(_has_deferred(child, max(nesting - 1, 0)) for child in children[:Block.max_children])
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from threading import Lock
+from typing import Optional, Dict, List, Iterable
+from urllib.parse import urlsplit, unquote
+from uuid import uuid4
+
+import requests
+
+from pytion.models import Block
+from pytion.export import _write_atomic
+
+
+logger = logging.getLogger(__name__)
+
+# block types with downloadable `url`
+ASSET_TYPES = ("image", "video", "file", "pdf")
+
+
+def asset_key(url: str) -> str:
+    """
+    Stable key of the file: Notion-hosted URLs are signed (query string changes on every retrieve)
+    """
+    parts = urlsplit(url)
+    return parts.netloc + parts.path
+
+
+class AssetDownloader(object):
+    manifest_name = "assets.json"
+
+    def __init__(
+            self, api: object, path: str, workers: int = 8, refresh_margin: int = 300, chunk_size: int = 1 << 16,
+            timeout: int = 60,
+    ):
+        """
+        Downloads files of `image`, `video`, `file` and `pdf` blocks concurrently. Every file is streamed to disk
+        and stored once: by URL (signature is ignored) and by content hash (`path/SHA256.ext`).
+        Notion-hosted URLs expire (`Block.expiry_time`): the block is retrieved again to get the fresh URL
+        if it is expired (or will be in `refresh_margin` seconds) and if the download is denied
+
+        :param api:             Notion object
+        :param path:            output directory. `assets.json` keeps downloaded files between runs
+        :param workers:         max number of concurrent downloads
+        :param refresh_margin:  seconds before `expiry_time` when the URL is refreshed
+        :param chunk_size:      bytes written at once
+        :param timeout:         seconds to wait for the server response
+
+        `blocks = no.blocks.get_block_children_recursive(page_id).obj`
+        `files = AssetDownloader(no, "assets").download(blocks)`
+        """
+        self.api = api
+        self.path = path
+        self.workers = workers
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        # signed URLs must be requested without Notion API headers
+        self.session = requests.Session()
+        # asset key -> file name (in `path`)
+        self.manifest: Dict[str, str] = {}
+        self._lock = Lock()
+        self.load_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.path, self.manifest_name)
+
+    def load_manifest(self) -> None:
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def save_manifest(self) -> None:
+        # saves of concurrent downloads are serialized: the file is never replaced by an older manifest
+        with self._lock:
+            data = json.dumps(self.manifest, ensure_ascii=False).encode("utf-8")
+            _write_atomic(self.manifest_path, data)
+
+    @staticmethod
+    def assets(blocks: Iterable[Block]) -> List[Block]:
+        return [block for block in blocks if block.type in ASSET_TYPES and getattr(block, "url", None)]
+
+    def is_expiring(self, block: Block) -> bool:
+        expiry_time = getattr(block, "expiry_time", None)
+        return expiry_time is not None and expiry_time - self.refresh_margin <= datetime.now(timezone.utc)
+
+    def refresh(self, block: Block) -> Block:
+        """
+        Retrieves the block again: Notion-hosted file gets the new URL and expiry_time
+        """
+        logger.info(f"URL of {block.type} {block.id} is expired. Refreshing")
+        fresh = self.api.blocks.get(block.id).obj
+        block.url, block.expiry_time = fresh.url, fresh.expiry_time
+        return block
+
+    def _name(self, url: str, digest: str) -> str:
+        extension = os.path.splitext(unquote(urlsplit(url).path))[1]
+        return digest + (extension.lower() if len(extension) <= 10 else "")
+
+    def _fetch(self, url: str) -> Optional[str]:
+        # streams the file to the temporary file. None if access is denied (expired URL)
+        with self.session.get(url, stream=True, timeout=self.timeout) as response:
+            if response.status_code in (400, 403):
+                return None
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            tmp = os.path.join(self.path, f".{uuid4().hex}.part")
+            try:
+                with open(tmp, "wb") as f:
+                    for chunk in response.iter_content(self.chunk_size):
+                        digest.update(chunk)
+                        f.write(chunk)
+            except BaseException:
+                os.remove(tmp)
+                raise
+        name = self._name(url, digest.hexdigest())
+        target = os.path.join(self.path, name)
+        if os.path.exists(target):
+            # the same content is downloaded already
+            os.remove(tmp)
+        else:
+            os.replace(tmp, target)
+        return name
+
+    def _download(self, key: str, block: Block) -> Optional[str]:
+        try:
+            if self.is_expiring(block):
+                self.refresh(block)
+            name = self._fetch(block.url)
+            if name is None and block.expiry_time is not None:
+                name = self._fetch(self.refresh(block).url)
+            if name is None:
+                raise PermissionError(f"access to {asset_key(block.url)} is denied")
+        except Exception as e:
+            logger.error(f"{block.type} {block.id} is not downloaded: {e!r}")
+            return None
+        with self._lock:
+            self.manifest[key] = name
+        return name
+
+    def download(self, blocks: Iterable[Block]) -> Dict[str, Optional[str]]:
+        """
+        Downloads files of blocks which are not downloaded yet
+
+        :param blocks:  any blocks (BlockArray for ex.). Files are taken from `image`, `video`, `file`, `pdf` ones
+        :return:        block ID -> file path (None if it is failed)
+        """
+        os.makedirs(self.path, exist_ok=True)
+        assets = [(asset_key(block.url), block) for block in self.assets(blocks)]
+        # one block per file
+        pending: Dict[str, Block] = {}
+        for key, block in assets:
+            if key not in self.manifest:
+                pending.setdefault(key, block)
+        if pending:
+            logger.info(f"Downloading {len(pending)} files")
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                list(pool.map(self._download, pending, pending.values()))
+            self.save_manifest()
+        return {
+            block.id: os.path.join(self.path, self.manifest[key]) if key in self.manifest else None
+            for key, block in assets
+        }
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional, Dict, List, Any, Iterable, Union, Callable
+
+try:
+    import numpy
+except ImportError:  # optional dependency
+    numpy = None
+
+from pytion.models import Model, Page, PropertyValue
+
+
+def _plain_text(rich_text: Optional[List[Dict[str, Any]]]) -> str:
+    if not rich_text:
+        return ""
+    return "".join(
+        rt.get("plain_text") if rt.get("plain_text") is not None else rt.get("text", {}).get("content", "")
+        for rt in rich_text
+    )
+
+
+def _name(option: Any) -> Optional[str]:
+    return option.get("name") if isinstance(option, dict) else option
+
+
+def _date(date: Optional[Dict[str, Any]]) -> Optional[datetime]:
+    return Model.format_iso_time(date.get("start")) if date else None
+
+
+def _formula(data: Dict[str, Any]) -> Any:
+    formula_type = data.get("type")
+    if formula_type == "date":
+        return _date(data.get("date"))
+    return data.get(formula_type)
+
+
+def _rollup(data: Dict[str, Any]) -> Any:
+    rollup_type = data.get("type")
+    if rollup_type == "date":
+        return _date(data.get("date"))
+    if rollup_type == "array":
+        return [
+            _decoders[item["type"]](item.get(item["type"])) for item in data["array"] if item["type"] in _decoders
+        ]
+    return data.get(rollup_type)
+
+
+# property type -> func(value of the type in API dict) -> python value of the cell
+_decoders: Dict[str, Callable[[Any], Any]] = {
+    "title": _plain_text,
+    "rich_text": _plain_text,
+    "number": lambda value: value,
+    "checkbox": bool,
+    "select": _name,
+    "status": _name,
+    "multi_select": lambda value: [_name(option) for option in value or []],
+    "date": _date,
+    "created_time": lambda value: Model.format_iso_time(value),
+    "last_edited_time": lambda value: Model.format_iso_time(value),
+    "url": lambda value: value,
+    "email": lambda value: value,
+    "phone_number": lambda value: value,
+    "people": lambda value: [user.get("id", "").replace("-", "") for user in value or []],
+    "created_by": lambda value: value.get("id", "").replace("-", "") if value else None,
+    "last_edited_by": lambda value: value.get("id", "").replace("-", "") if value else None,
+    "relation": lambda value: [item.get("id", "").replace("-", "") for item in value or []],
+    "formula": _formula,
+    "rollup": _rollup,
+}
+
+
+def _ids(value: Optional[List[Any]]) -> List[str]:
+    return [item.id for item in value or []]
+
+
+def _value_start(pv: PropertyValue) -> Optional[datetime]:
+    return getattr(pv, "start", None) if pv.value is not None else None
+
+
+def _computed(pv: PropertyValue) -> Any:
+    # values computed by Notion are decoded from API dict of the value (it is kept if `keep_raw=False` too)
+    return _decoders[pv.type](pv.raw.get(pv.type))
+
+
+# property type -> func(parsed PropertyValue of the page) -> python value of the cell
+_value_decoders: Dict[str, Callable[[PropertyValue], Any]] = {
+    "title": lambda pv: _plain_text(pv.value.raw) if pv.value is not None else "",
+    "rich_text": lambda pv: _plain_text(pv.value.raw) if pv.value is not None else "",
+    "number": lambda pv: pv.value,
+    "checkbox": lambda pv: bool(pv.value),
+    "select": lambda pv: pv.value,
+    "status": lambda pv: pv.value,
+    "multi_select": lambda pv: list(pv.value or []),
+    "date": _value_start,
+    "created_time": lambda pv: pv.value,
+    "last_edited_time": lambda pv: pv.value,
+    "url": lambda pv: pv.value,
+    "email": lambda pv: pv.value,
+    "phone_number": lambda pv: pv.value,
+    "people": lambda pv: _ids(pv.value),
+    "created_by": lambda pv: pv.value.id if pv.value else None,
+    "last_edited_by": lambda pv: pv.value.id if pv.value else None,
+    "relation": lambda pv: _ids(pv.value),
+    "formula": _computed,
+    "rollup": _computed,
+}
+
+# property types stored as codes of categories (dictionary encoding)
+CATEGORICAL_TYPES = ("select", "status")
+
+
+class Column(object):
+    def __init__(self, name: str, type_: Optional[str] = None):
+        """
+        Values of one property of every row
+
+        :param name:    property name
+        :param type_:   property type. detected by first value if not provided
+        `number` - int/float or None
+        `checkbox` - bool
+        `date`, `created_time`, `last_edited_time` - datetime (start of range) or None
+        `select`, `status` - codes (int, -1 is None) of `.categories`
+        `multi_select` - list of option names
+        `people`, `relation`, `created_by`, `last_edited_by` - IDs
+        `title`, `rich_text` - plain text
+        """
+        self.name = name
+        self.type = type_
+        self.values: List[Any] = []
+        self.categories: Optional[List[str]] = None
+        self._category_codes: Dict[str, int] = {}
+
+    def append(self, data: Optional[Dict[str, Any]]) -> None:
+        """
+        Appends the cell by property value dict from API (`None` if the row has no such property)
+        """
+        self._detect_type(data.get("type") if data is not None else None)
+        decoder = _decoders.get(self.type)
+        self._append_cell(decoder(data.get(self.type)) if data is not None and decoder else None)
+
+    def append_value(self, pv: Optional[PropertyValue]) -> None:
+        """
+        Appends the cell by parsed property value of the Page (`None` if the row has no such property)
+        """
+        self._detect_type(pv.type if pv is not None else None)
+        decoder = _value_decoders.get(self.type)
+        self._append_cell(decoder(pv) if pv is not None and decoder else None)
+
+    def _detect_type(self, type_: Optional[str]) -> None:
+        if type_ is not None and self.type is None:
+            self.type = type_
+            if self.type in CATEGORICAL_TYPES:
+                # previous rows have no values
+                self.values = [-1] * len(self.values)
+
+    def _append_cell(self, value: Any) -> None:
+        if self.type not in CATEGORICAL_TYPES:
+            self.values.append(value)
+            return
+        if self.categories is None:
+            self.categories = []
+        if value is None:
+            self.values.append(-1)
+            return
+        code = self._category_codes.get(value)
+        if code is None:
+            code = self._category_codes[value] = len(self.categories)
+            self.categories.append(value)
+        self.values.append(code)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, item):
+        """
+        Decoded value of the cell (category name instead of code)
+        """
+        if self.categories is None:
+            return self.values[item]
+        if isinstance(item, slice):
+            return [self.categories[code] if code >= 0 else None for code in self.values[item]]
+        code = self.values[item]
+        return self.categories[code] if code >= 0 else None
+
+    def __iter__(self):
+        for i in range(len(self.values)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"Column({self.name}: {self.type}[{len(self)}])"
+
+    def to_numpy(self) -> Any:
+        """
+        `number` -> float64 (NaN if empty), `checkbox` -> bool, dates -> datetime64[ms] UTC (NaT if empty),
+        `select`/`status` -> int32 codes of `.categories`, others -> object
+        """
+        if numpy is None:
+            raise ImportError("numpy is required for `to_numpy()`. pip install numpy")
+        if self.type == "number":
+            return numpy.array([numpy.nan if v is None else v for v in self.values], dtype=numpy.float64)
+        if self.type == "checkbox":
+            return numpy.array(self.values, dtype=numpy.bool_)
+        if self.type in ("date", "created_time", "last_edited_time"):
+            return numpy.array([_utc_naive(v) for v in self.values], dtype="datetime64[ms]")
+        if self.type in CATEGORICAL_TYPES:
+            return numpy.array(self.values, dtype=numpy.int32)
+        array = numpy.empty(len(self.values), dtype=object)
+        array[:] = self.values
+        return array
+
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    # numpy.datetime64 has no time zones
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class Columns(object):
+    def __init__(
+            self, rows: Union[Iterable[Page], Iterable[Dict[str, Any]], None] = None,
+            names: Optional[Iterable[str]] = None,
+    ):
+        """
+        Columnar view of database rows: property name -> Column
+
+        :param rows:    PageArray, Pages or page dicts from API (`results` of database query)
+        :param names:   property names to be decoded (all if None)
+
+        `cols = no.databases.get("1234").db_query().obj.to_columns()`
+        `cols["Count"].to_numpy().sum()`
+        """
+        self.names = list(names) if names is not None else None
+        self.columns: Dict[str, Column] = {}
+        self.ids: List[str] = []
+        if self.names is not None:
+            for name in self.names:
+                self.columns[name] = Column(name)
+        if rows is not None:
+            self.extend(rows)
+
+    def append(self, row: Union[Page, Dict[str, Any]]) -> None:
+        """
+        Appends the row. Rows can be appended while the query is streaming.
+        Parsed pages are decoded from their property values, API dicts (and lazy pages) from the dicts
+        """
+        parsed = isinstance(row, Page) and not row.is_lazy
+        if parsed:
+            row_id, properties = row.id, row.properties
+        else:
+            raw = row.raw if isinstance(row, Model) else row
+            row_id, properties = raw.get("id", "").replace("-", ""), raw.get("properties", {})
+        if self.names is None:
+            for name, value in properties.items():
+                if name not in self.columns:
+                    # new property: fill previous rows
+                    column = self.columns[name] = Column(name, value.type if parsed else value.get("type"))
+                    for _ in self.ids:
+                        column.append(None)
+        self.ids.append(row_id)
+        for name, column in self.columns.items():
+            if parsed:
+                column.append_value(properties.get(name))
+            else:
+                column.append(properties.get(name))
+
+    def extend(self, rows: Union[Iterable[Page], Iterable[Dict[str, Any]]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __getitem__(self, item: str) -> Column:
+        return self.columns[item]
+
+    def __contains__(self, item: str) -> bool:
+        return item in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __repr__(self):
+        return f"Columns({len(self.columns)}x{len(self)})"
+
+    def to_dict(self) -> Dict[str, List[Any]]:
+        """
+        Decoded values of every column (category names instead of codes)
+        """
+        return {name: list(column) for name, column in self.columns.items()}
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Dict of numpy arrays (see `Column.to_numpy()`). Categories are available in `self[name].categories`
+        """
+        return {name: column.to_numpy() for name, column in self.columns.items()}
@@ -1,21 +1,29 @@
 # -*- coding: utf-8 -*-
 
 import logging
+import os
 
 
 # Base URL (mandatory)
 NOTION_URL = "https://api.notion.com/v1/"
 
 # Access token (optional)
-try:
-    with open("token") as f:
-        NOTION_SECRET = f.read()
-except FileNotFoundError:
-    NOTION_SECRET = None
+# `NOTION_SECRET` is read on first access: `NOTION_TOKEN` environment variable or `token` file in current directory.
+# set `envs.NOTION_SECRET = "..."` to override
+TOKEN_ENV = "NOTION_TOKEN"
+TOKEN_FILE = "token"
 
 # Current API Version (mandatory)
 NOTION_VERSION = "2022-06-28"
 
+# Keep original API dicts in `.raw` attr of models (mandatory)
+# set `False` to halve the memory of big results. `.raw` will be re-derived from parsed attrs
+KEEP_RAW_DATA = True
+
+# Decode attrs of Page, Block, Database from API dicts on first access (mandatory)
+# useful when only a few attrs (`.id`, `.title`) of big results are needed
+LAZY_MODELS = False
+
 # Logging settings (mandatory)
 LOGGING_BASE_LEVEL = logging.WARNING
 LOGGING_TO_CONSOLE = False
@@ -31,3 +39,22 @@ LOGGING_FILE = None
 # 2020-08-12
 
 # empty strings ARE NOT supported. use `None` (python) or `null` (JSON)
+
+
+def _read_token():
+    token = os.environ.get(TOKEN_ENV)
+    if token:
+        return token.strip()
+    try:
+        with open(TOKEN_FILE) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def __getattr__(name):
+    # lazy settings (PEP 562): nothing is read at import time
+    if name == "NOTION_SECRET":
+        value = globals()["NOTION_SECRET"] = _read_token()
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
+from __future__ import annotations
 
 import logging
 import json
-from typing import Dict
+from typing import Dict, Any, Callable, TYPE_CHECKING
 
-from requests import Response
+if TYPE_CHECKING:
+    from requests import Response
 
 
 logger = logging.getLogger(__name__)
@@ -139,10 +141,13 @@ class ContentError(Exception):
         self.error = message
 
 
-def find_response_error(req: Response) -> Dict:
+def find_response_error(req: Response, loads: Callable[[bytes], Any] = json.loads) -> Dict:
+    """
+    Decodes the response body by `loads` func and raises the exception if the response is not OK
+    """
     try:
-        content = req.json()
-    except json.JSONDecodeError:
+        content = loads(req.content)
+    except ValueError:  # json.JSONDecodeError or the same of other decoder
         logger.error(f"Result is not OK. JSON decoding fail\n{req.content}")
         raise ContentError(req)
     if req.ok:
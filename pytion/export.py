@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, Future
+from typing import Optional, Dict, Any, Iterable, Tuple, Set
+
+from pytion.models import Model, Page, Database
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "tree", "snapshot")
+
+
+class Exporter(object):
+    checkpoint_name = ".checkpoint.json"
+    ndjson_name = "export.ndjson"
+
+    def __init__(
+            self, api: object, path: str, format_: str = "ndjson", workers: int = 4, max_depth: int = 10,
+            checkpoint_every: int = 50, assets: bool = False,
+    ):
+        """
+        Workspace snapshot: every page and database shared with the integration (found by search) is written
+        with its blocks while the crawl goes. Progress (ID -> last_edited_time) is saved to `.checkpoint.json`,
+        so the next run (after interruption or for the next snapshot) skips unchanged objects.
+        Objects are retrieved with `keep_raw=True`, so records contain API dicts as they are received
+
+        :param api:               Notion object
+        :param path:              output directory
+        :param format_:           `ndjson` - `export.ndjson` file, one object per line (the last line of ID wins)
+                                  `tree` - `pages/ID.json` and `databases/ID.json` files
+                                  `snapshot` - `snapshot.SnapshotStore` (random access by ID)
+        :param workers:           max number of objects crawled concurrently
+        :param max_depth:         max depth of nested blocks
+        :param checkpoint_every:  save progress after every N written objects
+        :param assets:            download files of blocks to `assets` directory right after the page is crawled
+                                  (while Notion-hosted URLs are valid). Record gets `assets`: block ID -> file path
+
+        `Exporter(no, "backup").run()`
+        """
+        if format_ not in FORMATS:
+            raise ValueError(f"Allowed formats {FORMATS} ({format_} is provided)")
+        # API dicts are written, not re-derived from attrs
+        self.api = api.with_options(keep_raw=True)
+        self.path = path
+        self.format = format_
+        self.workers = workers
+        self.max_depth = max_depth
+        self.checkpoint_every = checkpoint_every
+        self.assets = None
+        if assets:
+            from pytion.assets import AssetDownloader  # assets depends on export
+
+            self.assets = AssetDownloader(api, os.path.join(path, "assets"), workers=workers)
+        # object ID -> last_edited_time of exported version
+        self.state: Dict[str, str] = {}
+        self._output = None
+        self._unsaved = 0
+
+    @property
+    def checkpoint_path(self) -> str:
+        return os.path.join(self.path, self.checkpoint_name)
+
+    def load_checkpoint(self) -> None:
+        if os.path.isfile(self.checkpoint_path):
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                self.state = json.load(f)
+            logger.info(f"Checkpoint loaded: {len(self.state)} objects are exported already")
+
+    def save_checkpoint(self) -> None:
+        if self.format == "snapshot" and self._output is not None:
+            self._output.sync()
+        elif self._output is not None:
+            # checkpoint never contains objects which are not written yet
+            self._output.flush()
+            os.fsync(self._output.fileno())
+        _write_atomic(self.checkpoint_path, json.dumps(self.state).encode("utf-8"))
+        self._unsaved = 0
+
+    @staticmethod
+    def _version(obj: Model) -> str:
+        return obj.last_edited_time.isoformat() if obj.last_edited_time else ""
+
+    def is_changed(self, obj: Model) -> bool:
+        return self.state.get(obj.id) != self._version(obj)
+
+    def objects(self) -> Iterable[Model]:
+        """
+        Pages and databases to be exported (`Notion.search` without query)
+        """
+        result = self.api.search()
+        return [obj for obj in result.obj if isinstance(obj, (Page, Database))] if result else []
+
+    def crawl(self, obj: Model) -> Dict[str, Any]:
+        """
+        Record of the object: API dict and all nested blocks (flat list, `parent` refers to the parent block).
+        `raw` of provided objects which are built with `keep_raw=False` is re-derived from attrs
+        """
+        blocks = []
+        record = {"object": obj.object, "id": obj.id, "last_edited_time": self._version(obj), "data": obj.raw}
+        if isinstance(obj, Page):
+            children = self.api.blocks.get_block_children_recursive(id_=obj.id, max_depth=self.max_depth)
+            blocks = [block.raw for block in children.obj] if children else []
+            if self.assets is not None and children:
+                record["assets"] = self.assets.download(children.obj)
+        record["blocks"] = blocks
+        return record
+
+    def _crawl(self, obj: Model) -> Tuple[Model, Optional[Dict[str, Any]]]:
+        try:
+            return obj, self.crawl(obj)
+        except Exception as e:
+            # the object is not checkpointed and will be retried by the next run
+            logger.error(f"{obj.object} {obj.id} is not exported: {e!r}")
+            return obj, None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.format == "snapshot":
+            self._output.add_record(record)
+            return
+        data = self.api.session.codec.dumps(record)
+        if self.format == "ndjson":
+            self._output.write(data + b"\n")
+        else:
+            directory = os.path.join(self.path, record["object"] + "s")
+            os.makedirs(directory, exist_ok=True)
+            _write_atomic(os.path.join(directory, record["id"] + ".json"), data)
+
+    def _collect(self, done: Set[Future], stats: Dict[str, int]) -> None:
+        for future in done:
+            obj, record = future.result()
+            if record is None:
+                stats["failed"] += 1
+                continue
+            self.write(record)
+            self.state[obj.id] = record["last_edited_time"]
+            stats["exported"] += 1
+            self._unsaved += 1
+            if self._unsaved >= self.checkpoint_every:
+                self.save_checkpoint()
+
+    def run(self, objects: Optional[Iterable[Model]] = None) -> Dict[str, int]:
+        """
+        Exports changed objects
+
+        :param objects:  Pages and Databases (all objects from search by default)
+        :return:         counters: `exported`, `skipped` (unchanged), `failed` (retried by the next run)
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self.load_checkpoint()
+        stats = {"exported": 0, "skipped": 0, "failed": 0}
+        if self.format == "ndjson":
+            self._output = open(os.path.join(self.path, self.ndjson_name), "ab+")
+            self._output.seek(0, os.SEEK_END)
+            if self._output.tell():
+                self._output.seek(-1, os.SEEK_END)
+                if self._output.read(1) != b"\n":
+                    # the last line is cut by interruption
+                    self._output.write(b"\n")
+        elif self.format == "snapshot":
+            from pytion.snapshot import SnapshotStore  # snapshot is used on demand only
+
+            self._output = SnapshotStore(self.path, "a", codec=self.api.session.codec)
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                pending: Set[Future] = set()
+                for obj in (objects if objects is not None else self.objects()):
+                    if not self.is_changed(obj):
+                        stats["skipped"] += 1
+                        continue
+                    # bounded queue: records are written while the crawl goes
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(done, stats)
+                    pending.add(pool.submit(self._crawl, obj))
+                self._collect(wait(pending).done, stats)
+        finally:
+            self.save_checkpoint()
+            if self._output is not None:
+                self._output.close()
+                self._output = None
+        logger.info(f"Export is finished: {stats}")
+        return stats
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # unique temporary file: concurrent writers of the same path do not replace each other's file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def read_export(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads snapshot made by `Exporter`: ID -> record (`object`, `id`, `last_edited_time`, `data`, `blocks`)
+
+    :param path:  output directory of Exporter
+    """
+    records: Dict[str, Dict[str, Any]] = {}
+    ndjson = os.path.join(path, Exporter.ndjson_name)
+    if os.path.isfile(ndjson):
+        with open(ndjson, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # empty or partially written line of interrupted run
+                    continue
+                records[record["id"]] = record
+    from pytion.snapshot import SnapshotStore, BLOCKS  # snapshot is used on demand only
+
+    if os.path.isfile(os.path.join(path, SnapshotStore.index_name)):
+        with SnapshotStore(path) as store:
+            for id_ in store.ids():
+                data = store.raw(id_)
+                last_edited_time = Model.format_iso_time(data.get("last_edited_time"))
+                records[id_] = {
+                    "object": data["object"], "id": id_,
+                    "last_edited_time": last_edited_time.isoformat() if last_edited_time else "",
+                    "data": data, "blocks": store.raw(id_, BLOCKS) or [],
+                }
+    for directory in ("pages", "databases"):
+        directory = os.path.join(path, directory)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    record = json.load(f)
+                records[record["id"]] = record
+    return records
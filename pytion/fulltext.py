@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Any, Iterable, Union
+
+from pytion.models import Model, Page, Block, BlockArray
+from pytion.export import _write_atomic
+
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Case-insensitive words of the text
+    """
+    return _TOKEN.findall(text.casefold())
+
+
+def _id(obj: Union[Model, str]) -> str:
+    return obj.id if isinstance(obj, Model) else obj.replace("-", "")
+
+
+class Hit(object):
+    __slots__ = ("score", "page_id", "block_id", "text")
+
+    def __init__(self, score: float, page_id: str, block_id: str, text: str):
+        """
+        Search result: the best matching block of the page (`block_id` is `page_id` if the title matches)
+        """
+        self.score = score
+        self.page_id = page_id
+        self.block_id = block_id
+        self.text = text
+
+    def __repr__(self):
+        return f"Hit({self.page_id}/{self.block_id} {self.score:.3f} {self.text[:30]!r})"
+
+
+class FullTextIndex(object):
+    version = 1
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Inverted index of page titles and block texts with BM25 ranking. Pages are re-indexed one by one
+        when their `last_edited_time` is changed, the index is saved to JSON file between runs
+
+        :param k1:  BM25 term frequency saturation
+        :param b:   BM25 document length normalization
+
+        `index = FullTextIndex.load("index.json")`
+        `index.crawl(no, no.search().obj)`
+        `index.search("quarterly report")`
+        `index.save("index.json")`
+        """
+        self.k1 = k1
+        self.b = b
+        # term -> document (block or page title) ID -> term frequency
+        self.postings: Dict[str, Dict[str, int]] = {}
+        # document ID -> [page ID, length in tokens, text]
+        self.docs: Dict[str, List[Any]] = {}
+        # page ID -> {"version": last_edited_time, "docs": document IDs}
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0
+
+    def _add_doc(self, doc_id: str, page_id: str, text: str) -> None:
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for term, tf in frequencies.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        self.docs[doc_id] = [page_id, len(tokens), text]
+        self.pages[page_id]["docs"].append(doc_id)
+        self._total_length += len(tokens)
+
+    def _remove_doc(self, doc_id: str) -> None:
+        page_id, length, text = self.docs.pop(doc_id)
+        for term in set(tokenize(text)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+        self._total_length -= length
+
+    def remove_page(self, page: Union[Page, str]) -> None:
+        entry = self.pages.pop(_id(page), None)
+        if entry is not None:
+            for doc_id in entry["docs"]:
+                self._remove_doc(doc_id)
+
+    @staticmethod
+    def _version(page: Page) -> str:
+        return page.last_edited_time.isoformat() if page.last_edited_time else ""
+
+    def is_changed(self, page: Page) -> bool:
+        entry = self.pages.get(page.id)
+        return entry is None or entry["version"] != self._version(page)
+
+    def add_page(self, page: Page, blocks: Optional[Iterable[Block]] = None) -> None:
+        """
+        (Re-)indexes the page: title and texts of blocks (`Block.simple`)
+
+        :param page:    Page object
+        :param blocks:  crawled blocks of the page (`get_block_children_recursive().obj`)
+        """
+        self.remove_page(page)
+        self.pages[page.id] = {"version": self._version(page), "docs": []}
+        self._add_doc(page.id, page.id, str(page.title) if page.title else "")
+        for block in blocks or ():
+            if block.id != page.id:
+                self._add_doc(block.id, page.id, block.simple)
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """
+        Indexes the page record of `Exporter` snapshot (`export.read_export()` values)
+        """
+        if record.get("object") == "page":
+            self.add_page(Page(**record["data"]), BlockArray(record.get("blocks") or []))
+
+    def crawl(self, api: object, pages: Iterable[Page], workers: int = 4, max_depth: int = 10) -> int:
+        """
+        Retrieves blocks of new and changed pages and re-indexes them
+
+        :param api:         Notion object
+        :param pages:       Pages (`no.search().obj` or database query result)
+        :param workers:     max number of pages crawled concurrently
+        :param max_depth:   max depth of nested blocks
+        :return:            number of indexed pages
+        """
+        changed = [page for page in pages if isinstance(page, Page) and self.is_changed(page)]
+        if not changed:
+            return 0
+
+        def get_blocks(page: Page) -> Optional[BlockArray]:
+            children = api.blocks.get_block_children_recursive(id_=page.id, max_depth=max_depth)
+            return children.obj if children else None
+
+        logger.info(f"Indexing {len(changed)} pages")
+        with ThreadPoolExecutor(max_workers=min(workers, len(changed))) as pool:
+            for page, blocks in zip(changed, pool.map(get_blocks, changed)):
+                self.add_page(page, blocks)
+        return len(changed)
+
+    def _idf(self, df: int) -> float:
+        n = len(self.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int = 10, by_page: bool = True) -> List[Hit]:
+        """
+        Documents matching any term of the query ranked by BM25
+
+        :param query:     text
+        :param limit:     max number of hits (0 = all)
+        :param by_page:   one hit (the best block, scores are summed) per page. `False` - every block is a hit
+        :return:          hits in descending order of score
+        """
+        if not self.docs:
+            return []
+        average = self._total_length / len(self.docs)
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self._idf(len(posting))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self.docs[doc_id][1] / average)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        hits: Dict[str, Hit] = {}
+        for doc_id, score in scores.items():
+            page_id, _, text = self.docs[doc_id]
+            key = page_id if by_page else doc_id
+            hit = hits.get(key)
+            if hit is None:
+                hits[key] = Hit(score, page_id, doc_id, text)
+                continue
+            if score > scores[hit.block_id]:
+                hit.block_id, hit.text = doc_id, text
+            hit.score += score
+        result = sorted(hits.values(), key=lambda h: h.score, reverse=True)
+        return result[:limit] if limit else result
+
+    def save(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = {
+            "version": self.version, "k1": self.k1, "b": self.b,
+            "postings": self.postings, "docs": self.docs, "pages": self.pages,
+        }
+        _write_atomic(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str) -> FullTextIndex:
+        """
+        Loads saved index (empty index if the file does not exist or it is saved by other version)
+        """
+        index = cls()
+        if not os.path.isfile(path):
+            return index
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.version:
+            logger.warning(f"Index {path} is saved by other version. It will be rebuilt")
+            return index
+        index.k1, index.b = data["k1"], data["b"]
+        index.postings, index.docs, index.pages = data["postings"], data["docs"], data["pages"]
+        index._total_length = sum(doc[1] for doc in index.docs.values())
+        return index
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __repr__(self):
+        return f"FullTextIndex({len(self)} pages, {len(self.docs)} documents)"
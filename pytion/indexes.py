@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Optional, Dict, List, Any, Iterable, Tuple
+
+from pytion.models import Model, Page, PageArray, RichTextArray, User, PropertyValue
+from pytion.query import _find_property, _aware
+
+# property types indexed by every element of the value
+INVERTED_TYPES = ("multi_select", "relation", "people")
+# property types indexed in order (range queries)
+SORTED_TYPES = ("number", "date", "created_time", "last_edited_time")
+
+
+def _term(item: Any) -> Any:
+    # multi_select option name, User or LinkTo ID
+    if isinstance(item, str):
+        return item
+    return str(getattr(item, "id", item)).replace("-", "")
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Hashable and comparable key of python value of the property
+    """
+    if isinstance(value, PropertyValue):
+        return _key(value)
+    if isinstance(value, datetime):
+        return _aware(value)
+    if isinstance(value, RichTextArray):
+        return str(value)
+    if isinstance(value, User):
+        return value.id
+    if isinstance(value, list):
+        return tuple(_term(item) for item in value)
+    return value
+
+
+def _key(pv: Optional[PropertyValue]) -> Any:
+    if pv is None:
+        return None
+    if hasattr(pv, "start"):
+        return _aware(pv.start) if pv.start is not None else None
+    if isinstance(pv.value, datetime):
+        return _aware(pv.value)
+    if isinstance(pv.value, RichTextArray):
+        return str(pv.value)
+    return _normalize(pv.value)
+
+
+class Index(ABC):
+    kind = ""
+
+    def __init__(self, property_name: str, pages: Optional[Iterable[Page]] = None):
+        """
+        Index of pages by the property value. Keeps itself up to date by `add()`, `remove()`, `update()`
+
+        :param property_name:   property name or ID
+        :param pages:           pages to be indexed
+        """
+        self.property_name = property_name
+        self.pages: Dict[str, Page] = {}
+        self._keys: Dict[str, Any] = {}
+        if pages is not None:
+            for page in pages:
+                self.add(page)
+
+    def key(self, page: Page) -> Any:
+        return _key(_find_property(page, self.property_name))
+
+    def add(self, page: Page) -> None:
+        if page.id in self.pages:
+            self.remove(page)
+        key = self.key(page)
+        self.pages[page.id] = page
+        self._keys[page.id] = key
+        self._insert(page.id, key)
+
+    def remove(self, page: Page) -> None:
+        if page.id not in self.pages:
+            return
+        del self.pages[page.id]
+        self._delete(page.id, self._keys.pop(page.id))
+
+    def update(self, page: Page) -> None:
+        """
+        Re-indexes the page (new object or changed properties of the same one)
+        """
+        self.add(page)
+
+    @abstractmethod
+    def _insert(self, id_: str, key: Any) -> None:
+        """
+        Adds the page ID by its key to the structure of the index
+        """
+
+    @abstractmethod
+    def _delete(self, id_: str, key: Any) -> None:
+        """
+        Removes the page ID added by `_insert()` with the same key
+        """
+
+    def _result(self, ids: Iterable[str]) -> PageArray:
+        return PageArray([self.pages[id_] for id_ in ids], create=True)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.property_name}[{len(self)}])"
+
+
+class HashIndex(Index):
+    kind = "hash"
+
+    def __init__(self, property_name: str, pages: Optional[Iterable[Page]] = None):
+        """
+        Equality index: `select`, `status`, `title`, `number`, `checkbox` etc.
+        `None` key contains pages with empty values
+        """
+        self.buckets: Dict[Any, Dict[str, None]] = {}
+        super().__init__(property_name, pages)
+
+    def _insert(self, id_: str, key: Any) -> None:
+        self.buckets.setdefault(key, {})[id_] = None
+
+    def _delete(self, id_: str, key: Any) -> None:
+        bucket = self.buckets[key]
+        del bucket[id_]
+        if not bucket:
+            del self.buckets[key]
+
+    def get(self, value: Any) -> PageArray:
+        return self._result(self.buckets.get(_normalize(value), ()))
+
+    def keys(self) -> List[Any]:
+        return list(self.buckets)
+
+    def __contains__(self, value: Any) -> bool:
+        return _normalize(value) in self.buckets
+
+
+class SortedIndex(Index):
+    kind = "sorted"
+
+    def __init__(self, property_name: str, pages: Optional[Iterable[Page]] = None):
+        """
+        Ordered index for range queries: `number`, `date` (start of range), `created_time` etc.
+        Pages with empty values are kept in `.empty`
+        """
+        self.entries: List[Tuple[Any, str]] = []
+        self.empty: Dict[str, None] = {}
+        # keys are numbers (not dates). detected by the first value of the property
+        self.numeric: Optional[bool] = None
+        super().__init__(property_name, pages)
+
+    def key(self, page: Page) -> Any:
+        key = super().key(page)
+        if self.numeric is None and key is not None:
+            self.numeric = not isinstance(key, datetime)
+        return key
+
+    def _insert(self, id_: str, key: Any) -> None:
+        if key is None:
+            self.empty[id_] = None
+        else:
+            insort(self.entries, (key, id_))
+
+    def _delete(self, id_: str, key: Any) -> None:
+        if key is None:
+            del self.empty[id_]
+        else:
+            del self.entries[bisect_left(self.entries, (key, id_))]
+
+    def range(
+            self, start: Any = None, end: Any = None, include_start: bool = True, include_end: bool = True,
+    ) -> PageArray:
+        """
+        Pages with values between `start` and `end` in ascending order. `None` is an open bound
+
+        :param start:   number, datetime or string (number or ISO-8601 date by the type of the property)
+        :param end:     number, datetime or string (number or ISO-8601 date by the type of the property)
+        """
+        # (key,) sorts before and (key, "~") after every (key, id_) entry
+        if start is None:
+            low = 0
+        else:
+            start = self._bound(start)
+            low = bisect_left(self.entries, (start,)) if include_start else bisect_right(self.entries, (start, "~"))
+        if end is None:
+            high = len(self.entries)
+        else:
+            end = self._bound(end)
+            high = bisect_right(self.entries, (end, "~")) if include_end else bisect_left(self.entries, (end,))
+        return self._result(id_ for _, id_ in self.entries[low:high])
+
+    def _bound(self, value: Any) -> Any:
+        if not isinstance(value, str):
+            return _normalize(value)
+        if self.numeric:
+            return float(value)
+        if self.numeric is None:
+            # nothing is indexed yet: any bound gives no pages
+            try:
+                return float(value)
+            except ValueError:
+                pass
+        return _aware(Model.format_iso_time(value))
+
+    def get(self, value: Any) -> PageArray:
+        if value is None:
+            return self._result(self.empty)
+        return self.range(value, value)
+
+    def min(self) -> Optional[Page]:
+        return self.pages[self.entries[0][1]] if self.entries else None
+
+    def max(self) -> Optional[Page]:
+        return self.pages[self.entries[-1][1]] if self.entries else None
+
+
+class InvertedIndex(Index):
+    kind = "inverted"
+
+    def __init__(self, property_name: str, pages: Optional[Iterable[Page]] = None):
+        """
+        Index of every element of the value: `multi_select` option names, `relation` and `people` IDs
+        """
+        self.postings: Dict[Any, Dict[str, None]] = {}
+        super().__init__(property_name, pages)
+
+    def key(self, page: Page) -> Tuple[Any, ...]:
+        key = super().key(page)
+        if key is None:
+            return ()
+        return key if isinstance(key, tuple) else (key,)
+
+    def _insert(self, id_: str, key: Tuple[Any, ...]) -> None:
+        for term in key:
+            self.postings.setdefault(term, {})[id_] = None
+
+    def _delete(self, id_: str, key: Tuple[Any, ...]) -> None:
+        for term in key:
+            posting = self.postings[term]
+            posting.pop(id_, None)
+            if not posting:
+                del self.postings[term]
+
+    def _posting(self, term: Any) -> Dict[str, None]:
+        term = _term(term)
+        posting = self.postings.get(term)
+        if posting is None and isinstance(term, str):
+            # IDs are stored without dashes
+            posting = self.postings.get(term.replace("-", ""))
+        return posting if posting is not None else {}
+
+    def get(self, term: Any) -> PageArray:
+        """
+        Pages containing the term (option name, User, LinkTo or ID)
+        """
+        return self._result(self._posting(term))
+
+    def get_all(self, *terms: Any) -> PageArray:
+        """
+        Pages containing every term
+        """
+        postings = sorted((self._posting(term) for term in terms), key=len)
+        if not postings:
+            return self._result(())
+        return self._result(id_ for id_ in postings[0] if all(id_ in p for p in postings[1:]))
+
+    def get_any(self, *terms: Any) -> PageArray:
+        """
+        Pages containing at least one of the terms
+        """
+        ids: Dict[str, None] = {}
+        for term in terms:
+            ids.update(self._posting(term))
+        return self._result(ids)
+
+    def terms(self) -> List[Any]:
+        return list(self.postings)
+
+
+index_classes = {"hash": HashIndex, "sorted": SortedIndex, "inverted": InvertedIndex}
+
+
+def index_kind(pages: Iterable[Page], property_name: str) -> str:
+    """
+    Detects the kind of index by the type of the property of the first page which has it
+    """
+    for page in pages:
+        pv = _find_property(page, property_name)
+        if pv is None:
+            continue
+        if pv.type in INVERTED_TYPES:
+            return "inverted"
+        if pv.type in SORTED_TYPES or hasattr(pv, "start"):
+            return "sorted"
+        return "hash"
+    return "hash"
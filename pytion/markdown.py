@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import io
+import json
+import re
+from typing import Optional, Dict, List, Any, Iterable, Iterator, Union, TextIO
+
+from pytion.models import Block, BlockArray, RichText, RichTextArray
+
+_ESCAPE = re.compile(r"([\\`*_\[\]])")
+# block types which children are indented as list item content
+LIST_TYPES = ("bulleted_list_item", "numbered_list_item", "to_do", "toggle")
+# block types which children are quoted
+QUOTE_TYPES = ("quote", "callout")
+# block types rendered by children only
+CONTAINER_TYPES = ("synced_block", "column_list", "column", "breadcrumb", "unsupported", "table_of_contents")
+# block types which text starts with type marker (`- `, `# ` etc.)
+PREFIXED_TYPES = (
+    "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item", "toggle", "quote", "to_do",
+    "template",
+)
+
+
+def _content(block: Block) -> Union[RichTextArray, str]:
+    # rich text of the block without the marker
+    if isinstance(block.text, RichTextArray):
+        return block.text[1:] if block.type in PREFIXED_TYPES and not block.create_mode else block.text
+    return str(block.text) if block.text is not None else ""
+
+
+def _escape(text: str) -> str:
+    return _ESCAPE.sub(r"\\\1", text)
+
+
+def rich_text_to_markdown(text: Union[RichTextArray, RichText, str, None]) -> str:
+    """
+    Markdown of rich text: annotations (bold, italic, strikethrough, code), links and mentions
+    """
+    if text is None:
+        return ""
+    if isinstance(text, str):
+        return _escape(text)
+    if isinstance(text, RichText):
+        text = [text]
+    parts = []
+    for rt in text:
+        plain = str(rt.plain_text) if rt.plain_text is not None else ""
+        if rt.type == "mention" and plain.startswith("LinkTo(") and plain.endswith(")"):
+            plain = plain[7:-1]
+        annotations = rt.annotations or {}
+        part = f"`{plain}`" if annotations.get("code") else _escape(plain)
+        if plain.strip():
+            if annotations.get("bold"):
+                part = f"**{part}**"
+            if annotations.get("italic"):
+                part = f"*{part}*"
+            if annotations.get("strikethrough"):
+                part = f"~~{part}~~"
+        link = rt.href or (rt.simple if rt.type == "mention" and rt.simple != rt.plain_text else None)
+        if link:
+            part = f"[{part}]({link})"
+        parts.append(part)
+    return "".join(parts)
+
+
+class MarkdownWriter(object):
+    def __init__(self, stream: TextIO):
+        """
+        Writes blocks as Markdown to the stream one by one, so the whole document is never kept in memory.
+        Blocks must be in document order with nesting levels (`Block._level`),
+        like `get_block_children_recursive()` or `iter_block_children_recursive()` returns them
+
+        :param stream:  file, socket file or other object with `write(str)` method
+
+        `with open("page.md", "w") as f:`
+        `    MarkdownWriter(f).write_all(no.blocks.iter_block_children_recursive(page_id))`
+        """
+        self.stream = stream
+        # types of ancestors of the current block by levels
+        self._stack: List[str] = []
+        self._numbers: Dict[int, int] = {}
+        self._previous: Optional[str] = None
+        self._table_header: Optional[bool] = None
+        self._table_rows = 0
+
+    def _prefix(self, level: int) -> str:
+        prefix = ""
+        for type_ in self._stack[:level]:
+            if type_ in LIST_TYPES:
+                prefix += "    "
+            elif type_ in QUOTE_TYPES:
+                prefix += "> "
+        return prefix
+
+    def _lines(self, text: str, prefix: str, marker: str = "") -> None:
+        # continuation lines are aligned with the first line content (or quoted)
+        continuation = prefix + (marker if marker.startswith(">") else " " * len(marker))
+        for i, line in enumerate(text.split("\n")):
+            head = prefix + marker if i == 0 else continuation
+            self.stream.write((head + line).rstrip() + "\n" if line or i == 0 else continuation.rstrip() + "\n")
+
+    def write(self, block: Block) -> None:
+        level = block._level
+        self._stack = self._stack[:level] + [block.type]
+        for deeper in [key for key in self._numbers if key > level]:
+            del self._numbers[deeper]
+        if block.type != "numbered_list_item":
+            self._numbers.pop(level, None)
+        if block.type in CONTAINER_TYPES:
+            return
+        prefix = self._prefix(level)
+        # tight lists and tables: no blank lines between items
+        tight = (
+            block.type == self._previous and block.type in LIST_TYPES or block.type == "table_row"
+            or self._previous in LIST_TYPES and level > 0 and self._stack[level - 1] in LIST_TYPES
+        )
+        if self._previous is not None and not tight:
+            self.stream.write(prefix.rstrip() + "\n")
+        self._previous = block.type
+        self._render(block, prefix, level)
+
+    def _render(self, block: Block, prefix: str, level: int) -> None:
+        type_ = block.type
+        text = rich_text_to_markdown(_content(block))
+        plain = block._plain_text if block._plain_text != "None" else ""
+
+        if type_ == "paragraph":
+            self._lines(text, prefix)
+        elif type_ in ("heading_1", "heading_2", "heading_3"):
+            self._lines("#" * int(type_[-1]) + " " + _inline(text), prefix)
+        elif type_ == "bulleted_list_item" or type_ == "toggle":
+            self._lines(text, prefix, "- ")
+        elif type_ == "numbered_list_item":
+            number = self._numbers[level] = self._numbers.get(level, 0) + 1
+            self._lines(text, prefix, f"{number}. ")
+        elif type_ == "to_do":
+            self._lines(text, prefix, "- [x] " if getattr(block, "checked", False) else "- [ ] ")
+        elif type_ == "quote":
+            self._lines(text, prefix, "> ")
+        elif type_ == "callout":
+            icon = (getattr(block, "icon", None) or {}).get("emoji")
+            self._lines((icon + " " if icon else "") + text, prefix, "> ")
+        elif type_ == "code":
+            code = plain if plain else str(block.text)
+            self._lines(f"```{getattr(block, 'language', None) or ''}\n{code}\n```", prefix)
+        elif type_ == "equation":
+            self._lines(f"$$\n{block.text}\n$$", prefix)
+        elif type_ == "divider":
+            self._lines("---", prefix)
+        elif type_ == "image":
+            self._lines(f"![{rich_text_to_markdown(block.caption)}]({plain})", prefix)
+        elif type_ in ("video", "file", "pdf", "embed", "bookmark"):
+            caption = rich_text_to_markdown(block.caption) if block.caption else _escape(plain)
+            self._lines(f"[{caption}]({plain})", prefix)
+        elif type_ == "link_preview":
+            self._lines(f"<{plain}>", prefix)
+        elif type_ == "child_page":
+            self._lines(f"[{_escape(str(block.text))}]({block.parent.link})", prefix)
+        elif type_ == "child_database":
+            self._lines(f"[{_escape(str(block.text))}]({block.children.link})", prefix)
+        elif type_ == "link_to_page":
+            self._lines(f"[{block.link.uri[:-1].capitalize()}]({block.link.link})", prefix)
+        elif type_ == "table":
+            self._table_header = bool(getattr(block, "has_column_header", False))
+            self._table_rows = 0
+        elif type_ == "table_row":
+            cells = [_inline(rich_text_to_markdown(cell)).replace("|", "\\|") for cell in block.cells]
+            if self._table_rows == 0 and not self._table_header:
+                # markdown table must have the header
+                self._lines("|" + "|".join("   " for _ in cells) + "|", prefix)
+                self._lines("|" + "|".join(" --- " for _ in cells) + "|", prefix)
+            self._lines("| " + " | ".join(cells) + " |", prefix)
+            if self._table_rows == 0 and self._table_header:
+                self._lines("|" + "|".join(" --- " for _ in cells) + "|", prefix)
+            self._table_rows += 1
+        else:
+            self._lines(_escape(str(block.text)), prefix)
+
+    def write_all(self, blocks: Iterable[Block]) -> int:
+        """
+        :return:    number of written blocks
+        """
+        count = 0
+        for block in blocks:
+            self.write(block)
+            count += 1
+        return count
+
+
+def _inline(text: str) -> str:
+    # headings and table cells are single line
+    return text.replace("\n", " ")
+
+
+def write_markdown(blocks: Iterable[Block], stream: Optional[TextIO] = None) -> Optional[str]:
+    """
+    Writes blocks as Markdown to the stream (returns Markdown string if stream is not provided)
+
+    :param blocks:  BlockArray or any iterable of Blocks in document order
+    :param stream:  object with `write(str)` method
+    """
+    output = stream if stream is not None else io.StringIO()
+    MarkdownWriter(output).write_all(blocks)
+    return output.getvalue() if stream is None else None
+
+
+# Markdown -> blocks
+
+# max length of text content of rich text object and number of rich text objects in the block (API limits)
+MAX_TEXT_LENGTH = 2000
+MAX_RICH_TEXT = 100
+# common aliases of code block languages
+CODE_LANGUAGES = {
+    "": "plain text", "text": "plain text", "txt": "plain text", "py": "python", "python3": "python",
+    "js": "javascript", "ts": "typescript", "sh": "shell", "zsh": "shell", "console": "shell", "yml": "yaml",
+    "md": "markdown", "cpp": "c++", "cs": "c#", "csharp": "c#", "rb": "ruby", "golang": "go", "rs": "rust",
+    "kt": "kotlin", "ps1": "powershell", "dockerfile": "docker", "html": "html", "tex": "latex",
+}
+_DEFAULT_ANNOTATIONS = {
+    "bold": False, "italic": False, "strikethrough": False, "underline": False, "code": False, "color": "default"
+}
+_INLINE = re.compile(
+    r"\\([\\`*_{}\[\]()#+\-.!~|>])"
+    r"|(`+)(.+?)\2"
+    r"|\[([^\]]*)\]\(([^()\s]+)\)"
+    r"|<(https?://[^>\s]+)>"
+    r"|\*\*(?!\s)(.+?)(?<!\s)\*\*|(?<!\w)__(?!\s)(.+?)(?<!\s)__(?!\w)"
+    r"|~~(?!\s)(.+?)(?<!\s)~~"
+    r"|\*(?!\s)(.+?)(?<!\s)\*|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)"
+)
+_FENCE = re.compile(r"^(`{3,}|~{3,})\s*([^`\s]*)")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)(\s+#+)?$")
+_DIVIDER = re.compile(r"^([-*_])(\s*\1){2,}$")
+_SETEXT = re.compile(r"^(=+)$|^-+$")
+_TODO = re.compile(r"^[-*+]\s+\[([ xX])\]\s+(.*)$")
+_BULLET = re.compile(r"^[-*+]\s+(.*)$")
+_NUMBER = re.compile(r"^\d{1,9}[.)]\s+(.*)$")
+_QUOTE = re.compile(r"^>\s?(.*)$")
+_TABLE_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?$")
+
+
+def _add_text(items: List[Dict[str, Any]], text: str, annotations: Dict[str, Any], href: Optional[str]) -> None:
+    if not text:
+        return
+    last = items[-1] if items else None
+    if last is not None and last["annotations"] == annotations and last["href"] == href:
+        last["plain_text"] += text
+    else:
+        items.append({"type": "text", "plain_text": text, "href": href, "annotations": annotations, "text": {}})
+
+
+def _inline_items(
+        text: str, annotations: Optional[Dict[str, Any]] = None, href: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    annotations = annotations if annotations is not None else _DEFAULT_ANNOTATIONS
+    items: List[Dict[str, Any]] = []
+    position = 0
+    for m in _INLINE.finditer(text):
+        _add_text(items, text[position:m.start()], annotations, href)
+        position = m.end()
+        escaped, _, code, label, url, autolink, bold, bold_, strike, italic, italic_ = m.groups()
+        if escaped is not None:
+            _add_text(items, escaped, annotations, href)
+        elif code is not None:
+            _add_text(items, code.strip() if code.strip() else code, {**annotations, "code": True}, href)
+        elif url is not None:
+            for item in _inline_items(label or url, annotations, url):
+                _add_text(items, item["plain_text"], item["annotations"], item["href"])
+        elif autolink is not None:
+            _add_text(items, autolink, annotations, autolink)
+        else:
+            if bold is not None or bold_ is not None:
+                inner, key = (bold if bold is not None else bold_), "bold"
+            elif strike is not None:
+                inner, key = strike, "strikethrough"
+            else:
+                inner, key = (italic if italic is not None else italic_), "italic"
+            for item in _inline_items(inner, {**annotations, key: True}, href):
+                _add_text(items, item["plain_text"], item["annotations"], item["href"])
+    _add_text(items, text[position:], annotations, href)
+    return items
+
+
+def _split_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # text content of rich text object is limited
+    result = []
+    for item in items:
+        text = item["plain_text"]
+        for start in range(0, len(text), MAX_TEXT_LENGTH):
+            result.append({**item, "plain_text": text[start:start + MAX_TEXT_LENGTH]})
+    return result
+
+
+def markdown_to_rich_text(text: str) -> RichTextArray:
+    """
+    Rich text of inline Markdown: `**bold**`, `*italic*`, `~~strikethrough~~`, `` `code` ``, `[links](url)`
+    """
+    return RichTextArray(_split_items(_inline_items(text)))
+
+
+def _plain_rich_text(text: str) -> RichTextArray:
+    return RichTextArray(_split_items([
+        {"type": "text", "plain_text": text, "href": None, "annotations": _DEFAULT_ANNOTATIONS, "text": {}}
+    ]))
+
+
+def _text_blocks(type_: str, text: RichTextArray, **kwargs) -> List[Block]:
+    # long text is continued by the next block of the same type
+    if len(text) <= MAX_RICH_TEXT:
+        return [Block.create(text, type_=type_, **kwargs)]
+    return [
+        Block.create(RichTextArray([]) + text[start:start + MAX_RICH_TEXT], type_=type_, **kwargs)
+        for start in range(0, len(text), MAX_RICH_TEXT)
+    ]
+
+
+def _set_item_text(block: Block, text: RichTextArray) -> None:
+    # list items can not be continued by the next block of the same type (it is the next item),
+    # so long text is continued by paragraphs nested into the item
+    block.text = RichTextArray([]) + text[:MAX_RICH_TEXT]
+    block.child_blocks = None
+    if len(text) > MAX_RICH_TEXT:
+        paragraphs = _text_blocks("paragraph", RichTextArray([]) + text[MAX_RICH_TEXT:])
+        for child in paragraphs:
+            child._level = block._level + 1
+        block.child_blocks = BlockArray(paragraphs, create=True)
+
+
+def _cells(line: str) -> List[str]:
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    return [cell.strip().replace("\\|", "|") for cell in re.split(r"(?<!\\)\|", line)]
+
+
+class MarkdownParser(object):
+    def __init__(self):
+        """
+        Incremental Markdown parser: lines are fed one by one and top-level Blocks (`Block.create` objects with
+        nested `child_blocks`) are returned as soon as they are complete, so the whole document is never kept
+
+        Supported: headings, paragraphs, bulleted, numbered and to_do lists (nested by indentation),
+        quotes, fenced code with language, dividers, tables and inline formatting.
+        Rich text over API limits is continued by the next block of the same type (by nested paragraphs
+        for list items)
+
+        `parser = MarkdownParser()`
+        `for line in f:`
+        `    blocks = parser.feed(line)`
+        `blocks = parser.close()`
+        """
+        # (indent, list item Block) of open lists
+        self._stack: List[tuple] = []
+        self._root: Optional[Block] = None
+        self._done: List[Block] = []
+        self._paragraph: List[str] = []
+        self._quote: Optional[List[str]] = None
+        self._table: Optional[List[List[str]]] = None
+        self._table_header = False
+        self._code: Optional[Dict[str, Any]] = None
+        self._indent = 0
+        # list item which text is continued by the next line (and its source text)
+        self._item: Optional[List[Any]] = None
+
+    def _emit(self, block: Block, indent: int) -> None:
+        while self._stack and self._stack[-1][0] >= indent:
+            self._stack.pop()
+        if self._stack:
+            parent = self._stack[-1][1]
+            if getattr(parent, "child_blocks", None) is None:
+                parent.child_blocks = BlockArray([], create=True)
+            block._level = parent._level + 1
+            parent.child_blocks.append(block)
+            return
+        if self._root is not None:
+            self._done.append(self._root)
+        self._root = block
+
+    def _emit_all(self, blocks: List[Block], indent: int) -> None:
+        for block in blocks:
+            self._emit(block, indent)
+
+    def _flush(self) -> None:
+        # completes paragraph, quote or table
+        if self._paragraph:
+            text = "".join(self._paragraph).rstrip()
+            self._emit_all(_text_blocks("paragraph", markdown_to_rich_text(text)), self._indent)
+            self._paragraph = []
+        if self._quote is not None:
+            self._emit_all(_text_blocks("quote", markdown_to_rich_text("\n".join(self._quote))), self._indent)
+            self._quote = None
+        if self._table is not None:
+            width = max(len(row) for row in self._table)
+            rows = [
+                Block.create([markdown_to_rich_text(cell) for cell in row + [""] * (width - len(row))], "table_row")
+                for row in self._table
+            ]
+            self._emit(Block.create(
+                "", "table", table_width=width, has_column_header=self._table_header, has_row_header=False,
+                children=rows,
+            ), self._indent)
+            self._table = None
+        self._item = None
+
+    def _emit_code(self) -> None:
+        code = self._code
+        self._code = None
+        language = code["language"].lower()
+        text = _plain_rich_text("\n".join(code["lines"]))
+        self._emit_all(_text_blocks("code", text, language=CODE_LANGUAGES.get(language, language)), code["indent"])
+
+    def feed(self, line: str) -> List[Block]:
+        """
+        :param line:    line of Markdown document (with or without line break)
+        :return:        completed top-level Blocks
+        """
+        line = line.rstrip("\r\n").expandtabs(4)
+        stripped = line.strip()
+        indent = len(line) - len(line.lstrip())
+        if self._code is not None:
+            fence = self._code["fence"]
+            if stripped.startswith(fence) and not stripped.strip(fence[0]):
+                self._emit_code()
+            else:
+                prefix = self._code["indent"]
+                self._code["lines"].append(line[prefix:] if not line[:prefix].strip() else line.lstrip())
+            return self._pop_done()
+        if not stripped:
+            self._flush()
+            return self._pop_done()
+
+        if stripped.startswith("|") and (self._table is not None or not self._paragraph):
+            if self._table is None:
+                self._flush()
+                self._table, self._table_header, self._indent = [], False, indent
+            if len(self._table) == 1 and not self._table_header and _TABLE_SEPARATOR.match(stripped):
+                self._table_header = True
+            else:
+                self._table.append(_cells(stripped))
+            return self._pop_done()
+
+        m = _QUOTE.match(stripped)
+        if m and self._quote is not None:
+            self._quote.append(m.group(1))
+            return self._pop_done()
+        self._parse_block(line, stripped, indent)
+        return self._pop_done()
+
+    def _parse_block(self, line: str, stripped: str, indent: int) -> None:
+        m = _FENCE.match(stripped)
+        if m:
+            self._flush()
+            self._code = {"fence": m.group(1), "language": m.group(2), "lines": [], "indent": indent}
+            return
+        m = _HEADING.match(stripped)
+        if m:
+            self._flush()
+            level = min(len(m.group(1)), 3)
+            self._emit_all(_text_blocks(f"heading_{level}", markdown_to_rich_text(m.group(2))), indent)
+            return
+        m = _SETEXT.match(stripped)
+        if m and self._paragraph:
+            # underlined heading
+            text = "".join(self._paragraph).strip()
+            indent, self._paragraph = self._indent, []
+            type_ = "heading_1" if m.group(1) else "heading_2"
+            self._emit_all(_text_blocks(type_, markdown_to_rich_text(text)), indent)
+            return
+        if _DIVIDER.match(stripped):
+            self._flush()
+            self._emit(Block.create("", "divider"), indent)
+            return
+        m = _TODO.match(stripped)
+        if m:
+            self._item_block("to_do", m.group(2), indent, checked=m.group(1) != " ")
+            return
+        m = _BULLET.match(stripped) or _NUMBER.match(stripped)
+        if m:
+            self._item_block("bulleted_list_item" if m.re is _BULLET else "numbered_list_item", m.group(1), indent)
+            return
+        m = _QUOTE.match(stripped)
+        if m:
+            self._flush()
+            self._quote, self._indent = [m.group(1)], indent
+            return
+        if self._item is not None and not self._paragraph:
+            # lazy continuation of list item text
+            block, text = self._item
+            self._item[1] = text = text + " " + stripped
+            _set_item_text(block, markdown_to_rich_text(text))
+            return
+        if self._quote is not None or self._table is not None:
+            self._flush()
+        if not self._paragraph:
+            self._indent = indent
+        # two trailing spaces is a hard line break
+        self._paragraph.append(stripped + ("\n" if line.endswith("  ") else " "))
+
+    def _item_block(self, type_: str, text: str, indent: int, **kwargs) -> None:
+        self._flush()
+        block = Block.create(RichTextArray([]), type_, **kwargs)
+        self._emit(block, indent)
+        _set_item_text(block, markdown_to_rich_text(text))
+        self._stack.append((indent, block))
+        self._item = [block, text]
+
+    def _pop_done(self) -> List[Block]:
+        done, self._done = self._done, []
+        return done
+
+    def close(self) -> List[Block]:
+        """
+        Completes the document
+        :return:    the rest of top-level Blocks
+        """
+        if self._code is not None:
+            self._emit_code()
+        self._flush()
+        self._stack = []
+        if self._root is not None:
+            self._done.append(self._root)
+            self._root = None
+        return self._pop_done()
+
+
+def parse_markdown(source: Union[str, Iterable[str]]) -> Iterator[Block]:
+    """
+    Parses Markdown into Blocks to be created (`block_append`). Yields top-level Blocks with nested `child_blocks`
+
+    :param source:  Markdown string or iterable of lines (file opened in text mode for ex.)
+
+    `blocks = BlockArray(list(parse_markdown("# Title\\n- item\\n    - subitem")), create=True)`
+    """
+    if isinstance(source, str):
+        source = io.StringIO(source)
+    parser = MarkdownParser()
+    for line in source:
+        yield from parser.feed(line)
+    yield from parser.close()
+
+
+def walk_blocks(blocks: Iterable[Block]) -> Iterator[Block]:
+    """
+    Blocks with nested `child_blocks` in document order (flat, levels are in `Block._level`)
+    """
+    for block in blocks:
+        yield block
+        children = getattr(block, "child_blocks", None)
+        if children:
+            yield from walk_blocks(children)
+
+
+def _elements(block: Block, nesting: int) -> int:
+    # number of blocks sent in the append request with the block
+    children = getattr(block, "child_blocks", None)
+    if not children or not (nesting > 0 or block.type == "table"):
+        return 1
+    return 1 + sum(_elements(child, max(nesting - 1, 0)) for child in children[:Block.max_children])
+
+
+def chunk_blocks(
+        blocks: Iterable[Block], size: int = Block.max_children, max_elements: int = 1000, max_bytes: int = 450_000,
+) -> Iterator[BlockArray]:
+    """
+    Groups Blocks into BlockArrays for `block_append` requests: every chunk fits API limits (number of children,
+    number of block elements including nested ones and payload size). If the block is too big with nested children,
+    its `nesting` is reduced and the rest of children is to be appended by next requests (`block_append_markdown`)
+
+    :param blocks:        Blocks (`parse_markdown()` result for ex.)
+    :param size:          max number of top-level Blocks in the chunk
+    :param max_elements:  max number of blocks in the request (with nested)
+    :param max_bytes:     max payload size
+
+    `for chunk in chunk_blocks(parse_markdown(text)):`
+    `    no.blocks.block_append("PAGE ID", blocks=chunk)`
+    """
+    batch: List[Block] = []
+    elements = length = 0
+    for block in blocks:
+        nesting = block.nesting
+        while True:
+            count = _elements(block, nesting)
+            weight = len(json.dumps(block.get(with_object_type=True, nesting=nesting)))
+            if nesting == 0 or count <= max_elements and weight <= max_bytes:
+                break
+            nesting -= 1
+        if nesting != block.nesting:
+            block.nesting = nesting
+        if batch and (len(batch) >= size or elements + count > max_elements or length + weight > max_bytes):
+            yield BlockArray(batch, create=True)
+            batch, elements, length = [], 0, 0
+        batch.append(block)
+        elements += count
+        length += weight
+    if batch:
+        yield BlockArray(batch, create=True)
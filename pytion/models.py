@@ -1,12 +1,41 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import sys
 from datetime import datetime
-from typing import Optional, Dict, Union, List, Any
+from functools import lru_cache
+from typing import Optional, Dict, Union, List, Any, Callable
 from collections.abc import MutableSequence
 
 from pytion.envs import NOTION_URL
 
 
+# `Z` suffix is supported by `datetime.fromisoformat` since python 3.11
+_FROMISOFORMAT_Z = sys.version_info >= (3, 11)
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso_time(time: str) -> datetime:
+    """
+    Decodes ISO 8601 time. Notion formats:
+    2020-08-12T02:12:33.231Z
+    2020-08-12T02:12:33.231+00:00
+    2020-08-12
+
+    Many objects share the same timestamps, so results are cached (datetime is immutable)
+    """
+    if _FROMISOFORMAT_Z or time[-1] != "Z":
+        return datetime.fromisoformat(time)
+    return datetime.fromisoformat(time[:-1] + "+00:00")
+
+
+def _format_iso_time(time: datetime) -> str:
+    """
+    Encodes time as Notion does: 2020-08-12T02:12:33.231Z (the offset is kept if time is not UTC)
+    """
+    text = time.isoformat(timespec="milliseconds")
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
 # I wanna use pydantic, but API provide variable names of property
 
 class RichText(object):
@@ -18,6 +47,9 @@ class RichText(object):
         #     self._create_default_annotations()
         self.type: str = kwargs.get("type")
         self.simple = ""
+        # API content of the type and plain text as they are provided (for `raw`)
+        self._content = kwargs.get(self.type)
+        self._source_text = kwargs.get("plain_text")
         if self.type == "mention":
             subtype = kwargs[self.type].get("type")
             if subtype == "user":
@@ -72,16 +104,34 @@ class RichText(object):
     # def __len__(self):
     #     return len(self.plain_text)
 
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """
+        API dict of the rich text (read shape, mentions and formatting are kept)
+        """
+        return {
+            "type": self.type,
+            self.type: self._content,
+            "annotations": self.annotations,
+            "plain_text": self._source_text,
+            "href": self.href,
+        }
+
     def get(self) -> Dict[str, Any]:
         """
         Text type supported only
         """
-        return {
+        data = {
             "type": "text",
-            "text": {"content": self.plain_text, "link": None},
-            # "annotations": self.annotations,
+            "text": {"content": self.plain_text, "link": {"url": self.href} if self.href else None},
             # "plain_text": self.plain_text,
         }
+        # formatting is sent only if it is set
+        if self.annotations and any(
+                value != "default" if key == "color" else value for key, value in self.annotations.items()
+        ):
+            data["annotations"] = self.annotations
+        return data
 
 
 class RichTextArray(MutableSequence):
@@ -121,6 +171,10 @@ class RichTextArray(MutableSequence):
     def get(self) -> List[Dict[str, Any]]:
         return [item.get() for item in self]
 
+    @property
+    def raw(self) -> List[Dict[str, Any]]:
+        return [item.raw for item in self]
+
     @classmethod
     def create(cls, text: str):
         return cls([{"type": "text", "plain_text": text, "text": {}}])
@@ -151,9 +205,11 @@ class User(object):
         :param avatar_url: str
 
         Also Local attrs:
-        :param raw: dict from API
+        :param raw: dict from API (re-derived from attrs if `keep_raw=False` is provided)
         :param email: str if user is person
         """
+        keep_raw = kwargs.pop("keep_raw", True)
+        kwargs.pop("lazy", None)  # User is always decoded
         self.id = kwargs.get("id", "").replace("-", "")
         self.object = kwargs.get("object")  # user
         self.type = kwargs.get("type")
@@ -168,7 +224,26 @@ class User(object):
         else:
             self.email = None
             self.workspace_name = None
-        self.raw = kwargs
+        self._raw = kwargs if keep_raw else None
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        if self._raw is not None:
+            return self._raw
+        raw = {"object": self.object, "id": self.id}
+        if self.type:
+            raw["type"] = self.type
+            raw["name"] = self.name
+            raw["avatar_url"] = self.avatar_url
+            if self.type == "person":
+                raw[self.type] = {"email": self.email}
+            elif self.type == "bot":
+                raw[self.type] = {"workspace_name": self.workspace_name}
+        return raw
+
+    @raw.setter
+    def raw(self, value: Optional[Dict[str, Any]]) -> None:
+        self._raw = value
 
     def __str__(self):
         if self.name and self.email:
@@ -180,6 +255,16 @@ class User(object):
     def __repr__(self):
         return f"User({self})"
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, User):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
     def get(self) -> Dict[str, str]:
         return {
             "object": self.object,
@@ -200,31 +285,135 @@ class Model(object):
     :param created_by:
     :param last_edited_by:
     :param raw:
+
+    Local attrs:
+    :param keep_raw: set to `False` to drop the API dict after parsing. `raw` will be re-derived from attrs
+    :param lazy: set to `True` to decode attrs from the API dict on first access (then cached)
+    :param interner: `Interner` object to share equal User and LinkTo objects between models
     """
+    # lazy mode: attrs which can be decoded alone. name -> method(source, name)
+    # every other attr is decoded with the whole object on first access
+    _lazy_attrs = {
+        "created_time": "_decode_time",
+        "last_edited_time": "_decode_time",
+        "created_by": "_decode_user",
+        "last_edited_by": "_decode_user",
+    }
 
     def __init__(self, **kwargs) -> None:
+        self._keep_raw: bool = kwargs.pop("keep_raw", True)
+        self._interner: Optional[Interner] = kwargs.pop("interner", None)
+        lazy = kwargs.pop("lazy", False)
         self.id = kwargs.get("id", "").replace("-", "")
         self.object = kwargs.get("object")
+        self._raw = kwargs if self._keep_raw else None
+        if lazy:
+            self._source = kwargs
+            return
         self.created_time = self.format_iso_time(kwargs.get("created_time"))
         self.last_edited_time = self.format_iso_time(kwargs.get("last_edited_time"))
-        self.created_by = User(**kwargs["created_by"]) if kwargs.get("created_by") else None
-        self.last_edited_by = User(**kwargs["last_edited_by"]) if kwargs.get("last_edited_by") else None
-        self.raw = kwargs
+        self.created_by = self._decode_user(kwargs, "created_by")
+        self.last_edited_by = self._decode_user(kwargs, "last_edited_by")
+
+    def __getattr__(self, name: str) -> Any:
+        # called only if the attr is not found. so it is not decoded yet (lazy mode) or does not exist
+        source = self.__dict__.get("_source")
+        if source is None or name.startswith("__"):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        if name in self._lazy_attrs:
+            value = getattr(self, self._lazy_attrs[name])(source, name)
+            setattr(self, name, value)
+            return value
+        self.decode()
+        return object.__getattribute__(self, name)
+
+    @property
+    def is_lazy(self) -> bool:
+        """
+        True if the object is not fully decoded yet
+        """
+        return "_source" in self.__dict__
+
+    def decode(self) -> None:
+        """
+        Decode all attrs of lazy object. Already decoded or modified attrs are kept.
+        Attrs are decoded into a new object first: other threads read the lazy object meanwhile
+        """
+        source = self.__dict__.get("_source")
+        if source is None:
+            return
+        decoded = object.__new__(type(self))
+        decoded.__init__(**source, **self._options)
+        state = decoded.__dict__
+        state.update((name, value) for name, value in self.__dict__.items() if name != "_source")
+        self.__dict__.update(state)
+        self.__dict__.pop("_source", None)
+
+    @property
+    def _options(self) -> Dict[str, Any]:
+        # local attrs for nested models
+        return {"keep_raw": self._keep_raw, "interner": self._interner}
+
+    def _decode_time(self, source: Dict[str, Any], name: str) -> Optional[datetime]:
+        return self.format_iso_time(source.get(name))
+
+    def _decode_user(self, source: Dict[str, Any], name: str) -> Optional[User]:
+        if not source.get(name):
+            return None
+        if self._interner is not None:
+            return self._interner.user(source[name], keep_raw=self._keep_raw)
+        return User(**source[name], keep_raw=self._keep_raw)
+
+    def _decode_link(self, data: Union[Dict[str, Any], LinkTo]) -> LinkTo:
+        if isinstance(data, LinkTo):
+            return data
+        if self._interner is not None:
+            return self._interner.link(data)
+        return LinkTo(**data)
+
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """
+        API dict of the object. It is re-derived from attrs if the object was created with `keep_raw=False`
+        """
+        if self._raw is not None:
+            return self._raw
+        if self.is_lazy:
+            return self._source
+        return self._derive_raw()
+
+    @raw.setter
+    def raw(self, value: Optional[Dict[str, Any]]) -> None:
+        self._raw = value
+
+    def _derive_raw(self) -> Dict[str, Any]:
+        raw = {"object": self.object, "id": self.id}
+        if self.created_time:
+            raw["created_time"] = _format_iso_time(self.created_time)
+        if self.last_edited_time:
+            raw["last_edited_time"] = _format_iso_time(self.last_edited_time)
+        if self.created_by:
+            raw["created_by"] = self.created_by.raw
+        if self.last_edited_by:
+            raw["last_edited_by"] = self.last_edited_by.raw
+        return raw
 
     @classmethod
     def format_iso_time(cls, time: str) -> Optional[datetime]:
         if not time:
             return None
-        return datetime.fromisoformat(time.replace("Z", "+00:00"))
+        return _parse_iso_time(time)
 
 
 class Property(object):
-    def __init__(self, data: Dict[str, Any]):
+    def __init__(self, data: Dict[str, Any], keep_raw: bool = True):
         self.to_delete = True if data.get("type", False) is None else False
         self.id: str = data.get("id")
         self.type: str = data.get("type", "")
         self.name: str = data.get("name")
-        self.raw = data
+        self._raw = data if keep_raw else None
+        # API dict of the type (configuration or value) is kept for `raw` if the whole dict is not kept
+        self._source_value = data.get(self.type) if not keep_raw and self.type else None
         self.subtype = None
 
         if self.type == "relation":
@@ -250,6 +439,21 @@ class Property(object):
                 self.rollup_property_id = data[self.type].get("rollup_property_id")
                 self.rollup_property_name = data[self.type].get("rollup_property_name")
 
+    @property
+    def raw(self) -> Dict[str, Any]:
+        if self._raw is not None:
+            return self._raw
+        raw = {"id": self.id, "name": self.name, "type": self.type}
+        if self._source_value is not None:
+            raw[self.type] = self._source_value
+        else:
+            raw.update(self.get() or {})
+        return raw
+
+    @raw.setter
+    def raw(self, value: Optional[Dict[str, Any]]) -> None:
+        self._raw = value
+
     def __str__(self):
         return self.name if self.name else self.type
 
@@ -324,129 +528,89 @@ class Property(object):
 
 
 class PropertyValue(Property):
+    # type -> func(property_value, data) which sets `.value` (and type specific attrs) from API dict
+    parsers: Dict[str, Callable[[PropertyValue, Dict[str, Any]], None]] = {}
+    # values of these types are truncated to `max_items` in Page objects (full value is a paginated property item)
+    paginated_types = ("title", "rich_text", "relation", "people")
+    max_items = 25
+    # `raw` of these types is rebuilt from `value` if the API dict is not kept (`keep_raw=False`).
+    # API value of other types is kept as is: it is computed by Notion or is not fully parsed (options, time zone)
+    derived_types = (
+        "title", "rich_text", "number", "checkbox", "url", "email", "phone_number", "people", "relation",
+        "created_by", "last_edited_by",
+    )
+
     def __init__(self, data: Dict, name: str, **kwargs):
-        super().__init__(data)
+        keep_raw = kwargs.get("keep_raw", True)
+        # Property.__init__ is not called: schema attrs (options, relation and rollup config) are not in values
+        self.to_delete = data.get("type", False) is None
+        self.id: str = data.get("id")
+        self.type: str = data.get("type", "")
+        self._raw = data if keep_raw else None
+        self._source_value = None
+        self.subtype = None
         # getting Paginated Properties (for retrieving property item)
         # *Pagination
         if data.get("object") and data["object"] == "list":
-            if data.get("results"):
-                self.type = data["results"][0].get("type")
-                data[self.type] = [sub_dict.get(sub_dict.get("type")) for sub_dict in data["results"]]
+            item = data.get("property_item") or {}
+            results = data.get("results") or []
+            if item.get("type") in self.paginated_types or not results:
+                self.type = item.get("type")
+            else:
+                self.type = results[0].get("type")
+            if self.type:
+                data[self.type] = [sub_dict.get(sub_dict.get("type")) for sub_dict in results]
+            self.id = item.get("id", self.id)
 
         self.name = name
         self.value = None
+        self._keep_raw = keep_raw
+        self._interner: Optional[Interner] = kwargs.get("interner")
 
-        if self.type in ["title", "rich_text"]:
-            if isinstance(data[self.type], list):
-                self.value = RichTextArray(data[self.type])
-            elif isinstance(data[self.type], RichTextArray):
-                self.value = data[self.type]
-            else:
-                self.value = RichTextArray.create(data[self.type])
-
-        if self.type == "number":
-            self.value: Union[int, float, None] = data["number"]
+        parser = self.parsers.get(self.type)
+        if parser:
+            parser(self, data)
+        if not keep_raw:
+            self._source_value = data.get(self.type) if self.type not in self.derived_types else None
 
-        if self.type == "select":
-            if data["select"] and isinstance(data["select"], dict):
-                self.value: Optional[str] = data["select"].get("name")
-            elif data["select"] and isinstance(data["select"], str):
-                self.value = data["select"]
-            else:
-                self.value = None
-
-        if self.type == "multi_select":
-            self.value: List[str] = [(v.get("name") if isinstance(v, dict) else v) for v in data["multi_select"]]
-
-        if self.type == "checkbox":
-            self.value: bool = data["checkbox"]
-
-        if self.type == "date":
-            if isinstance(data["date"], datetime):
-                self.value = data["date"].isoformat()
-                self.start = data["date"]
-                self.end = None
-            elif data["date"]:
-                self.value: Optional[str] = data["date"].get("start")
-                self.start: Optional[datetime] = Model.format_iso_time(data["date"].get("start"))
-                self.end: Optional[datetime] = Model.format_iso_time(data["date"].get("end"))
-            else:
-                self.value = None
-                self.start = None
-                self.end = None
-
-        if "time" in self.type:
-            self.value: Optional[datetime] = Model.format_iso_time(data.get(self.type))
-
-        if self.type == "formula":
-            formula_type = data["formula"]["type"]
-            if formula_type == "date":
-                if data["formula"]["date"]:
-                    self.value: str = data["formula"]["date"].get("start")
-                    self.start: Optional[datetime] = Model.format_iso_time(data["formula"]["date"].get("start"))
-                    self.end: Optional[datetime] = Model.format_iso_time(data["formula"]["date"].get("end"))
-                else:
-                    self.value = None
-                    self.start = None
-                    self.end = None
-            else:
-                self.value: Union[str, int, float, bool] = data["formula"][formula_type]
-
-        if self.type == "created_by":
-            self.value = User(**data.get(self.type))
-
-        if self.type == "last_edited_by":
-            self.value = User(**data.get(self.type))
+    @property
+    def raw(self) -> Dict[str, Any]:
+        """
+        API dict of the value (read shape). It is re-derived if the value was created with `keep_raw=False`
+        """
+        if self._raw is not None:
+            return self._raw
+        raw = {"id": self.id, "type": self.type}
+        if self.type not in self.derived_types:
+            raw[self.type] = self._source_value
+        elif self.type in ("title", "rich_text"):
+            raw[self.type] = self.value.raw if self.value is not None else []
+        elif self.type == "people":
+            raw[self.type] = [user.raw for user in self.value or []]
+        elif self.type == "relation":
+            raw[self.type] = [{"id": link.id} for link in self.value or []]
+            raw["has_more"] = getattr(self, "has_more", False)
+        elif self.type in ("created_by", "last_edited_by"):
+            raw[self.type] = self.value.raw if self.value is not None else None
+        else:
+            raw[self.type] = self.value
+        return raw
 
-        if self.type == "people":
-            self.value = [user if isinstance(user, User) else User(**user) for user in data[self.type]]
+    @raw.setter
+    def raw(self, value: Optional[Dict[str, Any]]) -> None:
+        self._raw = value
 
+    @property
+    def is_truncated(self) -> bool:
+        """
+        The value may be incomplete: Page objects contain only first `max_items` items of `paginated_types`
+        (`has_more` flag is provided for relations only). Use `Element.get_page_property()` to get the full value
+        """
         if self.type == "relation":
-            self.value: List[LinkTo] = [
-                LinkTo.create(page_id=item.get("id")) if not isinstance(item, LinkTo) else item
-                for item in data[self.type]
-            ]
-            self.has_more = data["has_more"] if "has_more" in data else False
-
-        if self.type == "status":
-            self.value = data[self.type].get("name") if isinstance(data[self.type], dict) else data[self.type]
-
-        if self.type == "rollup":
-            rollup_type = data["rollup"]["type"]
-            if rollup_type == "array":
-                if len(data["rollup"]["array"]) == 0:
-                    self.value = None
-                elif len(data["rollup"]["array"]) == 1:
-                    self.value = PropertyValue(data["rollup"]["array"][0], rollup_type)
-                else:
-                    self.value = [PropertyValue(element, rollup_type).value for element in data["rollup"]["array"]]
-
-            elif rollup_type == "number":
-                self.value: Union[int, float, None] = data["rollup"]["number"]
-
-            elif rollup_type == "date":
-                if data["rollup"]["date"]:
-                    self.value: Optional[str] = data["rollup"]["date"].get("start")
-                    self.start: Optional[datetime] = Model.format_iso_time(data["rollup"]["date"].get("start"))
-                    self.end: Optional[datetime] = Model.format_iso_time(data["rollup"]["date"].get("end"))
-                else:
-                    self.value = None
-                    self.start = None
-                    self.end = None
-            else:
-                self.value = "unsupported rollup type"
-
-        if self.type == "files":
-            self.value = "unsupported"
-
-        if self.type == "url":
-            self.value: Optional[str] = data.get("url")
-
-        if self.type == "email":
-            self.value: Optional[str] = data.get("email")
-
-        if self.type == "phone_number":
-            self.value: Optional[str] = data.get("phone_number")
+            return bool(getattr(self, "has_more", False))
+        if self.type in self.paginated_types:
+            return self.value is not None and len(self.value) >= self.max_items
+        return False
 
     def __str__(self):
         return str(self.value)
@@ -515,6 +679,22 @@ class PropertyValue(Property):
             return {self.type: {}}
         return None
 
+    @classmethod
+    def register_parser(cls, *types: str) -> Callable:
+        """
+        Decorator to register the parser of values of provided property types.
+        Parser is called as `func(property_value, data)` and must set `property_value.value`
+
+        @PropertyValue.register_parser("my_type")
+        def parse_my_type(pv, data):
+            pv.value = data["my_type"]
+        """
+        def decorator(func: Callable[[PropertyValue, Dict[str, Any]], None]) -> Callable:
+            for type_ in types:
+                cls.parsers[type_] = func
+            return func
+        return decorator
+
     @classmethod
     def create(cls, type_: str = "", value: Any = None, **kwargs):
         """
@@ -534,6 +714,131 @@ class PropertyValue(Property):
         return cls({"type": type_, type_: value, **kwargs}, name="")
 
 
+@PropertyValue.register_parser("title", "rich_text")
+def _parse_rich_text_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    if isinstance(data[pv.type], list):
+        pv.value = RichTextArray(data[pv.type])
+    elif isinstance(data[pv.type], RichTextArray):
+        pv.value = data[pv.type]
+    else:
+        pv.value = RichTextArray.create(data[pv.type])
+
+
+@PropertyValue.register_parser("number", "checkbox", "url", "email", "phone_number")
+def _parse_simple_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = data.get(pv.type)
+
+
+@PropertyValue.register_parser("select")
+def _parse_select_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    if data["select"] and isinstance(data["select"], dict):
+        pv.value = data["select"].get("name")
+    elif data["select"] and isinstance(data["select"], str):
+        pv.value = data["select"]
+
+
+@PropertyValue.register_parser("multi_select")
+def _parse_multi_select_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = [(v.get("name") if isinstance(v, dict) else v) for v in data["multi_select"]]
+
+
+def _set_date_range(pv: PropertyValue, date: Optional[Dict[str, Any]]) -> None:
+    if date:
+        pv.value = date.get("start")
+        pv.start = Model.format_iso_time(date.get("start"))
+        pv.end = Model.format_iso_time(date.get("end"))
+    else:
+        pv.value = None
+        pv.start = None
+        pv.end = None
+
+
+@PropertyValue.register_parser("date")
+def _parse_date_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    if isinstance(data["date"], datetime):
+        pv.value = data["date"].isoformat()
+        pv.start = data["date"]
+        pv.end = None
+    else:
+        _set_date_range(pv, data["date"])
+
+
+@PropertyValue.register_parser("created_time", "last_edited_time")
+def _parse_time_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = Model.format_iso_time(data.get(pv.type))
+
+
+@PropertyValue.register_parser("formula")
+def _parse_formula_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    formula_type = data["formula"]["type"]
+    if formula_type == "date":
+        _set_date_range(pv, data["formula"]["date"])
+    else:
+        pv.value = data["formula"][formula_type]
+
+
+def _parse_user(pv: PropertyValue, data: Dict[str, Any]) -> User:
+    if pv._interner is not None:
+        return pv._interner.user(data, keep_raw=pv._keep_raw)
+    return User(**data, keep_raw=pv._keep_raw)
+
+
+@PropertyValue.register_parser("created_by", "last_edited_by")
+def _parse_user_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = _parse_user(pv, data[pv.type])
+
+
+@PropertyValue.register_parser("people")
+def _parse_people_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = [user if isinstance(user, User) else _parse_user(pv, user) for user in data[pv.type]]
+
+
+@PropertyValue.register_parser("relation")
+def _parse_relation_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    if pv._interner is not None:
+        pv.value = [
+            pv._interner.link({"type": "page_id", "page_id": item.get("id")}) if not isinstance(item, LinkTo) else item
+            for item in data[pv.type]
+        ]
+    else:
+        pv.value = [
+            LinkTo.create(page_id=item.get("id")) if not isinstance(item, LinkTo) else item
+            for item in data[pv.type]
+        ]
+    pv.has_more = data["has_more"] if "has_more" in data else False
+
+
+@PropertyValue.register_parser("status")
+def _parse_status_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = data[pv.type].get("name") if isinstance(data[pv.type], dict) else data[pv.type]
+
+
+@PropertyValue.register_parser("rollup")
+def _parse_rollup_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.function = data["rollup"].get("function")
+    rollup_type = data["rollup"]["type"]
+    if rollup_type == "array":
+        array = data["rollup"]["array"]
+        if len(array) == 1:
+            pv.value = PropertyValue(array[0], rollup_type, keep_raw=pv._keep_raw, interner=pv._interner)
+        elif array:
+            pv.value = [
+                PropertyValue(element, rollup_type, keep_raw=pv._keep_raw, interner=pv._interner).value
+                for element in array
+            ]
+    elif rollup_type == "number":
+        pv.value = data["rollup"]["number"]
+    elif rollup_type == "date":
+        _set_date_range(pv, data["rollup"]["date"])
+    else:
+        pv.value = "unsupported rollup type"
+
+
+@PropertyValue.register_parser("files")
+def _parse_files_value(pv: PropertyValue, data: Dict[str, Any]) -> None:
+    pv.value = "unsupported"
+
+
 class Database(Model):
     object = "database"
     path = "databases"
@@ -550,6 +855,10 @@ class Database(Model):
         :param is_inline:
         """
         super().__init__(**kwargs)
+        self.url: str = kwargs.get("url")
+        self.is_inline: bool = kwargs.get("is_inline")
+        if self.is_lazy:
+            return
         self.cover: Optional[Dict] = kwargs.get("cover")
         self.icon: Optional[Dict] = kwargs.get("icon")
         self.title = (kwargs.get("title")
@@ -557,11 +866,10 @@ class Database(Model):
                       else RichTextArray(kwargs["title"])
                       )
         self.properties = {
-            name: (value if isinstance(value, Property) else Property(value))
+            name: (value if isinstance(value, Property) else Property(value, keep_raw=self._keep_raw))
             for name, value in kwargs["properties"].items()
         }
-        self.parent = kwargs["parent"] if isinstance(kwargs.get("parent"), LinkTo) else LinkTo(**kwargs["parent"])
-        self.url: str = kwargs.get("url")
+        self.parent = self._decode_link(kwargs["parent"])
         self.description = None
         if "description" in kwargs and kwargs["description"]:
             if isinstance(kwargs["description"], RichTextArray):
@@ -570,7 +878,6 @@ class Database(Model):
                 self.description = RichTextArray.create(kwargs["description"])
             else:
                 self.description = RichTextArray(kwargs["description"])
-        self.is_inline: bool = kwargs.get("is_inline")
 
     def __str__(self):
         return str(self.title)
@@ -578,6 +885,20 @@ class Database(Model):
     def __repr__(self):
         return f"Database({self.title})"
 
+    def _derive_raw(self) -> Dict[str, Any]:
+        raw = super()._derive_raw()
+        raw.update({
+            "title": self.title.raw if isinstance(self.title, RichTextArray) else [],
+            "description": self.description.raw if self.description else [],
+            "icon": self.icon,
+            "cover": self.cover,
+            "properties": {name: p.raw for name, p in self.properties.items()},
+            "parent": self.parent.get(),
+            "url": self.url,
+            "is_inline": self.is_inline,
+        })
+        return raw
+
     def get(self) -> Dict[str, Dict]:
         new_dict = {
             "parent": self.parent.get(),
@@ -597,6 +918,7 @@ class Database(Model):
 class Page(Model):
     object = "page"
     path = "pages"
+    _lazy_attrs = {**Model._lazy_attrs, "title": "_decode_title"}
 
     def __init__(self, **kwargs) -> None:
         """
@@ -609,14 +931,17 @@ class Page(Model):
         :param url:
         """
         super().__init__(**kwargs)
-        self.cover: Optional[Dict] = kwargs.get("cover")
-        self.icon: Optional[Dict] = kwargs.get("icon")
-        self.parent = kwargs["parent"] if isinstance(kwargs.get("parent"), LinkTo) else LinkTo(**kwargs["parent"])
         self.archived: bool = kwargs.get("archived")
         self.url: str = kwargs.get("url")
+        if self.is_lazy:
+            return
+        self.cover: Optional[Dict] = kwargs.get("cover")
+        self.icon: Optional[Dict] = kwargs.get("icon")
+        self.parent = self._decode_link(kwargs["parent"])
         self.children = kwargs["children"] if "children" in kwargs else LinkTo(block=self)
+        options = self._options
         self.properties = {
-            name: (PropertyValue(data, name) if not isinstance(data, PropertyValue) else data)
+            name: (PropertyValue(data, name, **options) if not isinstance(data, PropertyValue) else data)
             for name, data in kwargs["properties"].items()
         }
         for p in self.properties.values():
@@ -632,6 +957,27 @@ class Page(Model):
     def __repr__(self):
         return f"Page({self.title})"
 
+    def _decode_title(self, source: Dict[str, Any], name: str) -> Optional[RichTextArray]:
+        for prop_name, data in source["properties"].items():
+            if isinstance(data, PropertyValue):
+                if "title" in data.type:
+                    return data.value
+            elif "title" in data.get("type", ""):
+                return PropertyValue(data, prop_name, **self._options).value
+        return None
+
+    def _derive_raw(self) -> Dict[str, Any]:
+        raw = super()._derive_raw()
+        raw.update({
+            "parent": self.parent.get(),
+            "archived": self.archived,
+            "icon": self.icon,
+            "cover": self.cover,
+            "url": self.url,
+            "properties": {name: p.raw for name, p in self.properties.items()},
+        })
+        return raw
+
     def get(self):
         new_dict = {
             "parent": self.parent.get(without_type=True),
@@ -658,6 +1004,11 @@ class Page(Model):
 class Block(Model):
     object = "block"
     path = "blocks"
+    # type -> func(block, data) which sets `.text`, `._plain_text` (and type specific attrs) from API dict of the type
+    parsers: Dict[str, Callable[[Block, Dict[str, Any]], None]] = {}
+    # API limits of append request: levels of nested children and number of children of the block
+    nesting = 2
+    max_children = 100
 
     def __init__(self, **kwargs):
         """
@@ -671,9 +1022,11 @@ class Block(Model):
         self.type: str = kwargs.get("type")
         self.has_children: bool = kwargs.get("has_children")
         self.archived: bool = kwargs.get("archived")
-        self.children = LinkTo(block=self)
         self._level = kwargs["level"] if kwargs.get("level") else 0
         self.create_mode: bool = kwargs["create_mode"] if "create_mode" in kwargs else False
+        if self.is_lazy:
+            return
+        self.children = LinkTo(block=self)
         self.parent = None
         self._plain_text = ""
 
@@ -689,229 +1042,19 @@ class Block(Model):
                     self.caption = RichTextArray.create(self.caption)
             if "is_toggleable" in kwargs:
                 self.is_toggleable = kwargs["is_toggleable"]
+            for attr in ("table_width", "has_column_header", "has_row_header"):
+                if attr in kwargs:
+                    setattr(self, attr, kwargs[attr])
+            if self.type == "table_row":
+                # the same attr as parsed rows have
+                self.cells = [RichTextArray.create(cell) if isinstance(cell, str) else cell for cell in self.text]
+            if kwargs.get("children"):
+                self.child_blocks = BlockArray(kwargs["children"], create=True)
             return
-        self.parent = kwargs["parent"] if isinstance(kwargs.get("parent"), LinkTo) else LinkTo(**kwargs["parent"])
-
-        if self.type == "paragraph":
-            self.text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self._plain_text = self.text.simple
-
-        elif "heading" in self.type:
-            indent = self.type.split("_")[-1]
-            indent_num = int(indent) if indent.isdigit() else 0
-            prefix = "#" * indent_num + " "
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create(prefix) + r_text
-            self._plain_text = r_text.simple
-            self.is_toggleable: bool = kwargs[self.type].get("is_toggleable")
-
-        elif self.type == "callout":
-            self.text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self._plain_text = self.text.simple
-            self.icon: Dict = kwargs[self.type].get("icon")
-
-        elif self.type == "quote":
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create("| ") + r_text
-            self._plain_text = r_text.simple
-
-        elif "list_item" in self.type:
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create("- ") + r_text
-            self._plain_text = r_text.simple
-            # Numbers does not support cause of lack of relativity
-
-        elif self.type == "to_do":
-            self.checked: bool = kwargs[self.type].get("checked")
-            prefix = "[x] " if self.checked else "[ ] "
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create(prefix) + r_text
-            self._plain_text = r_text.simple
-
-        elif self.type == "toggle":
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create("> ") + r_text
-            self._plain_text = r_text.simple
-
-        elif self.type == "code":
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.language: str = kwargs[self.type].get("language")
-            prefix = RichTextArray.create(f"```{self.language}\n") if self.language else RichTextArray.create("```\n")
-            self.text = prefix + r_text + "\n```"
-            self._plain_text = r_text.simple
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-
-        # when the block is child_page, parent will be the page object
-        # when the block is child_database, parent AND children will be the database object
-        elif "child" in self.type:
-            self.text: str = kwargs[self.type].get("title")
-            self._plain_text = str(self.text)
-            if self.type == "child_page":
-                # self.children is already set
-                self.parent = LinkTo(type="page", page=self.id)
-                self._plain_text = str(self.parent.link)
-            elif self.type == "child_database":
-                # well yes. parent and children are the same. parent of this database will be the page of this block
-                # and the database is children of this block
-                self.parent = LinkTo.create(database_id=self.id)
-                self.children = LinkTo.create(database_id=self.id)
-                self._plain_text = str(self.parent.link)
-                if not self.text:
-                    self.text = repr(self.children)
-            # page self.has_children is correct. checked.
-            # database self.has_children is false.
-            # database with custom source had no title!
-
-        # hello, markdown
-        elif self.type == "embed":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            text = kwargs[self.type].get("url")
-            self._plain_text = str(text)
-            if self.caption:
-                self.text = f'[{self.caption}]({text})'
-            else:
-                self.text = f'<{text}>' if text else "*Empty embed*"
-
-        elif self.type == "image":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            subtype = kwargs[self.type].get("type")
-            if subtype == "file":
-                # The file S3 URL will be valid for 1 hour
-                self.expiry_time = Model.format_iso_time(kwargs[self.type][subtype].get("expiry_time"))
-            else:
-                self.expiry_time = None
-            if subtype in ("file", "external"):
-                text = kwargs[self.type][subtype].get("url")
-                self._plain_text = str(text)
-                if self.caption:
-                    self.text = f'[{self.caption}]({text})'
-                else:
-                    self.text = f'<{text}>'
-            else:
-                self.text = "*Unknown image type*"
-                self._plain_text = "None"
-
-        elif self.type == "video":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            subtype = kwargs[self.type].get("type")
-            if subtype == "file":
-                self.expiry_time = Model.format_iso_time(kwargs[self.type][subtype].get("expiry_time"))
-            else:
-                self.expiry_time = None
-            if subtype in ("file", "external"):
-                text = kwargs[self.type][subtype].get("url")
-                self._plain_text = str(text)
-                if self.caption:
-                    self.text = f'[{self.caption}]({text})'
-                else:
-                    self.text = f'<{text}>'
-            else:
-                self.text = "*Unknown video type*"
-                self._plain_text = "None"
-
-        elif self.type == "file":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            subtype = kwargs[self.type].get("type")
-            if subtype == "file":
-                self.expiry_time = Model.format_iso_time(kwargs[self.type][subtype].get("expiry_time"))
-            else:
-                self.expiry_time = None
-            if subtype in ("file", "external"):
-                text = kwargs[self.type][subtype].get("url")
-                self._plain_text = str(text)
-                if self.caption:
-                    self.text = f'[{self.caption}]({text})'
-                else:
-                    self.text = f'<{text}>'
-            else:
-                self.text = "*Unknown file type*"
-                self._plain_text = "None"
-
-        elif self.type == "pdf":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            subtype = kwargs[self.type].get("type")
-            if subtype == "file":
-                self.expiry_time = Model.format_iso_time(kwargs[self.type][subtype].get("expiry_time"))
-            else:
-                self.expiry_time = None
-            if subtype in ("file", "external"):
-                text = kwargs[self.type][subtype].get("url")
-                self._plain_text = str(text)
-                if self.caption:
-                    self.text = f'[{self.caption}]({text})'
-                else:
-                    self.text = f'<{text}>'
-            else:
-                self.text = "*Unknown pdf type*"
-                self._plain_text = "None"
-
-        elif self.type == "breadcrumb":
-            self.text = "*breadcrumb block*"
-            self._plain_text = "None"
-
-        elif self.type == "bookmark":
-            self.caption = RichTextArray(kwargs[self.type].get("caption"))
-            text = kwargs[self.type].get("url")
-            self._plain_text = str(text)
-            if self.caption:
-                self.text = f'[{self.caption}]({text})'
-            else:
-                self.text = f'<{text}>' if text else "*Empty bookmark*"
-
-        elif self.type == "link_preview":
-            text = kwargs[self.type].get("url")
-            self._plain_text = str(text)
-            self.text = f'<{text}>'
-
-        elif self.type == "link_to_page":
-            self.link = LinkTo(**kwargs[self.type])
-            self.text = repr(self.link)
-            self._plain_text = str(self.link.link)
-
-        elif self.type == "equation":
-            self.text: str = kwargs[self.type].get("expression")
-            self._plain_text = str(self.text)
-
-        elif self.type == "divider":
-            self.text = "---"
-            self._plain_text = "None"
-
-        elif self.type == "table_of_contents":
-            self.text = "*Table of contents*"
-            self._plain_text = "None"
-
-        elif self.type == "template":
-            r_text = RichTextArray(kwargs[self.type].get("rich_text"))
-            self.text = RichTextArray.create("Template: ") + r_text
-            self._plain_text = r_text.simple
-
-        elif self.type == "synced_block":
-            synced_from = kwargs[self.type].get("synced_from")
-            self.text = "*SYNCED BLOCK:*"
-            self._plain_text = "None"
-            self.synced_from = LinkTo(**synced_from) if synced_from else None
-
-        elif self.type == "table":
-            self.table_width: int = kwargs[self.type].get("table_width")
-            self.text = f"*Table {self.table_width}xN:*"
-            self._plain_text = "None"
-
-        elif self.type == "table_row":
-            cells = kwargs[self.type].get("cells")
-            self.text = RichTextArray.create("| ")
-            for cell in cells:
-                text_cell = RichTextArray(cell)
-                self._plain_text += f"\"{text_cell}\","
-                self.text += text_cell + " | "
-            self._plain_text = self._plain_text.strip(",")
-
-        elif self.type == "unsupported":
-            self.text = "*****"
-            self._plain_text = "None"
-
-        else:
-            self.text = "*UNKNOWN_BLOCK_TYPE*"
-            self._plain_text = "None"
+        self.parent = self._decode_link(kwargs["parent"])
+        # text of the block is not reversible (prefixes, markdown), so API content of the type is kept for `raw`
+        self._source_content = kwargs.get(self.type) if not self._keep_raw else None
+        self.parsers.get(self.type, _parse_unknown_block)(self, kwargs.get(self.type) or {})
 
     def __str__(self):
         return str(self.text)
@@ -919,7 +1062,50 @@ class Block(Model):
     def __repr__(self):
         return f"Block({str(self.text)[:30]})"
 
-    def get(self, with_object_type: bool = False):
+    def _derive_raw(self) -> Dict[str, Any]:
+        raw = super()._derive_raw()
+        raw.update({"type": self.type, "has_children": self.has_children, "archived": self.archived})
+        if self.parent:
+            raw["parent"] = self.parent.get()
+        if getattr(self, "_source_content", None) is not None:
+            raw[self.type] = self._source_content
+        else:
+            raw.update(self.get() or {})
+        return raw
+
+    def get(self, with_object_type: bool = False, nesting: Optional[int] = None):
+        """
+        :param with_object_type:    add `object` and `type` keys
+        :param nesting:             levels of nested `child_blocks` of created block to be included
+                                    (`self.nesting` by default). First `max_children` of every level are included
+        """
+        new_dict = self._get_content()
+        if new_dict is None:
+            return None
+        if nesting is None:
+            nesting = self.nesting
+        child_blocks = getattr(self, "child_blocks", None)
+        # table can not be created without rows
+        if child_blocks and (nesting > 0 or self.type == "table"):
+            new_dict[self.type]["children"] = [
+                b.get(with_object_type=True, nesting=max(nesting - 1, 0)) for b in child_blocks[:self.max_children]
+            ]
+        if with_object_type:
+            new_dict["object"] = "block"
+            new_dict["type"] = self.type
+        return new_dict
+
+    def _get_content(self) -> Optional[Dict[str, Any]]:
+        if self.type == "divider":
+            return {self.type: {}}
+        if self.type == "table":
+            return {self.type: {
+                "table_width": self.table_width,
+                "has_column_header": bool(getattr(self, "has_column_header", False)),
+                "has_row_header": bool(getattr(self, "has_row_header", False)),
+            }}
+        if self.type == "table_row":
+            return {self.type: {"cells": [cell.get() for cell in self.cells]}}
         if self.type in [
             "paragraph", "quote", "heading_1", "heading_2", "heading_3", "to_do",
             "bulleted_list_item", "numbered_list_item", "toggle", "callout", "code", "child_database"
@@ -950,10 +1136,6 @@ class Block(Model):
                     new_dict[self.type]["is_toggleable"] = self.is_toggleable
                 else:
                     new_dict[self.type]["is_toggleable"] = False
-
-            if with_object_type:
-                new_dict["object"] = "block"
-                new_dict["type"] = self.type
             return new_dict
         return None
 
@@ -965,6 +1147,23 @@ class Block(Model):
             return str(self.text)
         return self._plain_text
 
+    @classmethod
+    def register_parser(cls, *types: str) -> Callable:
+        """
+        Decorator to register the parser of provided block types.
+        Parser is called as `func(block, data)` where `data` is the dict of block type content
+
+        @Block.register_parser("my_type")
+        def parse_my_type(block, data):
+            block.text = RichTextArray(data.get("rich_text"))
+            block._plain_text = block.text.simple
+        """
+        def decorator(func: Callable[[Block, Dict[str, Any]], None]) -> Callable:
+            for type_ in types:
+                cls.parsers[type_] = func
+            return func
+        return decorator
+
     @classmethod
     def create(cls, text: str, type_: str = "paragraph", **kwargs):
         """
@@ -975,7 +1174,14 @@ class Block(Model):
             :kwargs param language:         str for code
             :kwargs param caption:          str or RichTextArray for code
             :kwargs param is_toggleable:    bool for heading_1, heading_2, heading_3
+            :kwargs param table_width:      int for table
+            :kwargs param has_column_header: bool for table
+            :kwargs param has_row_header:   bool for table
+            :kwargs param children:         List[Block] nested blocks (table rows for table)
         :return:
+
+        `Block.create(["a", "b"], type_="table_row")` - text is the list of cells (str or RichTextArray)
+        `Block.create("", type_="divider")`
         """
         new_dict = {
             "type": type_,
@@ -984,18 +1190,214 @@ class Block(Model):
         return cls(**new_dict, create_mode=True, **kwargs)
 
 
+@Block.register_parser("paragraph")
+def _parse_paragraph(block: Block, data: Dict[str, Any]) -> None:
+    block.text = RichTextArray(data.get("rich_text"))
+    block._plain_text = block.text.simple
+
+
+@Block.register_parser("heading_1", "heading_2", "heading_3")
+def _parse_heading(block: Block, data: Dict[str, Any]) -> None:
+    indent = block.type.split("_")[-1]
+    indent_num = int(indent) if indent.isdigit() else 0
+    prefix = "#" * indent_num + " "
+    r_text = RichTextArray(data.get("rich_text"))
+    block.text = RichTextArray.create(prefix) + r_text
+    block._plain_text = r_text.simple
+    block.is_toggleable = data.get("is_toggleable")
+
+
+@Block.register_parser("callout")
+def _parse_callout(block: Block, data: Dict[str, Any]) -> None:
+    block.text = RichTextArray(data.get("rich_text"))
+    block._plain_text = block.text.simple
+    block.icon = data.get("icon")
+
+
+def _prefixed_text_parser(prefix: str) -> Callable[[Block, Dict[str, Any]], None]:
+    def parser(block: Block, data: Dict[str, Any]) -> None:
+        r_text = RichTextArray(data.get("rich_text"))
+        block.text = RichTextArray.create(prefix) + r_text
+        block._plain_text = r_text.simple
+    return parser
+
+
+# Numbers of list items does not support cause of lack of relativity
+Block.register_parser("quote")(_prefixed_text_parser("| "))
+Block.register_parser("bulleted_list_item", "numbered_list_item")(_prefixed_text_parser("- "))
+Block.register_parser("toggle")(_prefixed_text_parser("> "))
+Block.register_parser("template")(_prefixed_text_parser("Template: "))
+
+
+@Block.register_parser("to_do")
+def _parse_to_do(block: Block, data: Dict[str, Any]) -> None:
+    block.checked = data.get("checked")
+    prefix = "[x] " if block.checked else "[ ] "
+    r_text = RichTextArray(data.get("rich_text"))
+    block.text = RichTextArray.create(prefix) + r_text
+    block._plain_text = r_text.simple
+
+
+@Block.register_parser("code")
+def _parse_code(block: Block, data: Dict[str, Any]) -> None:
+    r_text = RichTextArray(data.get("rich_text"))
+    block.language = data.get("language")
+    prefix = RichTextArray.create(f"```{block.language}\n") if block.language else RichTextArray.create("```\n")
+    block.text = prefix + r_text + "\n```"
+    block._plain_text = r_text.simple
+    block.caption = RichTextArray(data.get("caption"))
+
+
+# when the block is child_page, parent will be the page object
+# when the block is child_database, parent AND children will be the database object
+@Block.register_parser("child_page", "child_database")
+def _parse_child(block: Block, data: Dict[str, Any]) -> None:
+    block.text = data.get("title")
+    if block.type == "child_page":
+        # block.children is already set
+        block.parent = LinkTo(type="page", page=block.id)
+    else:
+        # well yes. parent and children are the same. parent of this database will be the page of this block
+        # and the database is children of this block
+        block.parent = LinkTo.create(database_id=block.id)
+        block.children = LinkTo.create(database_id=block.id)
+        if not block.text:
+            block.text = repr(block.children)
+    block._plain_text = str(block.parent.link)
+    # page block.has_children is correct. checked.
+    # database block.has_children is false.
+    # database with custom source had no title!
+
+
+# hello, markdown
+@Block.register_parser("embed", "bookmark")
+def _parse_embed(block: Block, data: Dict[str, Any]) -> None:
+    block.caption = RichTextArray(data.get("caption"))
+    text = block.url = data.get("url")
+    block._plain_text = str(text)
+    if block.caption:
+        block.text = f'[{block.caption}]({text})'
+    else:
+        block.text = f'<{text}>' if text else f"*Empty {block.type}*"
+
+
+@Block.register_parser("image", "video", "file", "pdf")
+def _parse_file(block: Block, data: Dict[str, Any]) -> None:
+    block.caption = RichTextArray(data.get("caption"))
+    subtype = data.get("type")
+    if subtype == "file":
+        # The file S3 URL will be valid for 1 hour
+        block.expiry_time = Model.format_iso_time(data[subtype].get("expiry_time"))
+    else:
+        block.expiry_time = None
+    # Notion-hosted file or external URL
+    block.url = data[subtype].get("url") if subtype in ("file", "external") else None
+    if subtype in ("file", "external"):
+        text = block.url
+        block._plain_text = str(text)
+        if block.caption:
+            block.text = f'[{block.caption}]({text})'
+        else:
+            block.text = f'<{text}>'
+    else:
+        block.text = f"*Unknown {block.type} type*"
+        block._plain_text = "None"
+
+
+@Block.register_parser("link_preview")
+def _parse_link_preview(block: Block, data: Dict[str, Any]) -> None:
+    text = data.get("url")
+    block._plain_text = str(text)
+    block.text = f'<{text}>'
+
+
+@Block.register_parser("link_to_page")
+def _parse_link_to_page(block: Block, data: Dict[str, Any]) -> None:
+    block.link = LinkTo(**data)
+    block.text = repr(block.link)
+    block._plain_text = str(block.link.link)
+
+
+@Block.register_parser("equation")
+def _parse_equation(block: Block, data: Dict[str, Any]) -> None:
+    block.text = data.get("expression")
+    block._plain_text = str(block.text)
+
+
+def _constant_text_parser(text: str) -> Callable[[Block, Dict[str, Any]], None]:
+    def parser(block: Block, data: Dict[str, Any]) -> None:
+        block.text = text
+        block._plain_text = "None"
+    return parser
+
+
+Block.register_parser("breadcrumb")(_constant_text_parser("*breadcrumb block*"))
+Block.register_parser("divider")(_constant_text_parser("---"))
+Block.register_parser("table_of_contents")(_constant_text_parser("*Table of contents*"))
+Block.register_parser("unsupported")(_constant_text_parser("*****"))
+_parse_unknown_block = _constant_text_parser("*UNKNOWN_BLOCK_TYPE*")
+
+
+@Block.register_parser("synced_block")
+def _parse_synced_block(block: Block, data: Dict[str, Any]) -> None:
+    synced_from = data.get("synced_from")
+    block.text = "*SYNCED BLOCK:*"
+    block._plain_text = "None"
+    block.synced_from = LinkTo(**synced_from) if synced_from else None
+
+
+@Block.register_parser("table")
+def _parse_table(block: Block, data: Dict[str, Any]) -> None:
+    block.table_width = data.get("table_width")
+    block.has_column_header = data.get("has_column_header")
+    block.has_row_header = data.get("has_row_header")
+    block.text = f"*Table {block.table_width}xN:*"
+    block._plain_text = "None"
+
+
+@Block.register_parser("table_row")
+def _parse_table_row(block: Block, data: Dict[str, Any]) -> None:
+    block.text = RichTextArray.create("| ")
+    block.cells = []
+    for cell in data.get("cells"):
+        text_cell = RichTextArray(cell)
+        block.cells.append(RichTextArray(cell))
+        block._plain_text += f"\"{text_cell}\","
+        block.text += text_cell + " | "
+    block._plain_text = block._plain_text.strip(",")
+
+
 class ElementArray(MutableSequence):
     class_map = {"page": Page, "database": Database, "block": Block}
 
-    def __init__(self, array, create: bool = False):
+    def __init__(self, array, create: bool = False, workers: int = 0, intern: bool = False, **kwargs):
+        """
+        :param array:   list of dicts from API (or list of models if `create`)
+        :param create:  use provided models as is
+        :param workers: build models by this number of processes (see `pytion.parallel.parse_parallel`).
+                        `keep_raw`, `lazy` and `interner` of kwargs are used then
+        :param intern:  share equal User and LinkTo objects in the array (if `interner` is not provided).
+                        shared objects must not be modified: the change is seen by every model
+        :param kwargs:  local attrs for every model. `keep_raw` for ex.
+        """
         if create:
             self.array = array
             return
+        if workers > 1:
+            from pytion.parallel import parse_parallel  # parallel depends on models
+
+            self.array = parse_parallel(
+                array, workers, keep_raw=kwargs.get("keep_raw", True), lazy=kwargs.get("lazy", False),
+                interner=kwargs.get("interner"), intern=intern,
+            )
+            return
 
+        if intern and kwargs.get("interner") is None:
+            kwargs["interner"] = Interner()
         self.array = []
         for ele in array:
             if ele.get("object") and ele["object"] in self.class_map:
-                self.array.append(self.class_map[ele["object"]](**ele))
+                self.array.append(self.class_map[ele["object"]](**ele, **kwargs))
 
     def __getitem__(self, item):
         return self.array[item]
@@ -1035,12 +1437,90 @@ class BlockArray(ElementArray):
     def simple(self) -> str:
         return "\n".join(b._level * "\t" + b.simple for b in self)
 
+    def to_markdown(self, stream=None) -> Optional[str]:
+        """
+        Markdown of blocks (nested by levels). Written to the stream block by block if it is provided
+
+        :param stream:  object with `write(str)` method (file for ex.). Markdown string is returned if None
+        """
+        from pytion.markdown import write_markdown  # markdown depends on models
+
+        return write_markdown(self, stream)
+
 
 class PageArray(ElementArray):
+    def __init__(self, array, create: bool = False, workers: int = 0, intern: bool = False, **kwargs):
+        super().__init__(array, create=create, workers=workers, intern=intern, **kwargs)
+        # property name -> pytion.indexes.Index. kept up to date while the array is changed
+        self.indexes = {}
+
     def __repr__(self):
         r = str(self)[:30].replace("\n", " ")
         return f"PageArray({r})"
 
+    def __setitem__(self, key, value):
+        old = self.array[key] if isinstance(key, slice) else [self.array[key]]
+        super().__setitem__(key, value)
+        new = value if isinstance(key, slice) else [value]
+        for index in self.indexes.values():
+            for page in old:
+                index.remove(page)
+            for page in new:
+                index.add(page)
+
+    def __delitem__(self, key):
+        old = self.array[key] if isinstance(key, slice) else [self.array[key]]
+        super().__delitem__(key)
+        for index in self.indexes.values():
+            for page in old:
+                index.remove(page)
+
+    def insert(self, index: int, value) -> None:
+        super().insert(index, value)
+        for page_index in self.indexes.values():
+            page_index.add(value)
+
+    def create_index(self, property_name: str, kind: Optional[str] = None):
+        """
+        Builds (or returns existing) index of pages by the property. Lookups are O(1) (`hash`, `inverted`)
+        or O(log n) (`sorted`) instead of scanning the array
+
+        :param property_name:   property name or ID
+        :param kind:            `hash` (equality), `sorted` (ranges) or `inverted` (multi_select, relation, people)
+                                detected by the property type if not provided
+
+        `pages.create_index("Tags").get("urgent")`
+        `pages.create_index("Due").range("2022-05-01", "2022-06-01")`
+        """
+        from pytion.indexes import index_classes, index_kind  # indexes depend on models
+
+        index = self.indexes.get(property_name)
+        kind = kind if kind else (index.kind if index else index_kind(self, property_name))
+        if index is None or index.kind != kind:
+            index = self.indexes[property_name] = index_classes[kind](property_name, self)
+        return index
+
+    def update_page(self, page: Page) -> None:
+        """
+        Replaces the page with the same ID (or appends the new one) and updates indexes.
+        Use it after the page is changed (`.page_update()`) or re-fetched
+        """
+        for i, current in enumerate(self.array):
+            if current.id == page.id:
+                self[i] = page
+                return
+        self.append(page)
+
+    def to_columns(self, names: Optional[List[str]] = None):
+        """
+        Columnar view of pages properties: `pytion.columnar.Columns`
+
+        :param names:   property names to be decoded (all if None)
+        """
+        from pytion.columnar import Columns  # columnar depends on models
+
+        return Columns(self, names=names)
+
 
 class LinkTo(object):
     """
@@ -1111,6 +1591,20 @@ class LinkTo(object):
     def __repr__(self):
         return f"LinkTo({self})"
 
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, LinkTo):
+            return self._key == other._key
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._key)
+
+    @property
+    def _key(self):
+        return self.uri, self.id, getattr(self, "after_path", "")
+
     @property
     def link(self) -> str:
         return NOTION_URL + str(self)
@@ -1131,3 +1625,45 @@ class LinkTo(object):
         """
         for key, value in kwargs.items():
             return cls(type=key, id=value)
+
+
+class Interner(object):
+    """
+    Storage of shared User and LinkTo objects.
+    Models created with the same `interner` use the same object for equal users and links (parents, relations).
+    So thousands of database rows keep a few User objects and a single parent LinkTo.
+
+    Shared objects must be treated as immutable.
+    """
+
+    def __init__(self):
+        self.users: Dict[tuple, User] = {}
+        self.links: Dict[tuple, LinkTo] = {}
+
+    def user(self, data: Dict[str, Any], keep_raw: bool = True) -> User:
+        key = (data.get("id"), data.get("type"), data.get("name"))
+        user = self.users.get(key)
+        if user is None:
+            user = self.users[key] = User(**data, keep_raw=keep_raw)
+        return user
+
+    def link(self, data: Dict[str, Any]) -> LinkTo:
+        type_ = data.get("type")
+        key = (type_, data.get(type_), data.get("id"))
+        try:
+            link = self.links.get(key)
+        except TypeError:  # unhashable value of type
+            return LinkTo(**data)
+        if link is None:
+            link = self.links[key] = LinkTo(**data)
+        return link
+
+    def clear(self) -> None:
+        self.users.clear()
+        self.links.clear()
+
+    def __len__(self):
+        return len(self.users) + len(self.links)
+
+    def __repr__(self):
+        return f"Interner({len(self.users)} users, {len(self.links)} links)"
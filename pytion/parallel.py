@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import gc
+import logging
+import math
+import pickle
+from concurrent.futures import ProcessPoolExecutor, Executor
+from contextlib import contextmanager
+from threading import Lock
+from typing import Optional, Dict, List, Any, Iterator
+
+from pytion.models import ElementArray, Model, Interner
+
+
+logger = logging.getLogger(__name__)
+
+# smaller arrays are parsed in the current process: starting the work costs more than it saves
+MIN_PARALLEL_SIZE = 1000
+
+_executors: Dict[int, ProcessPoolExecutor] = {}
+_executors_lock = Lock()
+
+
+def get_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool shared by parsing calls with the same number of workers (processes are started once)
+    """
+    with _executors_lock:
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ProcessPoolExecutor(max_workers=workers)
+        return executor
+
+
+def shutdown_executors() -> None:
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    # thousands of new containers trigger garbage collection many times while nothing is garbage yet
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _parse_chunk(array: List[Dict[str, Any]], options: Dict[str, Any]) -> bytes:
+    # worker: models of the chunk share User and LinkTo objects if `intern` (one Interner per chunk)
+    with _gc_paused():
+        models = ElementArray(array, **options).array
+        return pickle.dumps(models, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def parse_parallel(
+        array: List[Dict[str, Any]], workers: int = 4, chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None, keep_raw: bool = False, lazy: bool = False,
+        interner: Optional[Interner] = None, intern: bool = False,
+) -> List[Model]:
+    """
+    Builds models (Page, Database, Block) from API dicts in a process pool: the list is split into chunks,
+    every worker returns pickled models of its chunk. Models are compact with `keep_raw=False` only: API dicts
+    are not kept then (`raw` is re-derived on demand). Lazy models decode nothing up front, so they are built
+    in the current process. Parsers registered by `register_parser()` must be registered at import of a module,
+    so workers have them too
+
+    :param array:       list of dicts from API (`results` of the response)
+    :param workers:     number of processes
+    :param chunk_size:  dicts per task (the list is split into `workers * 2` chunks by default)
+    :param executor:    executor to use instead of the shared process pool
+    :param keep_raw:    keep API dicts in models (it doubles the data sent between processes)
+    :param lazy:        decode attrs of models on first access
+    :param interner:    Interner of the client. Workers can not use it: objects are shared inside every chunk only
+    :param intern:      share equal User and LinkTo objects (inside every chunk)
+    :return:            models in the order of `array`
+
+    `pages = PageArray(no.session.method("post", "databases", id_, after_path="query")["results"], workers=8)`
+    """
+    options = {"keep_raw": keep_raw, "lazy": lazy, "intern": intern}
+    if workers < 2 or len(array) < MIN_PARALLEL_SIZE or lazy:
+        return ElementArray(array, interner=interner, **options).array
+    if interner is not None:
+        logger.warning("Interner is not shared with worker processes: equal objects are shared inside chunks only")
+        options["intern"] = True
+    if not chunk_size:
+        chunk_size = math.ceil(len(array) / (workers * 2))
+    chunks = [array[i:i + chunk_size] for i in range(0, len(array), chunk_size)]
+    logger.debug(f"Parsing {len(array)} objects by {workers} processes ({len(chunks)} chunks)")
+    executor = executor if executor is not None else get_executor(workers)
+    futures = [executor.submit(_parse_chunk, chunk, options) for chunk in chunks]
+    result = []
+    for future in futures:
+        data = future.result()
+        with _gc_paused():
+            result.extend(pickle.loads(data))
+    return result
@@ -1,15 +1,26 @@
 # -*- coding: utf-8 -*-
 
+import json
 import logging
-from urllib.parse import urlencode
-from typing import Dict, Optional, Any, Union
-from datetime import datetime
+from copy import deepcopy
+from urllib.parse import urlencode, unquote
+from typing import Dict, Optional, Any, Union, Callable, Iterable, List, Hashable, TYPE_CHECKING
+from datetime import datetime, date, timedelta, timezone
+from threading import Lock, Event
 
-import requests
+try:
+    import orjson
+except ImportError:  # optional dependency: pip install pytion[fast]
+    orjson = None
 
 import pytion.envs as envs
-from pytion.models import Property, PropertyValue, User
+from pytion.models import Property, PropertyValue, User, Model, Page, PageArray
 from pytion.exceptions import find_response_error
+from pytion.tokens import TokenPool
+
+if TYPE_CHECKING:
+    import requests
+    from pytion.replay import Recorder
 
 
 logger = logging.getLogger(__name__)
@@ -114,6 +125,12 @@ class Filter(object):
     def allowed_condition_types(self):
         return ", ".join(self._filter_condition_types)
 
+    def match(self, page: Page) -> bool:
+        """
+        Evaluates the filter locally against the page (see `match_filter()`)
+        """
+        return match_filter(self.filter, page)
+
     def __repr__(self):
         if not getattr(self, "property_type"):
             return f"Filter({str(self.filter)})"
@@ -144,11 +161,427 @@ class Sort(object):
         self.sort = {"property": property_name, "direction": direction}
         self.sorts.append(self.sort)
 
+    def apply(self, pages: Iterable[Page]) -> List[Page]:
+        """
+        Sorts pages locally (see `sort_pages()`)
+        """
+        return sort_pages(pages, self.sorts)
+
     def __repr__(self):
         r = [e.values() for e in self.sorts]
         return f"Sorts({r})"
 
 
+# Local evaluation of filters and sorts over fetched pages. Semantics follow the API:
+# text conditions are case-insensitive, empty values never match comparisons and are placed last by sorts
+
+_TEXT_TYPES = ("rich_text", "title", "url", "email", "phone_number", "string")
+_DATE_TYPES = ("date", "created_time", "last_edited_time")
+_RELATIVE_DATES = ("past_week", "past_month", "past_year", "next_week", "next_month", "next_year", "this_week")
+
+
+def _aware(value: datetime) -> datetime:
+    # dates without time zone (`2022-05-12`) are treated as UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _shift_months(value: datetime, months: int) -> datetime:
+    month = value.month - 1 + months
+    year, month = value.year + month // 12, month % 12 + 1
+    for day in (value.day, 30, 29, 28):
+        try:
+            return value.replace(year=year, month=month, day=day)
+        except ValueError:
+            continue
+
+
+def _normalize(value: Any, filter_type: str) -> Any:
+    """
+    Python value of the property (or rollup element) in the form comparable by `filter_type` conditions
+    """
+    if isinstance(value, PropertyValue):
+        return _cell(value, filter_type)
+    if filter_type in ("people", "relation"):
+        if value is None:
+            return []
+        if not isinstance(value, list):
+            value = [value]
+        return [str(getattr(item, "id", item)).replace("-", "") for item in value]
+    if filter_type in _DATE_TYPES:
+        return Model.format_iso_time(value) if isinstance(value, str) else value
+    if filter_type in _TEXT_TYPES:
+        return str(value) if value is not None else ""
+    return value
+
+
+def _cell(pv: Optional[PropertyValue], filter_type: str) -> Any:
+    if pv is None:
+        return None
+    if filter_type in _DATE_TYPES and hasattr(pv, "start"):
+        return pv.start
+    return _normalize(pv.value, filter_type)
+
+
+def _match_text(value: str, condition: str, expected: Any) -> bool:
+    value = (value or "").lower()
+    expected = str(expected).lower()
+    if condition == "equals":
+        return value == expected
+    if condition == "does_not_equal":
+        return value != expected
+    if condition == "contains":
+        return expected in value
+    if condition == "does_not_contain":
+        return expected not in value
+    if condition == "starts_with":
+        return value.startswith(expected)
+    if condition == "ends_with":
+        return value.endswith(expected)
+    if condition == "is_empty":
+        return not value
+    if condition == "is_not_empty":
+        return bool(value)
+    raise ValueError(f"Unsupported text condition `{condition}`")
+
+
+def _match_number(value: Optional[Union[int, float]], condition: str, expected: Any) -> bool:
+    if condition == "is_empty":
+        return value is None
+    if condition == "is_not_empty":
+        return value is not None
+    if value is None:
+        return condition == "does_not_equal"
+    expected = float(expected)
+    if condition == "equals":
+        return value == expected
+    if condition == "does_not_equal":
+        return value != expected
+    if condition == "greater_than":
+        return value > expected
+    if condition == "less_than":
+        return value < expected
+    if condition == "greater_than_or_equal_to":
+        return value >= expected
+    if condition == "less_than_or_equal_to":
+        return value <= expected
+    raise ValueError(f"Unsupported number condition `{condition}`")
+
+
+def _match_checkbox(value: Optional[bool], condition: str, expected: Any) -> bool:
+    if condition == "equals":
+        return bool(value) is bool(expected)
+    if condition == "does_not_equal":
+        return bool(value) is not bool(expected)
+    raise ValueError(f"Unsupported checkbox condition `{condition}`")
+
+
+def _match_select(value: Optional[str], condition: str, expected: Any) -> bool:
+    if condition == "equals":
+        return value == expected
+    if condition == "does_not_equal":
+        return value != expected
+    if condition == "is_empty":
+        return value is None
+    if condition == "is_not_empty":
+        return value is not None
+    raise ValueError(f"Unsupported select condition `{condition}`")
+
+
+def _match_contains(value: Optional[List[str]], condition: str, expected: Any) -> bool:
+    value = value or []
+    if condition == "contains":
+        return expected in value
+    if condition == "does_not_contain":
+        return expected not in value
+    if condition == "is_empty":
+        return not value
+    if condition == "is_not_empty":
+        return bool(value)
+    raise ValueError(f"Unsupported condition `{condition}`")
+
+
+def _match_date(value: Optional[datetime], condition: str, expected: Any) -> bool:
+    if condition == "is_empty":
+        return value is None
+    if condition == "is_not_empty":
+        return value is not None
+    if value is None:
+        return False
+    if condition in _RELATIVE_DATES:
+        now = datetime.now(timezone.utc)
+        value = _aware(value)
+        if condition == "this_week":
+            start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+            return start <= value < start + timedelta(days=7)
+        period, span = condition.split("_")
+        sign = -1 if period == "past" else 1
+        if span == "week":
+            bound = now + timedelta(days=7 * sign)
+        else:
+            bound = _shift_months(now, (1 if span == "month" else 12) * sign)
+        return min(now, bound) <= value <= max(now, bound)
+
+    if isinstance(expected, datetime):
+        expected = expected.isoformat()
+    expected = str(expected)
+    if len(expected) == 10:
+        # date only: compare calendar days
+        value, expected = value.date(), date.fromisoformat(expected)
+    else:
+        value, expected = _aware(value), _aware(Model.format_iso_time(expected))
+    if condition == "equals":
+        return value == expected
+    if condition == "before":
+        return value < expected
+    if condition == "after":
+        return value > expected
+    if condition == "on_or_before":
+        return value <= expected
+    if condition == "on_or_after":
+        return value >= expected
+    raise ValueError(f"Unsupported date condition `{condition}`")
+
+
+def _match_ids(value: Optional[List[str]], condition: str, expected: Any) -> bool:
+    # people and relation are compared by IDs without dashes
+    expected = str(getattr(expected, "id", expected)).replace("-", "")
+    return _match_contains(value, condition, expected)
+
+
+# filter type -> func(normalized value, condition, expected value) -> bool
+_matchers: Dict[str, Callable[[Any, str, Any], bool]] = {
+    **{type_: _match_text for type_ in _TEXT_TYPES},
+    **{type_: _match_date for type_ in _DATE_TYPES},
+    "number": _match_number,
+    "checkbox": _match_checkbox,
+    "select": _match_select,
+    "status": _match_select,
+    "multi_select": _match_contains,
+    "people": _match_ids,
+    "relation": _match_ids,
+}
+
+
+def _match_value(value: Any, filter_type: str, condition_dict: Dict[str, Any]) -> bool:
+    if filter_type not in _matchers:
+        raise ValueError(f"Unsupported filter type `{filter_type}`")
+    condition, expected = next(iter(condition_dict.items()))
+    return _matchers[filter_type](_normalize(value, filter_type), condition, expected)
+
+
+def _find_property(page: Page, name: str) -> Optional[PropertyValue]:
+    properties = page.properties
+    if name in properties:
+        return properties[name]
+    # filters by Property objects use IDs
+    for pv in properties.values():
+        if pv.id and (pv.id == name or unquote(pv.id) == unquote(name)):
+            return pv
+    return None
+
+
+def match_filter(filter_: Dict[str, Any], page: Page) -> bool:
+    """
+    Evaluates the API filter dict against the page without requests
+
+    :param filter_:  `Filter.filter` or dict in API format (`and`/`or` compound filters are supported)
+    :param page:     Page object (from `db_query()` or cache)
+
+    `[p for p in no.databases.get("1234").db_query().obj if match_filter({"or": [f1.filter, f2.filter]}, p)]`
+    """
+    if "and" in filter_:
+        return all(match_filter(f, page) for f in filter_["and"])
+    if "or" in filter_:
+        return any(match_filter(f, page) for f in filter_["or"])
+    if "timestamp" in filter_:
+        type_ = filter_["timestamp"]
+        return _match_value(getattr(page, type_, None), "date", filter_[type_])
+    if filter_.get("property") == "object" and "value" in filter_:
+        # search filter
+        return page.object == filter_["value"]
+
+    pv = _find_property(page, filter_.get("property"))
+    filter_type = next(key for key in filter_ if key != "property")
+    condition_dict = filter_[filter_type]
+    if filter_type == "formula":
+        filter_type, condition_dict = next(iter(condition_dict.items()))
+        return _match_value(_cell(pv, filter_type), filter_type, condition_dict)
+    if filter_type == "rollup":
+        aggregation, condition_dict = next(iter(condition_dict.items()))
+        if aggregation not in ("any", "every", "none"):
+            return _match_value(_cell(pv, aggregation), aggregation, condition_dict)
+        filter_type, condition_dict = next(iter(condition_dict.items()))
+        elements = pv.value if pv is not None else None
+        elements = elements if isinstance(elements, list) else ([] if elements is None else [elements])
+        matches = (_match_value(element, filter_type, condition_dict) for element in elements)
+        if aggregation == "any":
+            return any(matches)
+        if aggregation == "every":
+            return all(matches)
+        return not any(matches)
+    return _match_value(_cell(pv, filter_type), filter_type, condition_dict)
+
+
+def _sort_key(page: Page, sort: Dict[str, Any]) -> Any:
+    if "timestamp" in sort:
+        value = getattr(page, sort["timestamp"], None)
+        return _aware(value) if value is not None else None
+    pv = _find_property(page, sort.get("property"))
+    if pv is None:
+        return None
+    if hasattr(pv, "start"):
+        return _aware(pv.start) if pv.start is not None else None
+    value = pv.value
+    if pv.type in ("title", "rich_text") or isinstance(value, str):
+        return str(value).lower() if value else None
+    if isinstance(value, datetime):
+        return _aware(value)
+    if isinstance(value, list):
+        return tuple(str(item).lower() for item in value) if value else None
+    if isinstance(value, User):
+        return str(value).lower()
+    return value
+
+
+def sort_pages(pages: Iterable[Page], sorts: Union[Sort, List[Dict[str, Any]]]) -> List[Page]:
+    """
+    Sorts pages locally like database query does. Empty values are placed last in both directions
+
+    :param pages:   Page objects
+    :param sorts:   Sort object or list of sort dicts in API format (first criterion has the highest priority)
+    """
+    result = list(pages)
+    sorts = sorts.sorts if isinstance(sorts, Sort) else sorts
+    # stable sort by every criterion starting from the lowest priority
+    for sort in reversed(sorts):
+        keys = {id(page): _sort_key(page, sort) for page in result}
+        filled = [page for page in result if keys[id(page)] is not None]
+        empty = [page for page in result if keys[id(page)] is None]
+        filled.sort(key=lambda page: keys[id(page)], reverse=sort.get("direction") == "descending")
+        result = filled + empty
+    return result
+
+
+def query_pages(
+        pages: Iterable[Page], filter_: Union[Filter, Dict[str, Any], None] = None,
+        sorts: Union[Sort, List[Dict[str, Any]], None] = None, limit: int = 0,
+) -> PageArray:
+    """
+    Database query over already fetched pages: one full `db_query()` can serve many filtered views
+
+    :param pages:    PageArray or other iterable of Pages
+    :param filter_:  Filter object or filter dict in API format
+    :param sorts:    Sort object or list of sort dicts
+    :param limit:    max number of pages to be returned (0 = return all)
+
+    `all_pages = no.databases.get("1234").db_query().obj`
+    `done = query_pages(all_pages, Filter(property_name="Done", property_type="checkbox"), Sort("Name"))`
+    """
+    if isinstance(filter_, Filter):
+        filter_ = filter_.filter
+    result = [page for page in pages if match_filter(filter_, page)] if filter_ else list(pages)
+    if sorts:
+        result = sort_pages(result, sorts)
+    if limit:
+        result = result[:limit]
+    return PageArray(result, create=True)
+
+
+class JSONCodec(object):
+    def __init__(
+            self, dumps: Optional[Callable[[Any], Union[bytes, str]]] = None,
+            loads: Optional[Callable[[bytes], Any]] = None,
+    ):
+        """
+        Encoder of request bodies and decoder of response bodies.
+        `orjson` is used by default if it is installed, else `json` from stdlib
+
+        :param dumps:   func to encode the object to bytes or str
+        :param loads:   func to decode the object from response bytes
+        """
+        if dumps:
+            self._dumps = dumps
+        elif orjson:
+            self._dumps = orjson.dumps
+        else:
+            self._dumps = self._json_dumps
+        if loads:
+            self.loads = loads
+        elif orjson:
+            self.loads = orjson.loads
+        else:
+            self.loads = json.loads
+
+    @staticmethod
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(self, obj: Any) -> bytes:
+        data = self._dumps(obj)
+        return data.encode("utf-8") if isinstance(data, str) else data
+
+    def __repr__(self):
+        return f"JSONCodec({getattr(self.loads, '__module__', None)})"
+
+
+class _Flight(object):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(object):
+    def __init__(self):
+        """
+        De-duplication of concurrent identical calls: the first caller of the key runs the function,
+        callers of the same key arriving before it is finished wait and get its result (or its exception).
+        Results are not cached: the next call after the finish runs the function again.
+        Mutable results should be copied for every waiter (`clone`): callers parse and modify them
+        """
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = Lock()
+        # number of calls served by the result of another one
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any], clone: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        :param key:    calls with equal keys are identical
+        :param func:   the call
+        :param clone:  func(result) -> copy of the result for every waiter (the first caller gets the result itself)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return clone(flight.result) if clone is not None else flight.result
+        try:
+            flight.result = func()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def __len__(self):
+        return len(self._flights)
+
+    def __repr__(self):
+        return f"SingleFlight({len(self)} in flight, {self.coalesced} coalesced)"
+
+
 class Request(object):
     def __init__(
             self,
@@ -163,25 +596,86 @@ class Request(object):
             limit: int = 0,
             filter_: Optional[Filter] = None,
             sorts: Optional[Sort] = None,
+            codec: Optional[JSONCodec] = None,
+            tokens: Optional[List[str]] = None,
+            rate_limit: float = 3.0,
+            transport: Optional[object] = None,
+            single_flight: bool = True,
     ):
-        self.session = requests.Session()
-        self.session.headers["accept"] = "application/json"
+        self.codec = codec if codec else JSONCodec()
         self.base = base if base else envs.NOTION_URL
-        self._token = token if token else envs.NOTION_SECRET
+        self._token = token if token else (tokens[0] if tokens else envs.NOTION_SECRET)
         if not self._token:
             logger.error("Token is not provided or file `token` is not found!")
         self.version = getattr(api, "version")
         self.auth = {"Authorization": "Bearer " + self._token}
-        self.session.headers.update({"Notion-Version": self.version, **self.auth})
+        self._session = None
+        self._session_lock = Lock()
+        self.pool = None
+        if tokens:
+            headers = {"accept": "application/json", "Notion-Version": self.version}
+            self.pool = TokenPool(tokens, headers, rate=rate_limit)
+        # custom transport with `request(method, url, **kwargs)` (`replay.Replayer` for ex.)
+        self.transport = transport
+        # concurrent identical GET requests share one response
+        self.flights = SingleFlight() if single_flight else None
         self.result = None
 
         if method:
             self.result = self.method(method, path, id_, data, after_path, limit, filter_, sorts)
 
+    @property
+    def session(self) -> "requests.Session":
+        # transport is created on the first request (`requests` is the most of import time)
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+
+                    session = requests.Session()
+                    session.headers.update({"accept": "application/json", "Notion-Version": self.version, **self.auth})
+                    self._session = session
+        return self._session
+
+    def record(self, path: str) -> "Recorder":
+        """
+        Records every next request and its response to the file (until the recorder is closed)
+        for offline replay by `replay.Replayer`
+
+        `with no.session.record("workload.ndjson.gz"):`
+        `    no.pages.get(page_id)`
+        """
+        from pytion.replay import Recorder  # replay is used on demand only
+
+        if self.transport is not None:
+            transport = self.transport
+        else:
+            transport = self.session if self.pool is None else self.pool
+        self.transport = Recorder(path, transport)
+        return self.transport
+
     def method(
             self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
             after_path: Optional[str] = None, limit: int = 0, filter_: Optional[Filter] = None,
             sorts: Optional[Sort] = None, pagination_loop: bool = False, sort: Optional[Sort] = None,
+    ):
+        """
+        Sends the request (with pagination) and returns decoded response.
+        GET request which is sent by another thread at the moment is not repeated: callers share its result
+        (every one gets its own copy of the dict, so it can be parsed and modified)
+        """
+        if self.flights is not None and method == "get" and data is None and not (filter_ or sorts or sort):
+            key = (path, id_, after_path, limit, pagination_loop)
+            return self.flights.do(
+                key, lambda: self._method(method, path, id_, data, after_path, limit, pagination_loop=pagination_loop),
+                clone=deepcopy,
+            )
+        return self._method(method, path, id_, data, after_path, limit, filter_, sorts, pagination_loop, sort)
+
+    def _method(
+            self, method: str, path: str, id_: str = "", data: Optional[Dict] = None,
+            after_path: Optional[str] = None, limit: int = 0, filter_: Optional[Filter] = None,
+            sorts: Optional[Sort] = None, pagination_loop: bool = False, sort: Optional[Sort] = None,
     ):
         if filter_:
             if data:
@@ -211,15 +705,26 @@ class Request(object):
         if after_path:
             url += "/" + after_path
         logger.info(f"Request {method} {url}")
-        logger.debug(f"METHOD: {method.upper()}")
-        logger.debug(f"URL: {url}")
-        logger.debug(f"DATA: {data}")
-        result = self.session.request(method=method, url=url, json=data)
-        logger.debug(f"STATUS CODE: {result.status_code}")
-        logger.debug(f"CONTENT: {result.content}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"METHOD: {method.upper()}")
+            logger.debug(f"URL: {url}")
+            logger.debug(f"DATA: {data}")
+        kwargs = {}
+        if data is not None:
+            kwargs = {"data": self.codec.dumps(data), "headers": {"Content-Type": "application/json"}}
+        if self.transport is not None:
+            result = self.transport.request(method, url, **kwargs)
+        elif self.pool is None:
+            result = self.session.request(method=method, url=url, **kwargs)
+        else:
+            result = self.pool.request(method, url, **kwargs)
+        if debug:
+            logger.debug(f"STATUS CODE: {result.status_code}")
+            logger.debug(f"CONTENT: {result.content}")
         logger.info(f"{result.status_code} Received")
 
-        r = find_response_error(result)
+        r = find_response_error(result, loads=self.codec.loads)
 
         # pagination section
         if not limit and not pagination_loop:
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional, Dict, List, Iterable, Union
+
+from pytion.models import Page, PageArray, PropertyValue
+from pytion.exceptions import ObjectNotFound, RestrictedResource
+
+
+logger = logging.getLogger(__name__)
+
+
+class RelationResolver(object):
+    def __init__(self, api: object, workers: int = 8):
+        """
+        Fetches pages linked by `relation` properties: every page is requested once per client
+        (concurrently and de-duplicated), then it is taken from `.cache`
+
+        :param api:      Notion object
+        :param workers:  max number of concurrent requests
+
+        `no.relations.resolve(pages, "Tasks")`
+        `pages[0].properties["Tasks"].pages`
+        """
+        self.api = api
+        self.workers = workers
+        # page ID -> Page (None if it is not found or not shared with the integration)
+        self.cache: Dict[str, Optional[Page]] = {}
+        self._lock = Lock()
+
+    def _get(self, id_: str) -> Optional[Page]:
+        try:
+            return self.api.pages.get(id_).obj
+        except (ObjectNotFound, RestrictedResource) as e:
+            logger.warning(f"Related page {id_} can not be retrieved: {e}")
+            return None
+
+    def fetch(self, ids: Iterable[str], workers: Optional[int] = None) -> Dict[str, Optional[Page]]:
+        """
+        Retrieves pages by IDs which are not cached yet
+
+        :param ids:      page IDs (duplicates are requested once)
+        :param workers:  max number of concurrent requests (`self.workers` by default)
+        :return:    ID -> Page (None if not available)
+        """
+        ids = list(dict.fromkeys(id_.replace("-", "") for id_ in ids))
+        with self._lock:
+            missing = [id_ for id_ in ids if id_ not in self.cache]
+        if missing:
+            logger.info(f"Resolving {len(missing)} related pages")
+            with ThreadPoolExecutor(max_workers=min(workers or self.workers, len(missing))) as pool:
+                pages = list(pool.map(self._get, missing))
+            with self._lock:
+                self.cache.update(zip(missing, pages))
+        return {id_: self.cache.get(id_) for id_ in ids}
+
+    @staticmethod
+    def _relations(page: Page, property_name: Optional[str]) -> List[PropertyValue]:
+        properties = getattr(page, "properties", None) or {}
+        if property_name is not None:
+            pv = properties.get(property_name)
+            return [pv] if pv is not None and pv.type == "relation" else []
+        return [pv for pv in properties.values() if pv.type == "relation"]
+
+    def resolve(
+            self, pages: Union[Page, Iterable[Page]], property_name: Optional[str] = None, depth: int = 1,
+            workers: Optional[int] = None,
+    ) -> PageArray:
+        """
+        Resolves relations of pages: `.pages` attr (PageArray) is set for every relation PropertyValue
+
+        :param pages:           Page or PageArray
+        :param property_name:   relation property name (all relation properties if None)
+        :param depth:           number of hops. related pages of related pages are resolved if > 1
+        :param workers:         max number of concurrent requests (`self.workers` by default)
+        :return:                all newly reached pages (without the source pages)
+        """
+        frontier = [pages] if isinstance(pages, Page) else list(pages)
+        seen = {page.id for page in frontier}
+        reached: Dict[str, Page] = {}
+        for _ in range(depth):
+            truncated = [
+                page for page in frontier if any(pv.is_truncated for pv in self._relations(page, property_name))
+            ]
+            if truncated:
+                # relations of more than 25 pages
+                self.api.pages.get_truncated_properties(obj=PageArray(truncated, create=True), workers=self.workers)
+            relations = [pv for page in frontier for pv in self._relations(page, property_name)]
+            if not relations:
+                break
+            resolved = self.fetch((link.id for pv in relations for link in pv.value or []), workers)
+            for pv in relations:
+                pv.pages = PageArray(
+                    [resolved[link.id] for link in pv.value or [] if resolved.get(link.id) is not None], create=True
+                )
+            frontier = []
+            for id_, page in resolved.items():
+                if page is not None and id_ not in seen:
+                    seen.add(id_)
+                    reached[id_] = page
+                    frontier.append(page)
+        return PageArray(list(reached.values()), create=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.cache.clear()
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __repr__(self):
+        return f"RelationResolver({len(self)})"
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import time
+from threading import Lock
+from typing import Optional, Dict, List, Any, Tuple, Union, NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+
+def _body_key(body: Optional[Union[bytes, str]]) -> Optional[str]:
+    # JSON bodies are compared by content: encoders differ by spaces and key order
+    if not body:
+        return None
+    try:
+        return json.dumps(json.loads(body), ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    except ValueError:
+        return body.decode("utf-8", "replace") if isinstance(body, bytes) else body
+
+
+class ReplayedRequest(NamedTuple):
+    method: str
+    url: str
+    body: Optional[str]
+
+
+class ReplayResponse(object):
+    __slots__ = ("status_code", "content", "url", "reason", "headers", "request")
+
+    def __init__(self, status_code: int, content: bytes, request: ReplayedRequest):
+        """
+        Recorded response with the attrs of `requests.Response` used by pytion
+        """
+        self.status_code = status_code
+        self.content = content
+        self.url = request.url
+        self.reason = "OK" if status_code < 400 else "Replayed error"
+        self.headers: Dict[str, str] = {}
+        self.request = request
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return f"<ReplayResponse [{self.status_code}]>"
+
+
+class Recorder(object):
+    version = 1
+
+    def __init__(self, path: str, transport: object):
+        """
+        Transport which sends requests by `transport` and writes every request/response pair to gzipped NDJSON file.
+        Paginated requests are recorded one by one (with their `start_cursor`). Authorization headers are not stored
+
+        :param path:        output file (`.ndjson.gz`)
+        :param transport:   object with `request(method, url, **kwargs)` (requests.Session or TokenPool)
+
+        `with no.session.record("workload.ndjson.gz"):`
+        `    no.databases.db_query(db_id)`
+        """
+        self.path = path
+        self.transport = transport
+        self.count = 0
+        self._lock = Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"version": self.version})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def request(self, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = self.transport.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+        record = {
+            "method": method.upper(), "url": url, "body": _body_key(kwargs.get("data")),
+            "status": response.status_code, "elapsed": round(elapsed, 4),
+            "content": response.content.decode("utf-8", "replace"),
+        }
+        with self._lock:
+            # requests of the closed recorder are passed through
+            if self._file is not None:
+                self._write(record)
+                self.count += 1
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                logger.info(f"{self.count} requests are recorded to {self.path}")
+
+    def __enter__(self) -> Recorder:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"Recorder({self.path!r}, {self.count})"
+
+
+class Replayer(object):
+    def __init__(self, path: str, latency: Optional[Union[float, str]] = None):
+        """
+        Transport which answers by responses of `Recorder` file without network.
+        Requests are matched by method, URL and JSON body. Repeated identical requests get their recorded responses
+        in the recorded order, then the sequence starts again (the workload may be replayed many times)
+
+        :param path:     file written by `Recorder`
+        :param latency:  simulated latency of every request: seconds, `"recorded"` (as it was recorded) or None
+
+        `no = Notion(token="offline", transport=Replayer("workload.ndjson.gz"))`
+        """
+        if latency is not None and latency != "recorded" and not isinstance(latency, (int, float)):
+            raise ValueError(f"Allowed latency: seconds, `recorded` or None ({latency} is provided)")
+        self.path = path
+        self.latency = latency
+        # (method, URL, body) -> [(status, content, recorded latency)]
+        self.responses: Dict[Tuple[str, str, Optional[str]], List[Tuple[int, bytes, float]]] = {}
+        self._positions: Dict[Tuple[str, str, Optional[str]], int] = {}
+        self._lock = Lock()
+        self.load()
+
+    def load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != Recorder.version:
+                raise ValueError(f"Unsupported record file {self.path} (version {header.get('version')})")
+            for line in f:
+                record = json.loads(line)
+                key = (record["method"], record["url"], record["body"])
+                response = (record["status"], record["content"].encode("utf-8"), record["elapsed"])
+                self.responses.setdefault(key, []).append(response)
+        self.rewind()
+
+    def rewind(self) -> None:
+        """
+        Starts every sequence of repeated requests from the first response
+        """
+        with self._lock:
+            self._positions = dict.fromkeys(self.responses, 0)
+
+    def request(self, method: str, url: str, **kwargs) -> ReplayResponse:
+        body = _body_key(kwargs.get("data"))
+        key = (method.upper(), url, body)
+        with self._lock:
+            responses = self.responses.get(key)
+            if responses is None:
+                raise LookupError(f"Request is not recorded: {key[0]} {url} {body or ''}")
+            position = self._positions[key]
+            self._positions[key] = (position + 1) % len(responses)
+        status_code, content, elapsed = responses[position]
+        delay = elapsed if self.latency == "recorded" else self.latency
+        if delay:
+            time.sleep(delay)
+        return ReplayResponse(status_code, content, ReplayedRequest(key[0], url, body))
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.responses.values())
+
+    def __repr__(self):
+        return f"Replayer({self.path!r}, {len(self)})"
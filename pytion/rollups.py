@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from statistics import median
+from typing import Optional, Dict, List, Any, Iterable, Mapping, Union, Callable
+
+from pytion.models import Database, Page, Property, PropertyValue, RichTextArray
+from pytion.query import _find_property, _aware
+
+
+logger = logging.getLogger(__name__)
+
+
+def _value(pv: Optional[PropertyValue]) -> Any:
+    """
+    Python value of the related property to be aggregated
+    """
+    if pv is None:
+        return None
+    if hasattr(pv, "start"):
+        return pv.start
+    if isinstance(pv.value, RichTextArray):
+        return str(pv.value)
+    return pv.value
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value is False
+
+
+def _flatten(values: List[Any]) -> List[Any]:
+    items = []
+    for value in values:
+        if isinstance(value, list):
+            items.extend(str(getattr(item, "id", item)) for item in value)
+        elif not _is_empty(value):
+            items.append(value)
+    return items
+
+
+def _numbers(values: List[Any]) -> List[Union[int, float]]:
+    return [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+
+def _dates(values: List[Any]) -> List[datetime]:
+    return sorted((v for v in values if isinstance(v, datetime)), key=_aware)
+
+
+def _percent(count: int, total: int) -> float:
+    return count / total if total else 0
+
+
+# rollup function -> func(values of related pages) -> number
+_number_functions: Dict[str, Callable[[List[Any]], Optional[Union[int, float]]]] = {
+    "count": len,
+    "count_values": lambda values: len(_flatten(values)),
+    "unique": lambda values: len(set(_flatten(values))),
+    "empty": lambda values: sum(map(_is_empty, values)),
+    "not_empty": lambda values: len(values) - sum(map(_is_empty, values)),
+    "percent_empty": lambda values: _percent(sum(map(_is_empty, values)), len(values)),
+    "percent_not_empty": lambda values: _percent(len(values) - sum(map(_is_empty, values)), len(values)),
+    "checked": lambda values: sum(value is True for value in values),
+    "unchecked": lambda values: sum(value is not True for value in values),
+    "percent_checked": lambda values: _percent(sum(value is True for value in values), len(values)),
+    "percent_unchecked": lambda values: _percent(sum(value is not True for value in values), len(values)),
+    "sum": lambda values: sum(_numbers(values)),
+    "average": lambda values: sum(_numbers(values)) / len(_numbers(values)) if _numbers(values) else None,
+    "median": lambda values: median(_numbers(values)) if _numbers(values) else None,
+    "min": lambda values: min(_numbers(values), default=None),
+    "max": lambda values: max(_numbers(values), default=None),
+    "range": lambda values: max(_numbers(values)) - min(_numbers(values)) if _numbers(values) else None,
+}
+_date_functions = ("earliest_date", "latest_date", "date_range")
+_array_functions = ("show_original", "show_unique")
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None and not (value.hour or value.minute or value.second):
+        return value.date().isoformat()
+    return value.isoformat()
+
+
+def compute_rollup(
+        prop: Property, page: Page, related: Mapping[str, Optional[Page]], name: Optional[str] = None,
+        fetch: Optional[Callable[[List[str]], Mapping[str, Optional[Page]]]] = None,
+) -> PropertyValue:
+    """
+    Computes rollup property value of the page from related pages without requests.
+    Related pages which are not available are not included: the result is partial then (see `.missing`).
+    So are links of truncated relation (more than 25 links): use `Element.get_truncated_properties()` before
+
+    :param prop:     rollup Property from database schema (`.function`, `.relation_property_name` or `_id`,
+                     `.rollup_property_name` or `_id`)
+    :param page:     row of the database
+    :param related:  page ID -> Page of related database (`no.relations.cache` for ex.)
+    :param name:     name of result PropertyValue (`prop.name` by default)
+    :param fetch:    func(IDs) -> page ID -> Page to get related pages missing in `related`
+                     (`no.relations.fetch` for ex.)
+    :return:         PropertyValue of `rollup` type like API returns.
+                     `.missing` is the number of related pages which are not included
+                     (it is at least 1 if the relation is truncated, `.truncated` is True then)
+
+    `compute_rollup(db.obj.properties["Total"], row, no.relations.cache, fetch=no.relations.fetch).value`
+    """
+    function = getattr(prop, "function", None) or "show_original"
+    relation = _find_property(
+        page, getattr(prop, "relation_property_name", None) or getattr(prop, "relation_property_id", None)
+    )
+    links = relation.value if relation is not None and relation.value else []
+    ids = [link.id for link in links]
+    pages = [related.get(id_) for id_ in ids]
+    absent = [id_ for id_ in ids if id_ not in related]
+    if absent and fetch is not None:
+        fetched = fetch(absent)
+        pages = [p if p is not None else fetched.get(id_) for id_, p in zip(ids, pages)]
+    missing = sum(p is None for p in pages)
+    if missing:
+        logger.warning(
+            f"Rollup {name if name else prop.name} of page {page.id} is partial: "
+            f"{missing} of {len(ids)} related pages are not available"
+        )
+    # links after the first ones of API result are unknown (number of them too)
+    truncated = relation is not None and relation.is_truncated
+    if truncated:
+        logger.warning(
+            f"Rollup {name if name else prop.name} of page {page.id} is partial: relation {relation.name} is "
+            f"truncated to {len(ids)} links. Use `get_truncated_properties()` to retrieve the rest"
+        )
+    rollup_name = getattr(prop, "rollup_property_name", None) or getattr(prop, "rollup_property_id", None)
+    pvs = [_find_property(p, rollup_name) for p in pages if p is not None]
+
+    if function in _number_functions:
+        rollup = {"type": "number", "number": _number_functions[function]([_value(pv) for pv in pvs])}
+    elif function in _date_functions:
+        dates = _dates([_value(pv) for pv in pvs])
+        if not dates:
+            date = None
+        elif function == "earliest_date":
+            date = {"start": _iso(dates[0]), "end": None}
+        elif function == "latest_date":
+            date = {"start": _iso(dates[-1]), "end": None}
+        else:
+            date = {"start": _iso(dates[0]), "end": _iso(dates[-1])}
+        rollup = {"type": "date", "date": date}
+    elif function in _array_functions:
+        array, seen = [], set()
+        for pv in pvs:
+            if pv is None:
+                continue
+            key = repr(_value(pv))
+            if function == "show_unique" and key in seen:
+                continue
+            seen.add(key)
+            array.append(pv.raw)
+        rollup = {"type": "array", "array": array}
+    else:
+        raise ValueError(f"Unsupported rollup function `{function}`")
+    rollup["function"] = function
+    pv = PropertyValue({"id": prop.id, "type": "rollup", "rollup": rollup}, name if name else prop.name)
+    pv.missing = missing + 1 if truncated else missing
+    pv.truncated = truncated
+    return pv
+
+
+class RollupEngine(object):
+    def __init__(
+            self, database: Database, related: Union[Mapping[str, Optional[Page]], Iterable[Page], None] = None,
+            fetch: Optional[Callable[[List[str]], Mapping[str, Optional[Page]]]] = None,
+    ):
+        """
+        Recomputes rollup properties of rows of the database from locally cached related pages
+
+        :param database:  Database object with rollup properties in schema
+        :param related:   related pages: ID -> Page mapping (`no.relations.cache`) or Pages (PageArray)
+        :param fetch:     func(IDs) -> page ID -> Page to get missing related pages (`no.relations.fetch`).
+                          fetched pages are added to `related`
+
+        `engine = RollupEngine(no.databases.get("1234").obj, no.relations.cache, fetch=no.relations.fetch)`
+        `engine.compute_all(rows)`
+        """
+        self.rollups: Dict[str, Property] = {
+            name: prop for name, prop in database.properties.items() if prop.type == "rollup"
+        }
+        self.fetch = fetch
+        self.related: Dict[str, Optional[Page]] = {}
+        if related is not None:
+            self.add_related(related)
+
+    def add_related(self, related: Union[Mapping[str, Optional[Page]], Iterable[Page]]) -> None:
+        """
+        Adds (or replaces changed) related pages
+        """
+        if isinstance(related, Mapping):
+            self.related.update(related)
+        else:
+            self.related.update((page.id, page) for page in related)
+
+    def compute(self, page: Page) -> Dict[str, PropertyValue]:
+        """
+        Computes every rollup of the page and puts PropertyValues into `page.properties`
+        """
+        values = {
+            name: compute_rollup(prop, page, self.related, name, fetch=self._fetch if self.fetch else None)
+            for name, prop in self.rollups.items()
+        }
+        page.properties.update(values)
+        return values
+
+    def _fetch(self, ids: List[str]) -> Mapping[str, Optional[Page]]:
+        pages = self.fetch(ids)
+        self.add_related(pages)
+        return pages
+
+    def compute_all(self, pages: Iterable[Page]) -> None:
+        for page in pages:
+            self.compute(page)
+
+    def __repr__(self):
+        return f"RollupEngine({', '.join(self.rollups)})"
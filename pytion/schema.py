@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+from datetime import datetime, date
+from threading import Lock
+from typing import Optional, Dict, List, Any, Iterable
+from urllib.parse import unquote
+
+from pytion.models import Database, Property, PropertyValue, RichTextArray, User, LinkTo
+from pytion.exceptions import ValidationError, ClientError, ServerError
+from pytion.query import Filter
+
+
+logger = logging.getLogger(__name__)
+
+# types of values computed by Notion (can not be written)
+READ_ONLY_TYPES = (
+    "formula", "rollup", "created_time", "created_by", "last_edited_time", "last_edited_by", "unique_id",
+    "verification",
+)
+
+
+def _is_text(value: Any) -> bool:
+    return isinstance(value, (str, RichTextArray)) or isinstance(value, list) and all(
+        isinstance(item, dict) for item in value
+    )
+
+
+def _is_name(value: Any) -> bool:
+    return isinstance(value, str) or isinstance(value, dict) and "name" in value
+
+
+# property type -> check of the value provided to `PropertyValue.create()` (None clears the value)
+VALUE_CHECKS = {
+    "title": _is_text,
+    "rich_text": _is_text,
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "checkbox": lambda v: isinstance(v, bool),
+    "select": _is_name,
+    "status": _is_name,
+    "multi_select": lambda v: isinstance(v, list) and all(_is_name(item) for item in v),
+    "date": lambda v: isinstance(v, (datetime, date, str)) or isinstance(v, dict) and "start" in v,
+    "people": lambda v: isinstance(v, list) and all(isinstance(item, (User, dict)) for item in v),
+    "relation": lambda v: isinstance(v, list) and all(isinstance(item, (LinkTo, dict)) for item in v),
+    "files": lambda v: isinstance(v, (list, str)),
+    "url": lambda v: isinstance(v, str),
+    "email": lambda v: isinstance(v, str),
+    "phone_number": lambda v: isinstance(v, str),
+}
+
+
+def _source(pv: PropertyValue) -> Any:
+    # value as it was provided: parsers drop values of wrong types (select list becomes None)
+    # `raw` keeps API value of not derived types (select, date...) if the dict itself is not kept
+    raw = pv.raw
+    if pv.type in raw:
+        return raw[pv.type]
+    return pv.value
+
+
+class Schema(object):
+    def __init__(self, database: Database):
+        """
+        Properties of the database by name and by ID for local validation of page payloads and filters
+
+        `schema = no.schemas.get("Database ID")`
+        `schema.validate({"Status": PropertyValue.create("select", "Done")}, create=True)`
+        `no.databases.db_query("Database ID", filter_=schema.filter("Status", "Done"))`
+        """
+        self.database_id = database.id
+        self.properties: Dict[str, Property] = dict(database.properties)
+        self._ids: Dict[str, str] = {}
+        for name, prop in self.properties.items():
+            if prop.id:
+                self._ids[prop.id] = name
+                self._ids[unquote(prop.id)] = name
+        self.title_name = next((name for name, prop in self.properties.items() if prop.type == "title"), None)
+
+    def name(self, key: str) -> Optional[str]:
+        """
+        Property name by name or ID (IDs are accepted URL-encoded and decoded)
+        """
+        if key in self.properties:
+            return key
+        return self._ids.get(key)
+
+    def __getitem__(self, key: str) -> Property:
+        name = self.name(key)
+        if name is None:
+            raise KeyError(key)
+        return self.properties[name]
+
+    def __contains__(self, key: str) -> bool:
+        return self.name(key) is not None
+
+    def errors(self, properties: Dict[str, PropertyValue], create: bool = False) -> List[str]:
+        """
+        Problems of the payload (empty if it is valid)
+
+        :param properties:  name or ID -> PropertyValue (as for `page_create()` and `page_update()`)
+        :param create:      the title property is required
+        """
+        errors = []
+        seen = set()
+        for key, pv in properties.items():
+            name = self.name(key)
+            if name is None:
+                errors.append(f"{key} is not a property of the database. Allowed: {', '.join(self.properties)}")
+                continue
+            if name in seen:
+                errors.append(f"{name} is provided twice")
+            seen.add(name)
+            prop = self.properties[name]
+            if pv.type != prop.type:
+                errors.append(f"{name} is expected to be {prop.type}, not {pv.type}")
+                continue
+            if prop.type in READ_ONLY_TYPES:
+                errors.append(f"{name} is {prop.type} property and can not be written")
+                continue
+            value = _source(pv)
+            check = VALUE_CHECKS.get(prop.type)
+            if value is not None and check is not None and not check(value):
+                errors.append(f"{name} ({prop.type}) value {value!r} has wrong type {type(value).__name__}")
+            elif prop.type == "status" and pv.value is not None and getattr(prop, "options", None):
+                options = [option.get("name") for option in prop.options]
+                if pv.value not in options:
+                    errors.append(f"{name} status {pv.value!r} is not an option. Allowed: {', '.join(options)}")
+        if create and self.title_name and self.title_name not in seen:
+            errors.append(f"title property {self.title_name} is not provided")
+        return errors
+
+    def validate(self, properties: Dict[str, PropertyValue], create: bool = False) -> None:
+        """
+        Raises ValidationError (as the API does) if the payload does not match the schema
+        """
+        errors = self.errors(properties, create=create)
+        if errors:
+            raise ValidationError({"message": f"database {self.database_id}: " + "; ".join(errors)})
+
+    def filter(self, key: str, value: Any = None, condition: Optional[str] = None) -> Filter:
+        """
+        Filter by property name or ID: type and ID are taken from the schema
+        """
+        return Filter(property_obj=self[key], value=value, condition=condition)
+
+    def __len__(self):
+        return len(self.properties)
+
+    def __repr__(self):
+        return f"Schema({self.database_id}, {len(self)} properties)"
+
+
+class SchemaCache(object):
+    def __init__(self, api: object):
+        """
+        Schemas of databases per client: every database is retrieved once, then the schema is refreshed
+        by results of `databases.get()`, `db_create()` and `db_update()`
+
+        :param api:  Notion object
+
+        `no.schemas.get("Database ID")["Status"].type`
+        """
+        self.api = api
+        # database ID -> Schema
+        self.cache: Dict[str, Schema] = {}
+        self._lock = Lock()
+
+    def get(self, database_id: str) -> Schema:
+        database_id = database_id.replace("-", "")
+        schema = self.cache.get(database_id)
+        if schema is None:
+            logger.info(f"Retrieving schema of database {database_id}")
+            # `databases.get()` stores the schema by `update()`
+            database = self.api.databases.get(database_id).obj
+            schema = self.cache.get(database_id) or self.update(database)
+        return schema
+
+    def validate(self, database_id: str, properties: Dict[str, PropertyValue], create: bool = False) -> None:
+        """
+        Raises ValidationError if the payload does not match the schema of the database.
+        Cached schema may be stale (changed in Notion UI): it is retrieved again once before raising.
+        Validation is skipped if the schema can not be retrieved (integration has no read access, etc.)
+        """
+        database_id = database_id.replace("-", "")
+        cached = database_id in self.cache
+        try:
+            schema = self.get(database_id)
+            if cached and schema.errors(properties, create=create):
+                logger.info(f"Payload does not match cached schema of database {database_id}. Refreshing")
+                self.invalidate([database_id])
+                schema = self.get(database_id)
+        except (ClientError, ServerError) as e:
+            logger.warning(f"Properties are not validated: schema of database {database_id} is not retrieved ({e})")
+            return
+        schema.validate(properties, create=create)
+
+    def update(self, database: Database) -> Schema:
+        schema = Schema(database)
+        with self._lock:
+            self.cache[schema.database_id] = schema
+        return schema
+
+    def invalidate(self, database_ids: Optional[Iterable[str]] = None) -> None:
+        """
+        Drops cached schemas (all by default): they are retrieved again on the next use
+        """
+        with self._lock:
+            if database_ids is None:
+                self.cache.clear()
+            else:
+                for id_ in database_ids:
+                    self.cache.pop(id_.replace("-", ""), None)
+
+    def __len__(self):
+        return len(self.cache)
+
+    def __repr__(self):
+        return f"SchemaCache({len(self)})"
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import os
+import struct
+from threading import Lock
+from typing import Optional, Dict, List, Any, Iterable, Iterator, Tuple, Union
+
+from pytion.models import Model, Page, Database, Block, BlockArray
+from pytion.query import JSONCodec
+
+
+logger = logging.getLogger(__name__)
+
+# kinds of stored values
+OBJECT = 0  # API dict of Page, Database or Block
+BLOCKS = 1  # API dicts of all nested blocks of the page (flat list)
+
+# index entry: object ID (16 bytes), kind, offset and length of JSON in data file
+_ENTRY = struct.Struct("<16sBQI")
+
+
+def _key(id_: str) -> bytes:
+    try:
+        key = bytes.fromhex(id_.replace("-", ""))
+    except ValueError:
+        key = b""
+    if len(key) != 16:
+        raise ValueError(f"Allowed IDs are UUIDs ({id_} is provided)")
+    return key
+
+
+class SnapshotStore(object):
+    data_name = "snapshot.data"
+    index_name = "snapshot.idx"
+
+    def __init__(self, path: str, mode: str = "r", codec: Optional[JSONCodec] = None, **model_options):
+        """
+        Append-only storage of models with random access by ID: JSON values are appended to `snapshot.data`,
+        their offsets to `snapshot.idx`. The data file is read by `mmap`, so a single Page or BlockArray
+        of the page is decoded on demand without reading the rest. New versions of objects are appended
+        (the last one wins), the old ones stay in the data file
+
+        :param path:           directory of the store
+        :param mode:           `r` - read only, `a` - read and append
+        :param codec:          JSON encoder/decoder (orjson if installed)
+        :param model_options:  local attrs of returned models: `keep_raw`, `lazy`
+
+        `with SnapshotStore("snapshot", "a") as store:`
+        `    store.put(page, blocks)`
+        `page = SnapshotStore("snapshot").get(page_id)`
+        """
+        if mode not in ("r", "a"):
+            raise ValueError(f"Allowed modes r, a ({mode} is provided)")
+        self.path = path
+        self.mode = mode
+        self.codec = codec if codec else JSONCodec()
+        self.model_options = model_options
+        # (ID, kind) -> (offset, length)
+        self.index: Dict[Tuple[bytes, int], Tuple[int, int]] = {}
+        self._lock = Lock()
+        self._mmap: Optional[mmap.mmap] = None
+        self._data = None
+        self._index = None
+        if mode == "a":
+            os.makedirs(path, exist_ok=True)
+            self._data = open(self.data_path, "ab")
+            self._index = open(self.index_path, "ab")
+        self._reader = open(self.data_path, "rb") if os.path.isfile(self.data_path) else None
+        self.load_index()
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.path, self.data_name)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, self.index_name)
+
+    def load_index(self) -> None:
+        if not os.path.isfile(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        # the last entry may be cut by interruption
+        size = len(data) - len(data) % _ENTRY.size
+        data_size = os.path.getsize(self.data_path) if os.path.isfile(self.data_path) else 0
+        for key, kind, offset, length in _ENTRY.iter_unpack(memoryview(data)[:size]):
+            if offset + length <= data_size:
+                self.index[key, kind] = (offset, length)
+        if self._index is not None and size != len(data):
+            self._index.truncate(size)
+
+    def _append(self, id_: str, kind: int, value: Any) -> None:
+        data = self.codec.dumps(value)
+        with self._lock:
+            if self._data is None:
+                raise ValueError(f"Snapshot store {self.path} is opened for reading")
+            offset = self._data.seek(0, os.SEEK_END)
+            self._data.write(data)
+            # data is written before its index entry: an entry never refers to missing data
+            self._data.flush()
+            key = _key(id_)
+            self._index.write(_ENTRY.pack(key, kind, offset, len(data)))
+            self._index.flush()
+            self.index[key, kind] = (offset, len(data))
+
+    def put(self, obj: Model, blocks: Optional[Iterable[Union[Block, Dict[str, Any]]]] = None) -> None:
+        """
+        Appends the object (Page, Database or Block) and blocks of the page if they are provided
+        """
+        self._append(obj.id, OBJECT, obj.raw)
+        if blocks is not None:
+            self.put_blocks(obj.id, blocks)
+
+    def put_blocks(self, page_id: str, blocks: Iterable[Union[Block, Dict[str, Any]]]) -> None:
+        self._append(page_id, BLOCKS, [block.raw if isinstance(block, Block) else block for block in blocks])
+
+    def add_record(self, record: Dict[str, Any]) -> None:
+        """
+        Appends `Exporter` record (API dict of the object and its blocks)
+        """
+        self._append(record["id"], OBJECT, record["data"])
+        if record.get("object") == "page":
+            self._append(record["id"], BLOCKS, record.get("blocks") or [])
+
+    def sync(self) -> None:
+        """
+        Flushes appended values to disk
+        """
+        with self._lock:
+            for file in (self._data, self._index):
+                if file is not None:
+                    file.flush()
+                    os.fsync(file.fileno())
+
+    def _view(self, size: int) -> mmap.mmap:
+        # data file is mapped again when it is grown by appends
+        if self._mmap is None or len(self._mmap) < size:
+            if self._reader is None:
+                self._reader = open(self.data_path, "rb")
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def raw(self, id_: str, kind: int = OBJECT) -> Optional[Any]:
+        """
+        Stored JSON value (API dict or list of blocks) or None
+        """
+        location = self.index.get((_key(id_), kind))
+        if location is None:
+            return None
+        offset, length = location
+        with self._lock:
+            data = self._view(offset + length)[offset:offset + length]
+        return self.codec.loads(data)
+
+    def get(self, id_: str) -> Optional[Model]:
+        """
+        Page, Database or Block by ID (None if it is not stored)
+        """
+        data = self.raw(id_)
+        if data is None:
+            return None
+        classes = {"page": Page, "database": Database, "block": Block}
+        return classes[data["object"]](**data, **self.model_options)
+
+    def blocks(self, page_id: str) -> Optional[BlockArray]:
+        """
+        All nested blocks of the page (None if they are not stored)
+        """
+        data = self.raw(page_id, BLOCKS)
+        return BlockArray(data, **self.model_options) if data is not None else None
+
+    def ids(self, kind: int = OBJECT) -> List[str]:
+        return [key.hex() for key, entry_kind in self.index if entry_kind == kind]
+
+    def __iter__(self) -> Iterator[Model]:
+        for id_ in self.ids():
+            yield self.get(id_)
+
+    def __contains__(self, id_: str) -> bool:
+        return (_key(id_), OBJECT) in self.index
+
+    def __len__(self):
+        return sum(1 for _, kind in self.index if kind == OBJECT)
+
+    def close(self) -> None:
+        with self._lock:
+            for name in ("_mmap", "_reader", "_data", "_index"):
+                resource = getattr(self, name)
+                if resource is not None:
+                    resource.close()
+                    setattr(self, name, None)
+
+    def __enter__(self) -> SnapshotStore:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f"SnapshotStore({self.path!r}, {len(self)})"
+
+
+def convert_export(ndjson_path: str, path: str) -> int:
+    """
+    Converts NDJSON file of `Exporter` (`export.ndjson`) to the snapshot store line by line
+
+    :param ndjson_path:  NDJSON file
+    :param path:         directory of the store (new values are appended if it exists)
+    :return:             number of converted records
+    """
+    count = 0
+    with SnapshotStore(path, "a") as store, open(ndjson_path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # empty or partially written line of interrupted run
+                continue
+            store.add_record(record)
+            count += 1
+    return count
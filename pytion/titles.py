@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import Optional, Dict, List, Any, Iterable, Tuple, Union
+
+from pytion.models import Model, Page, Database
+from pytion.export import _write_atomic
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_title(title: str) -> str:
+    return " ".join(title.casefold().split())
+
+
+def trigrams(title: str) -> List[str]:
+    """
+    Trigrams of normalized title (padded, so short titles have them too)
+    """
+    text = f"  {normalize_title(title)} "
+    return list(dict.fromkeys(text[i:i + 3] for i in range(len(text) - 2)))
+
+
+class TitleIndex(object):
+    version = 1
+
+    def __init__(self):
+        """
+        Local title -> ID map of pages and databases with trigram index for fuzzy lookups.
+        It is filled by search results, export records or `refresh()` (recently edited objects only)
+
+        `no.titles.refresh(no)`
+        `no.pages.by_title("Q3 Roadmap")`
+        """
+        # ID -> [title, object, last_edited_time]
+        self.entries: Dict[str, List[str]] = {}
+        # normalized title -> IDs
+        self.names: Dict[str, Dict[str, None]] = {}
+        # trigram -> IDs
+        self.grams: Dict[str, Dict[str, None]] = {}
+        # ID -> number of trigrams of the title
+        self._sizes: Dict[str, int] = {}
+        # last_edited_time of the most recently edited object
+        self.refreshed = ""
+
+    def _insert(self, id_: str, title: str, object_: str, version: str) -> None:
+        if id_ in self.entries:
+            self.remove(id_)
+        self.entries[id_] = [title, object_, version]
+        self.names.setdefault(normalize_title(title), {})[id_] = None
+        grams = trigrams(title)
+        for gram in grams:
+            self.grams.setdefault(gram, {})[id_] = None
+        self._sizes[id_] = len(grams)
+        self.refreshed = max(self.refreshed, version)
+
+    def add(self, obj: Union[Page, Database]) -> None:
+        title = str(obj.title) if obj.title else ""
+        version = obj.last_edited_time.isoformat() if obj.last_edited_time else ""
+        self._insert(obj.id, title, obj.object, version)
+
+    def remove(self, obj: Union[Model, str]) -> None:
+        id_ = obj.id if isinstance(obj, Model) else obj.replace("-", "")
+        entry = self.entries.pop(id_, None)
+        if entry is None:
+            return
+        del self._sizes[id_]
+        for mapping, keys in ((self.names, [normalize_title(entry[0])]), (self.grams, trigrams(entry[0]))):
+            for key in keys:
+                ids = mapping.get(key)
+                if ids is None:
+                    continue
+                ids.pop(id_, None)
+                if not ids:
+                    del mapping[key]
+
+    def update(self, objects: Iterable[Model]) -> int:
+        """
+        Adds pages and databases (search result for ex.), archived ones are removed
+
+        :return:    number of added objects
+        """
+        count = 0
+        for obj in objects:
+            if not isinstance(obj, (Page, Database)):
+                continue
+            if getattr(obj, "archived", False):
+                self.remove(obj)
+                continue
+            self.add(obj)
+            count += 1
+        return count
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Adds objects of `Exporter` snapshot (`export.read_export().values()`)
+        """
+        classes = {"page": Page, "database": Database}
+        return self.update(
+            classes[record["object"]](**record["data"]) for record in records if record.get("object") in classes
+        )
+
+    def refresh(self, api: object, batch: int = 100) -> int:
+        """
+        Adds objects edited since the last refresh: only the first page of search sorted by `last_edited_time`
+        is requested if nothing else is changed (full search otherwise)
+
+        :param api:     Notion object
+        :param batch:   number of recently edited objects requested first
+        :return:        number of added objects
+        """
+        since = self.refreshed
+        result = api.search(limit=batch if since else 0, sort_last_edited_time="descending")
+        if not result:
+            return 0
+        objects = list(result.obj)
+        if since and len(objects) >= batch and all(self._version(obj) > since for obj in objects):
+            # more objects are changed than the batch contains
+            result = api.search(sort_last_edited_time="descending")
+            objects = list(result.obj) if result else objects
+        return self.update(obj for obj in objects if not since or self._version(obj) >= since)
+
+    @staticmethod
+    def _version(obj: Model) -> str:
+        return obj.last_edited_time.isoformat() if obj.last_edited_time else ""
+
+    def find(
+            self, title: str, object_type: Optional[str] = None, limit: int = 5, threshold: float = 0.3,
+    ) -> List[Tuple[float, str]]:
+        """
+        Candidates for the title: exact (normalized) matches have score 1, then fuzzy ones by trigram similarity
+
+        :param title:        title to be found
+        :param object_type:  `page` or `database` (any by default)
+        :param limit:        max number of candidates
+        :param threshold:    min similarity (0..1) of fuzzy candidates
+        :return:             [(score, ID)] best first. Equal scores: the most recently edited first
+        """
+        scores: Dict[str, float] = {id_: 1.0 for id_ in self.names.get(normalize_title(title), ())}
+        grams = trigrams(title)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for id_ in self.grams.get(gram, ()):
+                shared[id_] = shared.get(id_, 0) + 1
+        for id_, count in shared.items():
+            if id_ not in scores:
+                # Jaccard similarity of trigram sets
+                similarity = count / (len(grams) + self._sizes[id_] - count)
+                if similarity >= threshold:
+                    scores[id_] = similarity
+        candidates = [
+            (score, id_) for id_, score in scores.items()
+            if object_type is None or self.entries[id_][1] == object_type
+        ]
+        candidates.sort(key=lambda c: (c[0], self.entries[c[1]][2]), reverse=True)
+        return candidates[:limit] if limit else candidates
+
+    def resolve(
+            self, title: str, object_type: Optional[str] = None, fuzzy: bool = True, threshold: float = 0.3,
+    ) -> Optional[str]:
+        """
+        ID of the best candidate (exact match only if not `fuzzy`) or None
+        """
+        candidates = self.find(title, object_type, limit=0, threshold=threshold)
+        if not candidates or not fuzzy and candidates[0][0] < 1:
+            return None
+        best = [id_ for score, id_ in candidates if score == candidates[0][0]]
+        if len(best) > 1:
+            logger.warning(f"{len(best)} objects are titled like `{title}`. The most recently edited is used")
+        return best[0]
+
+    def title(self, id_: str) -> Optional[str]:
+        entry = self.entries.get(id_.replace("-", ""))
+        return entry[0] if entry else None
+
+    def save(self, path: str) -> None:
+        data = {"version": self.version, "entries": self.entries}
+        _write_atomic(path, json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path: str) -> TitleIndex:
+        """
+        Loads saved index (empty index if the file does not exist or it is saved by other version)
+        """
+        index = cls()
+        if not os.path.isfile(path):
+            return index
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != cls.version:
+            logger.warning(f"Title index {path} is saved by other version. It will be rebuilt")
+            return index
+        for id_, (title, object_, version) in data["entries"].items():
+            index._insert(id_, title, object_, version)
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"TitleIndex({len(self)})"
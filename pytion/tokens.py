@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Optional, Dict, List, Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_after(value: Optional[str], default: float) -> float:
+    """
+    Seconds of `Retry-After` header: delay in seconds or HTTP date. `default` if it is missing or malformed
+    """
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.warning(f"Malformed Retry-After header: {value!r}")
+        return default
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max((date - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimiter(object):
+    def __init__(self, rate: float = 3.0, burst: int = 3):
+        """
+        Token bucket (GCRA): `rate` requests per second on average, up to `burst` requests at once.
+        Not thread-safe: it is used under the lock of TokenPool
+
+        :param rate:    requests per second (Notion allows 3 per integration on average)
+        :param burst:   max number of requests without delay
+        """
+        self.interval = 1 / rate
+        self.tolerance = self.interval * (burst - 1)
+        # theoretical arrival time of the next request
+        self._tat = 0.0
+
+    def backlog(self, now: float) -> float:
+        """
+        Seconds until the bucket is full again (the load of recent requests)
+        """
+        return max(0.0, self._tat - now)
+
+    def delay(self, now: float) -> float:
+        """
+        Seconds to wait before the next request is allowed
+        """
+        return max(0.0, self.backlog(now) - self.tolerance)
+
+    def reserve(self, now: float) -> float:
+        """
+        Takes the slot of the next request
+        :return:    seconds to wait before the request
+        """
+        wait = self.delay(now)
+        self._tat = max(self._tat, now) + self.interval
+        return wait
+
+
+class TokenSlot(object):
+    def __init__(self, token: str, headers: Dict[str, str], rate: float, burst: int):
+        """
+        Integration token with its own session (connection pool) and rate limiter
+        """
+        self.token = token
+        self.headers = {**headers, "Authorization": "Bearer " + token}
+        self._session: Optional[requests.Session] = None
+        self._session_lock = Lock()
+        self.limiter = RateLimiter(rate, burst)
+        self.in_flight = 0
+        self.sent = 0
+        # monotonic time until the token is not used (after 401 or 429)
+        self.retired_until = 0.0
+
+    @property
+    def session(self) -> requests.Session:
+        # created on the first request of the token. threads which get the slot at once share one session
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
+
+    def __repr__(self):
+        return f"TokenSlot(...{self.token[-4:]} {self.in_flight}/{self.sent})"
+
+
+class TokenPool(object):
+    def __init__(
+            self, tokens: Iterable[str], headers: Optional[Dict[str, str]] = None, rate: float = 3.0, burst: int = 3,
+            retire_after: float = 30.0,
+    ):
+        """
+        Spreads requests between integration tokens: every request is sent by the least loaded token
+        (by requests in flight, then by recent requests). Token is retired for `Retry-After` seconds
+        after 429 response or for `retire_after` seconds after 401 one and the request is repeated by another token
+
+        :param tokens:        integration tokens (every integration must have access to requested objects)
+        :param headers:       common headers of requests (without Authorization)
+        :param rate:          requests per second of every token
+        :param burst:         max number of requests of every token without delay
+        :param retire_after:  seconds to retire token after 401 (or 429 without valid Retry-After header)
+
+        `no = Notion(tokens=["secret_1", "secret_2", "secret_3"])`
+        """
+        self.slots: List[TokenSlot] = [TokenSlot(token, headers or {}, rate, burst) for token in tokens]
+        if not self.slots:
+            raise ValueError("At least one token must be provided")
+        self.retire_after = retire_after
+        self._lock = Lock()
+
+    def _active(self, now: float) -> List[TokenSlot]:
+        return [slot for slot in self.slots if slot.retired_until <= now]
+
+    def acquire(self) -> TokenSlot:
+        """
+        Takes the least loaded token (waits for its rate limiter and for retired tokens if every one is retired)
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                active = self._active(now)
+                if active:
+                    slot = min(active, key=lambda s: (s.in_flight, s.limiter.backlog(now), s.sent))
+                    wait = slot.limiter.reserve(now)
+                    slot.in_flight += 1
+                    slot.sent += 1
+                    break
+                wait = min(slot.retired_until for slot in self.slots) - now
+            logger.warning(f"Every token is retired. Waiting {wait:.1f} sec")
+            time.sleep(wait)
+        if wait > 0:
+            time.sleep(wait)
+        return slot
+
+    def release(self, slot: TokenSlot, response: Optional[requests.Response] = None) -> None:
+        with self._lock:
+            slot.in_flight -= 1
+            if response is None or response.status_code not in (401, 429):
+                return
+            if response.status_code == 429:
+                seconds = _retry_after(response.headers.get("Retry-After"), self.retire_after)
+            else:
+                seconds = self.retire_after
+            slot.retired_until = max(slot.retired_until, time.monotonic() + seconds)
+        logger.warning(f"Token {slot} is retired for {seconds} sec after {response.status_code} response")
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends the request by the least loaded token. Retries it by another token after 401 or 429
+        """
+        attempts = len(self.slots) * 2
+        for attempt in range(attempts):
+            slot = self.acquire()
+            response = None
+            try:
+                response = slot.session.request(method=method, url=url, **kwargs)
+            finally:
+                self.release(slot, response)
+            if response.status_code not in (401, 429) or attempt + 1 == attempts:
+                break
+            # token is not valid: repeat only if another token is ready (429 waits for retired tokens)
+            if response.status_code == 401 and not self._active(time.monotonic()):
+                break
+        return response
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __repr__(self):
+        return f"TokenPool({len(self)})"
@@ -29,5 +29,8 @@ setuptools.setup(
     python_requires=">=3.7",
     install_requires=[
         "requests>=2.26.0"
-    ]
+    ],
+    extras_require={
+        "fast": ["orjson>=3.6"],
+    },
 )
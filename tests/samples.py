@@ -0,0 +1,143 @@
+"""
+API-like dicts and transport for offline tests
+"""
+import io
+import json
+
+from requests import Response
+from requests.adapters import BaseAdapter
+
+from pytion import Notion
+
+
+def user_dict(id_="01c67faf3aba45ffaa022407f87c86a5", **kwargs):
+    return {"object": "user", "id": id_, **kwargs}
+
+
+def rich_text_list(text):
+    return [{
+        "type": "text",
+        "text": {"content": text, "link": None},
+        "annotations": {
+            "bold": False, "italic": False, "strikethrough": False,
+            "underline": False, "code": False, "color": "default"
+        },
+        "plain_text": text,
+        "href": None,
+    }]
+
+
+def page_dict(
+        id_="878d6284-88d9-4894-ab14-f9b872cd6870", title="Pytion Tests",
+        database_id="0e953909-9cff-456d-89e4-4684d6b6c701", properties=None, **kwargs
+):
+    props = {"Name": {"id": "title", "type": "title", "title": rich_text_list(title)}}
+    if properties:
+        props.update(properties)
+    return {
+        "object": "page",
+        "id": id_,
+        "created_time": "2022-05-12T10:01:00.000Z",
+        "last_edited_time": "2022-05-13T11:02:00.000Z",
+        "created_by": user_dict(),
+        "last_edited_by": user_dict(),
+        "cover": None,
+        "icon": None,
+        "parent": {"type": "database_id", "database_id": database_id},
+        "archived": False,
+        "properties": props,
+        "url": "https://www.notion.so/" + id_.replace("-", ""),
+        **kwargs,
+    }
+
+
+def task_dict(id_, title, count=None, done=False, tags=(), due=None, status=None, people=(), links=()):
+    """
+    Database row with properties of every common type
+    """
+    return page_dict(id_=id_, title=title, properties={
+        "Count": {"id": "a%3Ab", "type": "number", "number": count},
+        "Done": {"id": "done", "type": "checkbox", "checkbox": done},
+        "Tags": {"id": "tags", "type": "multi_select", "multi_select": [{"name": t} for t in tags]},
+        "Due": {"id": "due", "type": "date", "date": {"start": due, "end": None} if due else None},
+        "Status": {"id": "st", "type": "select", "select": {"name": status} if status else None},
+        "Owner": {"id": "own", "type": "people", "people": [user_dict(u) for u in people]},
+        "Note": {"id": "note", "type": "rich_text", "rich_text": rich_text_list(title.upper())},
+        "Blocks": {"id": "bl", "type": "relation", "relation": [{"id": link} for link in links], "has_more": False},
+    })
+
+
+def block_dict(type_="paragraph", text="some text", id_="8a920ba7-dc1d-4961-811e-5c82b28028ed", content=None, **kwargs):
+    return {
+        "object": "block",
+        "id": id_,
+        "parent": {"type": "page_id", "page_id": "82ee5677-402f-4481-9a5d-a3302273400a"},
+        "created_time": "2022-05-12T10:01:00.000Z",
+        "last_edited_time": "2022-05-13T11:02:00.000Z",
+        "created_by": user_dict(),
+        "last_edited_by": user_dict(),
+        "has_children": False,
+        "archived": False,
+        "type": type_,
+        type_: content if content is not None else {"rich_text": rich_text_list(text), "color": "default"},
+        **kwargs,
+    }
+
+
+def database_dict(id_="0e953909-9cff-456d-89e4-4684d6b6c701", title="Little Database", properties=None):
+    props = {"Name": {"id": "title", "name": "Name", "type": "title", "title": {}}}
+    if properties:
+        props.update(properties)
+    return {
+        "object": "database",
+        "id": id_,
+        "created_time": "2022-05-12T10:01:00.000Z",
+        "last_edited_time": "2022-05-13T11:02:00.000Z",
+        "created_by": user_dict(),
+        "last_edited_by": user_dict(),
+        "title": rich_text_list(title),
+        "description": [],
+        "icon": None,
+        "cover": None,
+        "properties": props,
+        "parent": {"type": "page_id", "page_id": "878d6284-88d9-4894-ab14-f9b872cd6870"},
+        "url": "https://www.notion.so/" + id_.replace("-", ""),
+        "archived": False,
+        "is_inline": False,
+    }
+
+
+class FakeAdapter(BaseAdapter):
+    """
+    Transport adapter for `requests.Session` which answers by `handler(request) -> (status_code, dict or bytes)`
+    """
+
+    def __init__(self, handler=None):
+        super().__init__()
+        self.handler = handler if handler else (lambda request: (200, {"object": "list", "results": []}))
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        status_code, body = self.handler(request)
+        response = Response()
+        response.status_code = status_code
+        response.reason = "OK" if status_code < 400 else "Error"
+        response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+        response.raw = io.BytesIO(response._content)
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def fake_notion(handler=None, **kwargs):
+    """
+    Notion object without network. `no.adapter.requests` is the list of sent requests
+    """
+    no = Notion(token="secret_token", **kwargs)
+    no.adapter = FakeAdapter(handler)
+    no.session.session.mount("https://", no.adapter)
+    return no
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+from pytion.assets import AssetDownloader, asset_key
+from pytion.export import Exporter, read_export
+from pytion.models import Block, BlockArray, Page
+from tests.samples import FakeAdapter, fake_notion, block_dict, page_dict
+
+S3 = "https://s3.us-west-2.amazonaws.com/secure.notion-static.com/"
+
+
+def file_block(n, url, type_="image", expiry_time=None, subtype="file"):
+    data = {"url": url}
+    if subtype == "file":
+        data["expiry_time"] = expiry_time or (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    id_ = f"8a920ba7-dc1d-4961-811e-5c82b28028{n:02d}"
+    return block_dict(type_, id_=id_, content={"caption": [], "type": subtype, subtype: data})
+
+
+class FileServer:
+    def __init__(self, files):
+        self.files = files
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if "X-Amz-Signature=expired" in request.url:
+            return 403, b"<Error><Code>AccessDenied</Code></Error>"
+        body = self.files.get(asset_key(request.url))
+        return (200, body) if body is not None else (404, b"Not found")
+
+
+def downloader(no, path, files):
+    assets = AssetDownloader(no, str(path), workers=4)
+    server = FileServer(files)
+    assets.session.mount("https://", FakeAdapter(server))
+    return assets, server
+
+
+class TestAssetDownloader:
+    def test_url_attr(self):
+        block = Block(**file_block(1, S3 + "a/image.png?X-Amz-Signature=1"))
+        assert block.url == S3 + "a/image.png?X-Amz-Signature=1" and block.expiry_time is not None
+        external = Block(**file_block(2, "https://example.com/doc.pdf", "pdf", subtype="external"))
+        assert external.url == "https://example.com/doc.pdf" and external.expiry_time is None
+
+    def test_download(self, tmp_path):
+        files = {
+            asset_key(S3 + "a/image.png"): b"png",
+            asset_key(S3 + "b/copy.png"): b"png",
+            asset_key("https://example.com/doc.pdf"): b"%PDF",
+        }
+        assets, server = downloader(fake_notion(), tmp_path, files)
+        blocks = BlockArray([
+            file_block(1, S3 + "a/image.png?X-Amz-Signature=1"),
+            file_block(2, S3 + "a/image.png?X-Amz-Signature=2"),
+            file_block(3, S3 + "b/copy.png?X-Amz-Signature=3"),
+            file_block(4, "https://example.com/doc.pdf", "pdf", subtype="external"),
+            file_block(5, S3 + "c/missing.png?X-Amz-Signature=5", "file"),
+            block_dict(text="not a file"),
+        ])
+        result = assets.download(blocks)
+        png = str(tmp_path / (hashlib.sha256(b"png").hexdigest() + ".png"))
+        # the same URL is requested once, the same content is stored once
+        assert len(server.requests) == 4
+        assert result[blocks[0].id] == result[blocks[1].id] == result[blocks[2].id] == png
+        assert open(result[blocks[3].id], "rb").read() == b"%PDF"
+        assert result[blocks[4].id] is None
+        names = [os.path.basename(png), os.path.basename(result[blocks[3].id]), "assets.json"]
+        assert sorted(os.listdir(tmp_path)) == sorted(names)
+
+        # downloaded files are skipped by the next run
+        assets, server = downloader(fake_notion(), tmp_path, files)
+        assert assets.download(blocks)[blocks[0].id] == png and len(server.requests) == 1
+
+    def test_concurrent_downloads(self, tmp_path):
+        # exporter threads download files of several pages at once: every call saves the shared manifest
+        files = {asset_key(f"{S3}{n}/image.png"): str(n).encode() for n in range(32)}
+        assets, server = downloader(fake_notion(), tmp_path, files)
+        pages = [BlockArray([file_block(n, f"{S3}{n}/image.png?X-Amz-Signature={n}")]) for n in range(32)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(assets.download, pages))
+        assert all(path is not None for result in results for path in result.values())
+        with open(assets.manifest_path) as f:
+            assert len(json.load(f)) == 32
+        assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+    def test_expired_url(self, tmp_path):
+        block_id = "8a920ba7dc1d4961811e5c82b2802801"
+        fresh = file_block(1, S3 + "a/image.png?X-Amz-Signature=fresh")
+
+        def handler(request):
+            assert block_id in request.url
+            return 200, fresh
+
+        no = fake_notion(handler)
+        assets, server = downloader(no, tmp_path, {asset_key(S3 + "a/image.png"): b"png"})
+        past = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+        soon = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+        expired = BlockArray([file_block(1, S3 + "a/image.png?X-Amz-Signature=expired", expiry_time=past)])
+        assert assets.is_expiring(expired[0]) and assets.download(expired)[block_id] is not None
+        assert len(no.adapter.requests) == 1 and "fresh" in server.requests[0].url
+
+        # the URL is denied before expiry_time
+        assets, server = downloader(no, tmp_path / "2", {asset_key(S3 + "a/image.png"): b"png"})
+        denied = BlockArray([file_block(1, S3 + "a/image.png?X-Amz-Signature=expired", expiry_time=soon)])
+        assets.refresh_margin = timedelta(0)
+        assert assets.download(denied)[block_id] is not None
+        assert len(no.adapter.requests) == 2 and len(server.requests) == 2
+
+    def test_export(self, tmp_path):
+        page = page_dict()
+        image = file_block(1, S3 + "a/image.png?X-Amz-Signature=1")
+        no = fake_notion(lambda request: (200, {"object": "list", "results": [image], "has_more": False}))
+        exporter = Exporter(no, str(tmp_path), assets=True)
+        exporter.assets.session.mount("https://", FakeAdapter(FileServer({asset_key(S3 + "a/image.png"): b"png"})))
+        assert exporter.run([Page(**page)])["exported"] == 1
+        record = read_export(str(tmp_path))[page["id"].replace("-", "")]
+        path = record["assets"][image["id"].replace("-", "")]
+        assert open(path, "rb").read() == b"png" and os.path.dirname(path) == str(tmp_path / "assets")
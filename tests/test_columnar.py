@@ -0,0 +1,95 @@
+import pytest
+
+from pytion.columnar import Columns, Column
+from pytion.models import PageArray
+from tests.samples import page_dict, user_dict
+
+
+def rows():
+    return [
+        page_dict(id_="1", title="first", properties={
+            "Count": {"id": "a", "type": "number", "number": 5},
+            "Done": {"id": "b", "type": "checkbox", "checkbox": True},
+            "Status": {"id": "c", "type": "select", "select": {"id": "1", "name": "new", "color": "red"}},
+            "Tags": {"id": "d", "type": "multi_select", "multi_select": [{"name": "x"}, {"name": "y"}]},
+            "When": {"id": "e", "type": "date", "date": {"start": "2022-05-12T10:00:00.000+03:00", "end": None}},
+        }),
+        page_dict(id_="2", title="second", properties={
+            "Count": {"id": "a", "type": "number", "number": None},
+            "Done": {"id": "b", "type": "checkbox", "checkbox": False},
+            "Status": {"id": "c", "type": "select", "select": None},
+            "Tags": {"id": "d", "type": "multi_select", "multi_select": []},
+            "When": {"id": "e", "type": "date", "date": None},
+        }),
+        page_dict(id_="3", title="third", properties={
+            "Count": {"id": "a", "type": "number", "number": 2.5},
+            "Done": {"id": "b", "type": "checkbox", "checkbox": False},
+            "Status": {"id": "c", "type": "select", "select": {"id": "1", "name": "new", "color": "red"}},
+            "Tags": {"id": "d", "type": "multi_select", "multi_select": [{"name": "y"}]},
+            "When": {"id": "e", "type": "date", "date": {"start": "2022-05-13", "end": None}},
+        }),
+    ]
+
+
+class TestColumns:
+    def test_from_dicts(self):
+        cols = Columns(rows())
+        assert len(cols) == 3
+        assert cols.ids == ["1", "2", "3"]
+        assert cols["Name"].values == ["first", "second", "third"]
+        assert cols["Count"].values == [5, None, 2.5]
+        assert cols["Done"].values == [True, False, False]
+        assert cols["Status"].values == [0, -1, 0]
+        assert cols["Status"].categories == ["new"]
+        assert list(cols["Status"]) == ["new", None, "new"]
+        assert cols["Tags"].values == [["x", "y"], [], ["y"]]
+        assert cols["When"][0].hour == 10
+        assert cols["When"][1] is None
+
+    def test_from_page_array(self):
+        for pages in (PageArray(rows()), PageArray(rows(), lazy=True), PageArray(rows(), keep_raw=False)):
+            cols = pages.to_columns(names=["Name", "Status"])
+            assert list(cols) == ["Name", "Status"]
+            assert cols.to_dict() == {"Name": ["first", "second", "third"], "Status": ["new", None, "new"]}
+
+    def test_from_page_array__computed(self):
+        data = rows()
+        for n, row in enumerate(data):
+            row["properties"].update({
+                "Total": {"id": "f", "type": "formula", "formula": {"type": "number", "number": n * 10}},
+                "Sum": {"id": "g", "type": "rollup", "rollup": {"type": "number", "number": n, "function": "sum"}},
+                "Created": {"id": "h", "type": "created_time", "created_time": "2022-05-12T10:01:00.000Z"},
+                "Owner": {"id": "i", "type": "people", "people": [user_dict(f"{n:032x}")]},
+            })
+        expected = Columns(data).to_dict()
+        assert expected["Total"] == [0, 10, 20]
+        assert expected["Sum"] == [0, 1, 2]
+        assert expected["Created"][0].year == 2022
+        assert expected["Owner"][1] == [f"{1:032x}"]
+        assert expected["When"][0].hour == 10
+        for pages in (PageArray(data), PageArray(data, lazy=True), PageArray(data, keep_raw=False)):
+            assert pages.to_columns().to_dict() == expected
+
+    def test_missing_property(self):
+        data = rows()
+        data.insert(0, page_dict(id_="0", title="zero"))
+        cols = Columns(data)
+        assert cols["Count"].values == [None, 5, None, 2.5]
+        assert cols["Status"].values == [-1, 0, -1, 0]
+        column = Column("Status")
+        column.append(None)
+        column.append(data[1]["properties"]["Status"])
+        assert column.values == [-1, 0]
+
+    def test_to_numpy(self):
+        numpy = pytest.importorskip("numpy")
+        arrays = Columns(rows()).to_numpy()
+        assert arrays["Count"].dtype == numpy.float64
+        assert numpy.isnan(arrays["Count"][1])
+        assert arrays["Count"][numpy.isfinite(arrays["Count"])].sum() == 7.5
+        assert arrays["Done"].dtype == numpy.bool_
+        assert arrays["Status"].tolist() == [0, -1, 0]
+        assert arrays["When"].dtype == numpy.dtype("datetime64[ms]")
+        assert str(arrays["When"][0]) == "2022-05-12T07:00:00.000"
+        assert numpy.isnat(arrays["When"][1])
+        assert arrays["Tags"].dtype == object
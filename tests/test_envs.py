@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+import pytion.envs as envs
+from pytion import Notion
+
+
+class TestLazyConfig:
+    def test_token(self, monkeypatch, tmp_path):
+        monkeypatch.delattr(envs, "NOTION_SECRET", raising=False)
+        monkeypatch.setenv(envs.TOKEN_ENV, "secret_from_env\n")
+        assert envs.NOTION_SECRET == "secret_from_env"
+        # cached after the first access
+        monkeypatch.setenv(envs.TOKEN_ENV, "other")
+        assert envs.NOTION_SECRET == "secret_from_env"
+
+        monkeypatch.delattr(envs, "NOTION_SECRET")
+        monkeypatch.delenv(envs.TOKEN_ENV)
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / envs.TOKEN_FILE).write_text("secret_from_file\n")
+        assert envs.NOTION_SECRET == "secret_from_file"
+        monkeypatch.delattr(envs, "NOTION_SECRET")
+
+    def test_import_is_lazy(self):
+        code = (
+            "import sys, logging, pytion; "
+            "print('requests' in sys.modules, logging.getLogger('pytion').handlers[-1].__class__.__name__)"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+        assert output.stdout.split() == ["False", "NullHandler"]
+
+    def test_lazy_session(self):
+        no = Notion(token="secret_token")
+        assert no.session._session is None
+        assert no.session.session.headers["Authorization"] == "Bearer secret_token"
+        assert no.session.session is no.session.session
@@ -0,0 +1,89 @@
+import json
+import os
+
+from pytion.export import Exporter, read_export
+from tests.samples import fake_notion, page_dict, database_dict, block_dict
+
+PAGE = "878d6284-88d9-4894-ab14-f9b872cd6870"
+DB = "0e953909-9cff-456d-89e4-4684d6b6c701"
+PARENT = "8a920ba7-dc1d-4961-811e-5c82b28028ed"
+CHILD = "8a920ba7-dc1d-4961-811e-5c82b28028ee"
+
+
+class Workspace:
+    def __init__(self):
+        self.page = page_dict(id_=PAGE)
+        self.fail = False
+
+    def __call__(self, request):
+        if request.url.endswith("/search/"):
+            return 200, {"object": "list", "results": [self.page, database_dict(id_=DB)], "has_more": False}
+        if "blocks/" + PAGE.replace("-", "") + "/children" in request.url:
+            if self.fail:
+                return 500, {"object": "error", "status": 500, "code": "internal_server_error", "message": "Oops"}
+            return 200, {"object": "list", "results": [block_dict(id_=PARENT, has_children=True)], "has_more": False}
+        if "blocks/" + PARENT.replace("-", "") + "/children" in request.url:
+            return 200, {"object": "list", "results": [block_dict(id_=CHILD, text="nested")], "has_more": False}
+        return 404, {"object": "error", "status": 404, "code": "object_not_found", "message": "Not found"}
+
+
+def crawled(no):
+    return [r.url for r in no.adapter.requests if "children" in r.url]
+
+
+class TestExporter:
+    def test_ndjson(self, tmp_path):
+        workspace = Workspace()
+        no = fake_notion(workspace)
+        assert no.export(str(tmp_path)) == {"exported": 2, "skipped": 0, "failed": 0}
+        records = read_export(str(tmp_path))
+        assert set(records) == {PAGE.replace("-", ""), DB.replace("-", "")}
+        page = records[PAGE.replace("-", "")]
+        assert page["object"] == "page"
+        assert [b["id"] for b in page["blocks"]] == [PARENT, CHILD]
+        assert page["data"]["properties"]["Name"]["type"] == "title"
+        assert len(crawled(no)) == 2
+
+        # unchanged objects are skipped
+        no = fake_notion(workspace)
+        assert no.export(str(tmp_path)) == {"exported": 0, "skipped": 2, "failed": 0}
+        assert crawled(no) == []
+
+        workspace.page["last_edited_time"] = "2022-06-01T10:00:00.000Z"
+        no = fake_notion(workspace)
+        assert no.export(str(tmp_path)) == {"exported": 1, "skipped": 1, "failed": 0}
+        assert read_export(str(tmp_path))[PAGE.replace("-", "")]["last_edited_time"].startswith("2022-06-01")
+
+    def test_resume(self, tmp_path):
+        workspace = Workspace()
+        workspace.fail = True
+        no = fake_notion(workspace)
+        assert no.export(str(tmp_path)) == {"exported": 1, "skipped": 0, "failed": 1}
+        with open(os.path.join(tmp_path, Exporter.checkpoint_name)) as f:
+            assert list(json.load(f)) == [DB.replace("-", "")]
+        # interrupted line
+        with open(os.path.join(tmp_path, Exporter.ndjson_name), "ab") as f:
+            f.write(b'{"object": "pa')
+        workspace.fail = False
+        no = fake_notion(workspace)
+        assert no.export(str(tmp_path)) == {"exported": 1, "skipped": 1, "failed": 0}
+        assert len(read_export(str(tmp_path))) == 2
+
+    def test_api_dicts(self, tmp_path):
+        workspace = Workspace()
+        formula = {"type": "number", "number": 5}
+        workspace.page["properties"]["Total"] = {"id": "f", "type": "formula", "formula": formula}
+        no = fake_notion(workspace, keep_raw=False)
+        assert no.export(str(tmp_path), format_="snapshot", checkpoint_every=1)["exported"] == 2
+        record = read_export(str(tmp_path))[PAGE.replace("-", "")]
+        assert record["data"] == workspace.page
+        assert record["blocks"][1]["paragraph"]["rich_text"][0]["plain_text"] == "nested"
+        # the client keeps its options
+        assert no.model_options["keep_raw"] is False
+
+    def test_tree(self, tmp_path):
+        no = fake_notion(Workspace())
+        Exporter(no, str(tmp_path), format_="tree", workers=1).run()
+        assert os.listdir(os.path.join(tmp_path, "pages")) == [PAGE.replace("-", "") + ".json"]
+        assert os.listdir(os.path.join(tmp_path, "databases")) == [DB.replace("-", "") + ".json"]
+        assert read_export(str(tmp_path))[DB.replace("-", "")]["blocks"] == []
@@ -0,0 +1,68 @@
+from pytion.fulltext import FullTextIndex, tokenize
+from pytion.models import Page, BlockArray
+from tests.samples import fake_notion, page_dict, block_dict
+
+A = "878d6284-88d9-4894-ab14-f9b872cd6870"
+B = "878d6284-88d9-4894-ab14-f9b872cd6871"
+
+
+def blocks(*texts, prefix="8a920ba7-dc1d-4961-811e-5c82b28028"):
+    return BlockArray([block_dict(text=text, id_=f"{prefix}{n:02d}") for n, text in enumerate(texts)])
+
+
+def index_pages():
+    index = FullTextIndex()
+    index.add_page(Page(**page_dict(A, "Roadmap")), blocks("Quarterly report draft", "Budget and hiring"))
+    notes = blocks("report report report", "lunch menu", prefix="8a920ba7dc1d4961811e6c82b280")
+    index.add_page(Page(**page_dict(B, "Notes")), notes)
+    return index
+
+
+class TestFullTextIndex:
+    def test_tokenize(self):
+        assert tokenize("Hello, WORLD! snake_case 42") == ["hello", "world", "snake_case", "42"]
+
+    def test_search(self):
+        index = index_pages()
+        hits = index.search("report")
+        assert [hit.page_id for hit in hits] == [B.replace("-", ""), A.replace("-", "")]
+        assert hits[0].text == "report report report"
+        assert index.search("ROADMAP budget")[0].page_id == A.replace("-", "")
+        assert index.search("missing") == [] and index.search("") == []
+        assert len(index.search("report", by_page=False)) == 2
+        assert len(index.search("report draft lunch", limit=1)) == 1
+
+    def test_incremental_update(self):
+        index = index_pages()
+        page = Page(**page_dict(A, "Roadmap"))
+        assert not index.is_changed(page)
+        changed = Page(**page_dict(A, "Roadmap", last_edited_time="2022-06-01T00:00:00.000Z"))
+        assert index.is_changed(changed)
+        index.add_page(changed, blocks("lunch plans"))
+        assert [hit.page_id for hit in index.search("report")] == [B.replace("-", "")]
+        assert len(index.search("lunch")) == 2
+        index.remove_page(B)
+        assert index.search("report") == [] and "report" not in index.postings and len(index) == 1
+
+    def test_save_load(self, tmp_path):
+        index = index_pages()
+        path = str(tmp_path / "index" / "fulltext.json")
+        index.save(path)
+        loaded = FullTextIndex.load(path)
+        assert [(h.page_id, h.block_id, round(h.score, 6)) for h in loaded.search("report draft")] == [
+            (h.page_id, h.block_id, round(h.score, 6)) for h in index.search("report draft")
+        ]
+        assert len(FullTextIndex.load(str(tmp_path / "missing.json"))) == 0
+
+    def test_crawl(self):
+        def handler(request):
+            page_id = request.url.split("blocks/")[1][:32]
+            block = block_dict(text="crawled text", id_=page_id[:-1] + "f")
+            return 200, {"object": "list", "results": [block], "has_more": False}
+
+        no = fake_notion(handler)
+        index = FullTextIndex()
+        pages = [Page(**page_dict(A, "One")), Page(**page_dict(B, "Two"))]
+        assert index.crawl(no, pages) == 2 and len(no.adapter.requests) == 2
+        assert index.crawl(no, pages) == 0 and len(no.adapter.requests) == 2
+        assert index.search("crawled")[0].text == "crawled text"
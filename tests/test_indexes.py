@@ -0,0 +1,87 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from pytion.indexes import Index, HashIndex, SortedIndex, InvertedIndex
+from pytion.models import Page, PageArray
+from tests.samples import task_dict
+
+DOCS = "11111111-0000-0000-0000-000000000001"
+BUG = "11111111-0000-0000-0000-000000000002"
+RELEASE = "11111111-0000-0000-0000-000000000003"
+
+
+@pytest.fixture
+def pages():
+    return PageArray([
+        task_dict(DOCS, "Write docs", 3, True, ("docs",), "2022-05-10", "Done", ("01c67faf3aba45ffaa022407f87c86a5",)),
+        task_dict(BUG, "Fix bug", 5, False, ("bug", "urgent"), "2022-05-12T10:00:00.000Z", "Todo", links=(DOCS,)),
+        task_dict(RELEASE, "Release", None, False, ("urgent",), None, "Todo", links=(DOCS, BUG)),
+    ])
+
+
+def titles(pages):
+    return [str(p.title) for p in pages]
+
+
+class TestIndexes:
+    def test_kind(self, pages):
+        assert isinstance(pages.create_index("Status"), HashIndex)
+        assert isinstance(pages.create_index("Name"), HashIndex)
+        assert isinstance(pages.create_index("Count"), SortedIndex)
+        assert isinstance(pages.create_index("Due"), SortedIndex)
+        assert isinstance(pages.create_index("Tags"), InvertedIndex)
+        assert isinstance(pages.create_index("Owner"), InvertedIndex)
+        assert pages.create_index("Tags") is pages.indexes["Tags"]
+        assert isinstance(pages.create_index("Count", kind="hash"), HashIndex)
+        with pytest.raises(TypeError):
+            Index("Status", pages)
+
+    def test_hash(self, pages):
+        status = pages.create_index("Status")
+        assert titles(status.get("Todo")) == ["Fix bug", "Release"]
+        assert titles(status.get("Done")) == ["Write docs"]
+        assert len(status.get("Unknown")) == 0
+        assert titles(pages.create_index("Name").get("Release")) == ["Release"]
+        assert "Done" in status
+        assert isinstance(status.get("Todo"), PageArray)
+
+    def test_sorted(self, pages):
+        count = pages.create_index("Count")
+        assert titles(count.range(4)) == ["Fix bug"]
+        assert titles(count.range(3, 5, include_end=False)) == ["Write docs"]
+        assert titles(count.get(None)) == ["Release"]
+        assert count.max().id == BUG.replace("-", "")
+        # string bounds are converted by the type of the property
+        assert count.numeric and titles(count.range("3", "10")) == ["Write docs", "Fix bug"]
+        due = pages.create_index("Due")
+        assert titles(due.range(end="2022-05-11")) == ["Write docs"]
+        assert due.numeric is False
+        assert len(SortedIndex("Count").range("3", "10")) == 0
+        assert titles(due.range(datetime(2022, 5, 12, tzinfo=timezone.utc))) == ["Fix bug"]
+
+    def test_inverted(self, pages):
+        tags = pages.create_index("Tags")
+        assert titles(tags.get("urgent")) == ["Fix bug", "Release"]
+        assert titles(tags.get_all("urgent", "bug")) == ["Fix bug"]
+        assert titles(tags.get_any("docs", "bug")) == ["Write docs", "Fix bug"]
+        blocks = pages.create_index("Blocks")
+        assert titles(blocks.get(DOCS)) == ["Fix bug", "Release"]
+        assert titles(blocks.get(pages[1])) == ["Release"]
+        owner = pages.create_index("Owner")
+        assert titles(owner.get("01c67faf-3aba-45ff-aa02-2407f87c86a5")) == ["Write docs"]
+
+    def test_incremental(self, pages):
+        status = pages.create_index("Status")
+        tags = pages.create_index("Tags")
+        count = pages.create_index("Count")
+        pages.update_page(Page(**task_dict(RELEASE, "Release", 1, True, ("docs",), None, "Done")))
+        assert titles(status.get("Done")) == ["Write docs", "Release"]
+        assert titles(tags.get("urgent")) == ["Fix bug"]
+        assert titles(count.range(end=3)) == ["Release", "Write docs"]
+        del pages[0]
+        assert titles(status.get("Done")) == ["Release"]
+        assert "docs" in tags.terms()
+        pages.append(Page(**task_dict("11111111-0000-0000-0000-000000000004", "Deploy", 2, status="Todo")))
+        assert titles(status.get("Todo")) == ["Fix bug", "Deploy"]
+        assert len(count) == 3
@@ -0,0 +1,261 @@
+import io
+import json
+
+from pytion.markdown import MarkdownWriter, rich_text_to_markdown, write_markdown, parse_markdown, chunk_blocks
+from pytion.markdown import walk_blocks
+from pytion.models import Block, BlockArray, RichTextArray
+from tests.samples import block_dict, fake_notion, rich_text_list, page_dict
+
+
+def block(type_, text="", level=0, content=None, **attrs):
+    if content is None:
+        content = {"rich_text": rich_text_list(text), **attrs}
+    return Block(**block_dict(type_, content=content), level=level)
+
+
+def cells(*texts):
+    return {"cells": [rich_text_list(text) for text in texts]}
+
+
+class TestMarkdown:
+    def test_rich_text(self):
+        rt = rich_text_list("bold")
+        rt[0]["annotations"]["bold"] = True
+        rt += rich_text_list(" and ")
+        link = rich_text_list("code_link")
+        link[0]["annotations"]["code"] = True
+        link[0]["href"] = "https://example.com"
+        assert rich_text_to_markdown(RichTextArray(rt + link)) == "**bold** and [`code_link`](https://example.com)"
+        assert rich_text_to_markdown("a_b*c") == "a\\_b\\*c"
+
+    def test_blocks(self):
+        blocks = BlockArray([], create=True)
+        blocks.extend([
+            block("heading_1", "Title"),
+            block("paragraph", "First line\nsecond line"),
+            block("bulleted_list_item", "item 1"),
+            block("paragraph", "inside item", level=1),
+            block("numbered_list_item", "nested 1", level=1),
+            block("numbered_list_item", "nested 2", level=1),
+            block("bulleted_list_item", "item 2"),
+            block("to_do", "task", checked=True),
+            block("quote", "quoted"),
+            block("code", "print(1)", language="python", caption=[]),
+            block("divider", content={}),
+            block("table", content={"table_width": 2, "has_column_header": True}),
+            block("table_row", level=1, content=cells("a", "b")),
+            block("table_row", level=1, content=cells("1", "x|y")),
+        ])
+        assert blocks.to_markdown() == (
+            "# Title\n"
+            "\n"
+            "First line\n"
+            "second line\n"
+            "\n"
+            "- item 1\n"
+            "    inside item\n"
+            "\n"
+            "    1. nested 1\n"
+            "    2. nested 2\n"
+            "\n"
+            "- item 2\n"
+            "\n"
+            "- [x] task\n"
+            "\n"
+            "> quoted\n"
+            "\n"
+            "```python\n"
+            "print(1)\n"
+            "```\n"
+            "\n"
+            "---\n"
+            "\n"
+            "| a | b |\n"
+            "| --- | --- |\n"
+            "| 1 | x\\|y |\n"
+        )
+
+    def test_table_without_header(self):
+        md = write_markdown([
+            block("table", content={"table_width": 2, "has_column_header": False}),
+            block("table_row", level=1, content=cells("1", "2")),
+        ])
+        assert md == "|   |   |\n| --- | --- |\n| 1 | 2 |\n"
+
+    def test_stream(self):
+        stream = io.StringIO()
+        writer = MarkdownWriter(stream)
+        writer.write(block("paragraph", "one"))
+        assert stream.getvalue() == "one\n"
+        writer.write(block("bulleted_list_item", "two"))
+        assert stream.getvalue() == "one\n\n- two\n"
+        assert write_markdown([block("paragraph", "x")], stream) is None
+
+    def test_created_blocks(self):
+        md = write_markdown([Block.create("Created", type_="heading_2"), Block.create("text", "bulleted_list_item")])
+        assert md == "## Created\n\n- text\n"
+
+    def test_iter_blocks(self):
+        page_id = "82ee5677402f4481a5d3302273400a00"
+        parent = "8a920ba7-dc1d-4961-811e-5c82b28028ed"
+
+        def handler(request):
+            if "blocks/" + page_id + "/children" in request.url:
+                if "start_cursor" in request.url:
+                    return 200, {"object": "list", "results": [block_dict(text="last")], "has_more": False}
+                return 200, {
+                    "object": "list", "results": [block_dict("bulleted_list_item", "first", parent, has_children=True)],
+                    "has_more": True, "next_cursor": "c1",
+                }
+            return 200, {"object": "list", "results": [block_dict(text="child")], "has_more": False}
+
+        no = fake_notion(handler)
+        blocks = no.blocks.iter_block_children_recursive(page_id)
+        first = next(blocks)
+        assert str(first.text) == "- first" and len(no.adapter.requests) == 1
+        assert [(b.simple, b._level) for b in blocks] == [("child", 1), ("last", 0)]
+        assert len(no.adapter.requests) == 3
+        md = write_markdown(no.blocks.iter_block_children_recursive(page_id))
+        assert md == "- first\n    child\n\nlast\n"
+
+    def test_iter_blocks__from_object(self):
+        page_id = "82ee5677402f4481a5d3302273400a00"
+        top_id = "8a920ba7dc1d4961811e5c82b28028ed"
+        nested_id = "9b031cb8ed2e4a72922f6d93c39139fe"
+
+        def handler(request):
+            if "blocks/" + page_id + "/children" in request.url:
+                return 200, {"object": "list", "results": [block_dict(text="top", id_=top_id, has_children=True)]}
+            if "blocks/" + top_id + "/children" in request.url:
+                return 200, {"object": "list", "results": [block_dict(text="nested", id_=nested_id)]}
+            return 200, page_dict(page_id)
+
+        no = fake_notion(handler)
+        page = no.pages.get(page_id)
+        assert [b.simple for b in page.iter_block_children_recursive(max_depth=3)] == ["top", "nested"]
+
+
+class FakeBlocksServer:
+    """
+    Keeps blocks appended by `PATCH blocks/ID/children` and returns them by `GET blocks/ID/children`
+    """
+
+    def __init__(self):
+        self.children = {"page": []}
+        self.blocks = {}
+        self.levels = []
+
+    def _create(self, parent, data, level):
+        id_ = f"{len(self.blocks):032d}"
+        type_ = data.get("type") or next(key for key in data if key not in ("object", "children"))
+        content = {key: value for key, value in data[type_].items() if key != "children"}
+        text = "".join(rt["text"]["content"] for rt in content.get("rich_text", []))
+        self.blocks[id_] = block_dict(type_, id_=id_, content={**content, "rich_text": rich_text_list(text)})
+        self.children.setdefault(parent, []).append(id_)
+        self.levels.append(level)
+        for child in data[type_].get("children", []):
+            self._create(id_, child, level + 1)
+        return self.blocks[id_]
+
+    def handler(self, request):
+        parent = request.url.split("blocks/")[1].split("/")[0].split("?")[0]
+        if request.method == "PATCH":
+            new = [self._create(parent, data, 0) for data in json.loads(request.body)["children"]]
+            return 200, {"object": "list", "results": new}
+        return 200, {
+            "object": "list", "results": [self.blocks[id_] for id_ in self.children.get(parent, [])],
+            "has_more": False,
+        }
+
+    def tree(self, parent="page"):
+        result = []
+        for id_ in self.children.get(parent, []):
+            data = self.blocks[id_]
+            text = "".join(rt["plain_text"] for rt in data[data["type"]].get("rich_text", []))
+            result.append((text, self.tree(id_)) if self.children.get(id_) else text)
+        return result
+
+
+class TestMarkdownImport:
+    def test_parse(self):
+        md = (
+            "# Title with **bold**\n\nSome *italic*, `code`, [link](https://example.com) and snake_case.\n"
+            "continued\n\n- item\n    - [x] done\n1. one\n2. two\n\n> quote\n> lines\n\n"
+            "```py\ndef f():\n    return 1\n```\n\n***\n\n| a | b |\n|---|:-:|\n| 1 | 2 \\| 3 |\n| 4 |\n\nSetext\n---\n"
+        )
+        blocks = list(parse_markdown(md))
+        assert [b.type for b in blocks] == [
+            "heading_1", "paragraph", "bulleted_list_item", "numbered_list_item", "numbered_list_item", "quote",
+            "code", "divider", "table", "heading_2",
+        ]
+        assert str(blocks[1].text) == "Some italic, code, link and snake_case. continued"
+        rich_text = blocks[1].get()["paragraph"]["rich_text"]
+        assert rich_text[1]["annotations"]["italic"] and rich_text[3]["annotations"]["code"]
+        assert rich_text[5]["text"]["link"] == {"url": "https://example.com"} and "annotations" not in rich_text[0]
+        assert blocks[0].get()["heading_1"]["rich_text"][1]["annotations"]["bold"]
+
+        to_do = blocks[2].child_blocks[0]
+        assert to_do.type == "to_do" and to_do.checked and to_do._level == 1
+        assert str(blocks[5].text) == "quote\nlines"
+        assert blocks[6].get()["code"]["language"] == "python" and str(blocks[6].text) == "def f():\n    return 1"
+        assert blocks[7].get() == {"divider": {}}
+
+        table = blocks[8].get()["table"]
+        assert table["table_width"] == 2 and table["has_column_header"] and not table["has_row_header"]
+        rows = [
+            [[rt["text"]["content"] for rt in cell] for cell in row["table_row"]["cells"]] for row in table["children"]
+        ]
+        assert rows == [[["a"], ["b"]], [["1"], ["2 | 3"]], [["4"], []]]
+
+    def test_round_trip(self):
+        md = "# Title\n\n- first\n    - nested **bold**\n\n1. one\n2. two\n\n> quoted\n\n```python\nx = 1\n```\n"
+        assert write_markdown(walk_blocks(parse_markdown(md))) == md
+        md = "| a | b |\n| --- | --- |\n| 1 | *x* \\| y |\n\ntext\n"
+        assert write_markdown(walk_blocks(parse_markdown(md))) == md
+
+    def test_streaming(self):
+        lines = iter(["# A\n", "text\n", "\n", "# B\n"])
+        blocks = parse_markdown(lines)
+        assert next(blocks).type == "heading_1"
+        # the first block is completed before the rest of the document is read
+        assert next(lines) == "# B\n"
+
+    def test_long_text(self):
+        blocks = list(parse_markdown("x" * (2000 * 150 + 1)))
+        assert [len(b.text) for b in blocks] == [100, 51]
+        assert all(len(rt.plain_text) <= 2000 for b in blocks for rt in b.text)
+
+    def test_long_text__every_type(self):
+        text = "x" * (2000 * 150 + 1)
+        quotes = list(parse_markdown("> " + text))
+        assert [(b.type, len(b.text)) for b in quotes] == [("quote", 100), ("quote", 51)]
+        headings = list(parse_markdown("## " + text))
+        assert [(b.type, len(b.text)) for b in headings] == [("heading_2", 100), ("heading_2", 51)]
+        # the rest of list item text is nested paragraph, so the list is not split
+        item, second = parse_markdown(f"- [ ] {text}\n    - nested\n- next")
+        assert (item.type, len(item.text), second.type) == ("to_do", 100, "bulleted_list_item")
+        assert [(b.type, len(b.text), b._level) for b in item.child_blocks] == [
+            ("paragraph", 51, 1), ("bulleted_list_item", 1, 1),
+        ]
+        item = next(parse_markdown(f"1. {text[:100]}\n{text}"))
+        assert len(item.text) == 100 and len(item.child_blocks[0].text) == 51
+        assert all(len(rt.plain_text) <= 2000 for b in walk_blocks([item]) for rt in b.text)
+
+    def test_chunks(self):
+        chunks = list(chunk_blocks(parse_markdown("\n\n".join(f"p{i}" for i in range(250)))))
+        assert [len(chunk) for chunk in chunks] == [100, 100, 50]
+
+        # 1 + 20 + 20 * 60 blocks are too many for the single request
+        md = "- root\n" + "".join("    - child\n" + "        - leaf\n" * 60 for _ in range(20))
+        chunk = next(chunk_blocks(parse_markdown(md)))
+        assert chunk[0].nesting == 1 and len(chunk[0].get()["bulleted_list_item"]["children"]) == 20
+
+    def test_block_append_markdown(self):
+        server = FakeBlocksServer()
+        no = fake_notion(server.handler)
+        md = "# Doc\n\n- a\n    - b\n        - c\n            - d\n- e\n\n" + "\n".join(f"{i}. n" for i in range(120))
+        requests = no.pages.block_append_markdown(md, "page")
+        assert server.tree()[:3] == ["Doc", ("a", [("b", [("c", ["d"])])]), "e"]
+        assert server.tree()[3:] == ["n"] * 120
+        # `d` is appended to `c` found by children of `a` and `b`, the rest of list is appended by the next request
+        assert max(server.levels) == 2 and requests == len(no.adapter.requests) == 5
@@ -1,4 +1,10 @@
+import threading
+from datetime import datetime
+
+import pytest
+
 from pytion.models import *
+from tests.samples import page_dict, block_dict, database_dict, rich_text_list, user_dict
 
 
 class TestProperty:
@@ -202,3 +208,283 @@ class TestBlock:
         assert b.id == ""
         assert b.type == "heading_2"
         assert b_dict["heading_2"]["is_toggleable"] is True
+
+
+# API values of every property type (read shape)
+PROPERTY_VALUES = {
+    "title": {"id": "title", "type": "title", "title": rich_text_list("Task")},
+    "rich_text": {"id": "t", "type": "rich_text", "rich_text": rich_text_list("note") + [{
+        "type": "mention",
+        "mention": {"type": "page", "page": {"id": "878d6284-88d9-4894-ab14-f9b872cd6870"}},
+        "annotations": {
+            "bold": True, "italic": False, "strikethrough": False, "underline": False, "code": False, "color": "red"
+        },
+        "plain_text": "Untitled",
+        "href": "https://www.notion.so/878d628488d94894ab14f9b872cd6870",
+    }]},
+    "number": {"id": "n", "type": "number", "number": 2.5},
+    "checkbox": {"id": "c", "type": "checkbox", "checkbox": False},
+    "url": {"id": "u", "type": "url", "url": "https://example.com"},
+    "email": {"id": "e", "type": "email", "email": None},
+    "phone_number": {"id": "ph", "type": "phone_number", "phone_number": "+1 555"},
+    "select": {"id": "s", "type": "select", "select": {"id": "1", "name": "Done", "color": "green"}},
+    "multi_select": {"id": "m", "type": "multi_select", "multi_select": [{"id": "2", "name": "a", "color": "red"}]},
+    "status": {"id": "st", "type": "status", "status": {"id": "3", "name": "Doing", "color": "blue"}},
+    "date": {"id": "d", "type": "date", "date": {
+        "start": "2022-05-01T10:00:00.000+03:00", "end": None, "time_zone": "Europe/Moscow",
+    }},
+    "people": {"id": "p", "type": "people", "people": [user_dict(
+        "6a9c4e1b3f2d4a5e8b7c9d0e1f2a3b4c", name="Ann", avatar_url=None, type="person", person={"email": "a@b.c"},
+    )]},
+    "relation": {
+        "id": "r", "type": "relation", "relation": [{"id": "1bc86cc1d6f24362a6c40c2c89b423cc"}], "has_more": True,
+    },
+    "files": {"id": "f", "type": "files", "files": [
+        {"name": "a.png", "type": "external", "external": {"url": "https://example.com/a.png"}},
+    ]},
+    "formula": {"id": "fo", "type": "formula", "formula": {"type": "number", "number": 5}},
+    "rollup": {"id": "ro", "type": "rollup", "rollup": {"type": "number", "number": 3, "function": "count"}},
+    "created_time": {"id": "ct", "type": "created_time", "created_time": "2022-05-12T10:01:00.000Z"},
+    "created_by": {"id": "cb", "type": "created_by", "created_by": user_dict()},
+    "last_edited_time": {"id": "lt", "type": "last_edited_time", "last_edited_time": "2022-05-13T11:02:00.000Z"},
+    "last_edited_by": {"id": "lb", "type": "last_edited_by", "last_edited_by": user_dict()},
+    "unique_id": {"id": "ui", "type": "unique_id", "unique_id": {"prefix": "T", "number": 7}},
+}
+
+
+class TestRawRetention:
+    @pytest.mark.parametrize("type_", PROPERTY_VALUES)
+    def test_keep_raw__property_round_trip(self, type_):
+        data = page_dict(properties={"Value": PROPERTY_VALUES[type_]})
+        page = Page(**data, keep_raw=False)
+        assert page.properties["Value"]._raw is None
+        assert page.raw["properties"]["Value"] == PROPERTY_VALUES[type_]
+        assert page.raw["created_time"] == data["created_time"]
+
+    def test_keep_raw__database_round_trip(self):
+        properties = {
+            "Count": {"id": "a%3Ab", "name": "Count", "type": "number", "number": {"format": "dollar"}},
+            "Kind": {"id": "k", "name": "Kind", "type": "select", "select": {"options": [{"name": "a"}]}},
+        }
+        data = database_dict(properties=properties)
+        database = Database(**data, keep_raw=False)
+        raw = database.raw
+        assert raw["properties"] == data["properties"]
+        assert raw["title"] == data["title"]
+        assert raw["last_edited_time"] == data["last_edited_time"]
+
+    def test_keep_raw__default(self):
+        data = page_dict()
+        page = Page(**data)
+        assert page.raw == data
+        assert page.created_by.raw == data["created_by"]
+
+    def test_keep_raw__disabled(self):
+        data = page_dict(properties={"Done": {"id": "abc", "type": "checkbox", "checkbox": True}})
+        page = Page(**data, keep_raw=False)
+        assert page._raw is None
+        assert page.created_by._raw is None
+        assert all(p._raw is None for p in page.properties.values())
+        raw = page.raw
+        assert raw["id"] == "878d628488d94894ab14f9b872cd6870"
+        assert raw["object"] == "page"
+        assert raw["parent"] == {"type": "database_id", "database_id": "0e9539099cff456d89e44684d6b6c701"}
+        assert raw["properties"]["Done"] == {"id": "abc", "type": "checkbox", "checkbox": True}
+        assert page.get()["properties"]["Done"] == {"checkbox": True}
+
+    def test_keep_raw__array(self):
+        pages = PageArray([page_dict(), page_dict(id_="1bc86cc1d6f24362a6c40c2c89b423cc")], keep_raw=False)
+        assert len(pages) == 2
+        assert all(p._raw is None for p in pages)
+        assert str(pages[1].title) == "Pytion Tests"
+
+    def test_keep_raw__block(self):
+        data = block_dict(type_="bulleted_list_item")
+        block = Block(**data, keep_raw=False)
+        assert block._raw is None
+        assert block.raw["bulleted_list_item"] == data["bulleted_list_item"]
+        assert block.raw["type"] == "bulleted_list_item"
+
+
+class TestLazyModels:
+    def test_lazy__page(self):
+        page = Page(**page_dict(), lazy=True)
+        assert page.is_lazy
+        assert page.id == "878d628488d94894ab14f9b872cd6870"
+        assert "created_time" not in page.__dict__
+        assert page.created_time.year == 2022
+        assert "created_time" in page.__dict__
+        assert str(page.title) == "Pytion Tests"
+        assert page.is_lazy
+        assert isinstance(page.properties["Name"], PropertyValue)
+        assert not page.is_lazy
+        assert page.parent.uri == "databases"
+
+    def test_lazy__keeps_modified_attrs(self):
+        page = Page(**page_dict(), lazy=True)
+        page.archived = True
+        page.decode()
+        assert page.archived is True
+        assert page.get()["parent"] == {"database_id": "0e9539099cff456d89e44684d6b6c701"}
+
+    def test_lazy__block(self):
+        block = Block(**block_dict(type_="to_do", content={"rich_text": [], "checked": True}), lazy=True)
+        assert block.type == "to_do"
+        assert block.is_lazy
+        assert block.checked is True
+        assert str(block) == "[x] "
+        assert not block.is_lazy
+
+    def test_lazy__missing_attr(self):
+        block = Block(**block_dict(), lazy=True)
+        with pytest.raises(AttributeError):
+            block.not_existing_attr
+        assert not block.is_lazy
+
+    def test_lazy__concurrent_decode(self, monkeypatch):
+        page = Page(**page_dict(), lazy=True)
+        init = Page.__init__
+        results = []
+
+        def read_page():
+            try:
+                results.append(str(page.properties["Name"]))
+            except AttributeError as e:
+                results.append(e)
+
+        def init_and_read(self, **kwargs):
+            # another thread reads the page while it is decoded
+            if not results:
+                results.append(None)
+                thread = threading.Thread(target=read_page)
+                thread.start()
+                thread.join()
+            init(self, **kwargs)
+
+        monkeypatch.setattr(Page, "__init__", init_and_read)
+        page.decode()
+        assert results == [None, "Pytion Tests"]
+        assert not page.is_lazy and str(page.title) == "Pytion Tests"
+
+    def test_lazy__array_without_raw(self):
+        pages = PageArray([page_dict(), page_dict()], lazy=True, keep_raw=False)
+        assert all(p.is_lazy for p in pages)
+        assert pages[0].raw["id"] == "878d6284-88d9-4894-ab14-f9b872cd6870"
+        pages[0].decode()
+        assert pages[0].raw["id"] == "878d628488d94894ab14f9b872cd6870"
+        assert "_source" not in pages[0].__dict__
+
+
+class TestParsers:
+    def test_block__registered_types(self):
+        for type_ in ("heading_1", "bulleted_list_item", "child_page", "image", "table_row", "divider"):
+            assert type_ in Block.parsers
+        assert "not_a_block" not in Block.parsers
+
+    def test_block__unknown_type(self):
+        block = Block(**block_dict(type_="not_a_block", content={}))
+        assert block.text == "*UNKNOWN_BLOCK_TYPE*"
+        assert block.simple == ""
+
+    def test_block__custom_parser(self):
+        @Block.register_parser("custom_block")
+        def parse_custom(block, data):
+            block.text = data["value"]
+            block._plain_text = data["value"]
+
+        try:
+            block = Block(**block_dict(type_="custom_block", content={"value": "custom"}))
+            assert str(block) == "custom"
+        finally:
+            del Block.parsers["custom_block"]
+
+    def test_block__file_types(self):
+        content = {"caption": [], "type": "external", "external": {"url": "https://example.com/a.pdf"}}
+        block = Block(**block_dict(type_="pdf", content=content))
+        assert block.text == "<https://example.com/a.pdf>"
+        assert block.expiry_time is None
+        block = Block(**block_dict(type_="video", content={"caption": [], "type": "other"}))
+        assert block.text == "*Unknown video type*"
+
+    def test_property_value__types(self):
+        pv = PropertyValue({"id": "a", "type": "number", "number": 5}, "Count")
+        assert pv.value == 5
+        pv = PropertyValue({"id": "a", "type": "formula", "formula": {"type": "date", "date": None}}, "F")
+        assert pv.value is None and pv.start is None
+        pv = PropertyValue({"id": "a", "type": "rollup", "rollup": {"type": "array", "array": [
+            {"type": "number", "number": 1}, {"type": "number", "number": 2}
+        ]}}, "R")
+        assert pv.value == [1, 2]
+        pv = PropertyValue({"id": "a", "type": "unknown_type", "unknown_type": 1}, "U")
+        assert pv.value is None
+
+    def test_property_value__custom_parser(self):
+        @PropertyValue.register_parser("custom_value")
+        def parse_custom(pv, data):
+            pv.value = data["custom_value"] * 2
+
+        try:
+            assert PropertyValue({"type": "custom_value", "custom_value": 2}, "C").value == 4
+        finally:
+            del PropertyValue.parsers["custom_value"]
+
+
+class TestInterner:
+    def test_array__shared_objects(self):
+        relation = {"id": "q", "type": "relation", "relation": [{"id": "04262843-082a-478d-97f7-41948a32613b"}]}
+        pages = PageArray([
+            page_dict(properties={"Rel": relation}),
+            page_dict(id_="1bc86cc1d6f24362a6c40c2c89b423cc", properties={"Rel": relation}),
+        ], intern=True)
+        assert pages[0].created_by is pages[1].created_by
+        assert pages[0].created_by is pages[0].last_edited_by
+        assert pages[0].parent is pages[1].parent
+        assert pages[0].properties["Rel"].value[0] is pages[1].properties["Rel"].value[0]
+        assert pages[0].children is not pages[1].children
+
+    def test_array__not_shared_by_default(self):
+        pages = PageArray([page_dict(), page_dict(id_="1bc86cc1d6f24362a6c40c2c89b423cc")])
+        assert pages[0].created_by == pages[1].created_by
+        assert pages[0].created_by is not pages[1].created_by
+        pages[0].created_by.name = "Changed"
+        pages[0].parent.id = "1bc86cc1d6f24362a6c40c2c89b423cc"
+        assert pages[1].created_by.name is None
+        assert pages[1].parent.id == "0e9539099cff456d89e44684d6b6c701"
+
+    def test_client__shared_between_arrays(self):
+        interner = Interner()
+        first = PageArray([page_dict()], interner=interner)
+        second = BlockArray([block_dict()], interner=interner)
+        assert first[0].created_by is second[0].created_by
+        assert len(interner.users) == 1
+        interner.clear()
+        assert len(interner) == 0
+
+    def test_single_model__no_interning(self):
+        first, second = Page(**page_dict()), Page(**page_dict())
+        assert first.created_by is not second.created_by
+        assert first.created_by == second.created_by
+        assert first.parent == second.parent
+        assert len({first.parent, second.parent}) == 1
+
+    def test_equality(self):
+        assert User.create("123") == User(object="user", id="123", name="Someone")
+        assert User.create("123") != User.create("321")
+        assert LinkTo.create(page_id="123") == LinkTo(type="page_id", page_id="123")
+        assert LinkTo.create(page_id="123") != LinkTo.create(database_id="123")
+
+
+class TestIsoTime:
+    @pytest.mark.parametrize("time", [
+        "2020-08-12T02:12:33.231Z", "2022-05-12T00:00:00.000+03:00", "2022-05-12T00:00:00.000-05:30", "2020-08-12",
+    ])
+    def test_format_iso_time(self, time):
+        expected = datetime.fromisoformat(time.replace("Z", "+00:00"))
+        result = Model.format_iso_time(time)
+        assert result == expected
+        assert result.utcoffset() == expected.utcoffset()
+        assert Model.format_iso_time(time) is result
+
+    def test_format_iso_time__empty(self):
+        assert Model.format_iso_time(None) is None
+        assert Model.format_iso_time("") is None
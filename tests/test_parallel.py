@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from pytion.models import Page, PageArray, BlockArray, Interner
+from pytion.parallel import parse_parallel, shutdown_executors, MIN_PARALLEL_SIZE
+from tests.samples import fake_notion, task_dict, block_dict
+
+DB = "0e9539099cff456d89e44684d6b6c701"
+
+
+def tasks(count):
+    return [
+        task_dict(f"{n:032x}", f"Task {n}", count=n, tags=("a", f"t{n % 3}"), due="2022-05-10", people=("u1",))
+        for n in range(count)
+    ]
+
+
+def values(pages):
+    return [
+        (p.id, str(p.title), p.last_edited_time, p.created_by.id, {name: str(pv) for name, pv in p.properties.items()})
+        for p in pages
+    ]
+
+
+class Executor(ThreadPoolExecutor):
+    # counts tasks sent to workers
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.submitted = 0
+
+    def submit(self, *args, **kwargs):
+        self.submitted += 1
+        return super().submit(*args, **kwargs)
+
+
+@pytest.fixture(scope="module", autouse=True)
+def executors():
+    yield
+    shutdown_executors()
+
+
+class TestParallel:
+    def test_pages(self):
+        data = tasks(MIN_PARALLEL_SIZE + 10)
+        pages = PageArray(data, workers=2, keep_raw=False, intern=True)
+        assert isinstance(pages, PageArray) and len(pages) == len(data)
+        assert values(pages) == values(PageArray(data))
+        assert all(p._raw is None for p in pages)
+        assert pages[5].raw["properties"]["Count"]["number"] == 5
+        # User objects are shared inside chunks
+        assert pages[0].created_by is pages[1].created_by
+
+    def test_blocks(self):
+        data = [block_dict(text=f"line {n}", id_=f"{n:032x}") for n in range(MIN_PARALLEL_SIZE)]
+        blocks = BlockArray(data, workers=2)
+        assert [b.simple for b in blocks] == [f"line {n}" for n in range(MIN_PARALLEL_SIZE)]
+        assert blocks[0].raw == data[0]
+
+    def test_small(self):
+        with Executor(2) as executor:
+            assert len(parse_parallel(tasks(10), workers=2, executor=executor)) == 10
+            assert executor.submitted == 0
+            result = parse_parallel(tasks(MIN_PARALLEL_SIZE), workers=2, chunk_size=300, executor=executor)
+            assert executor.submitted == 4
+        assert [p.id for p in result] == [f"{n:032x}" for n in range(MIN_PARALLEL_SIZE)]
+        assert all(isinstance(p, Page) for p in result)
+
+    def test_options(self, caplog):
+        data = tasks(MIN_PARALLEL_SIZE)
+        with Executor(2) as executor:
+            # lazy models are built in the current process
+            lazy = parse_parallel(data, workers=2, executor=executor, lazy=True)
+            assert executor.submitted == 0 and all(p.is_lazy for p in lazy)
+            assert values(lazy) == values(PageArray(data))
+            interner = Interner()
+            result = parse_parallel(data, workers=2, executor=executor, interner=interner)
+            assert executor.submitted == 4 and values(result) == values(lazy)
+        assert "Interner is not shared with worker processes" in caplog.text
+
+    def test_notion(self):
+        no = fake_notion(
+            lambda request: (200, {"object": "list", "results": tasks(MIN_PARALLEL_SIZE), "has_more": False}),
+            parse_workers=2, keep_raw=False,
+        )
+        pages = no.databases.db_query(DB).obj
+        assert isinstance(pages, PageArray)
+        assert str(pages[-1].title) == f"Task {MIN_PARALLEL_SIZE - 1}"
@@ -1,10 +1,15 @@
+import json
+import threading
+import time
+
 import requests
 import pytest
 
 import pytion.envs as envs
 from pytion import InvalidRequestURL, ContentError, ValidationError, ObjectNotFound
-from pytion.query import Sort
-from pytion.models import Page
+from pytion.query import Sort, JSONCodec, Filter, match_filter, sort_pages, query_pages
+from pytion.models import Page, PageArray
+from tests.samples import fake_notion, task_dict
 
 
 class TestRequest:
@@ -209,3 +214,196 @@ class TestSort:
         assert str(r.obj[2]) == ""
         assert "testing" in str(r.obj[1])
         assert bool(r.obj[2].title) is False
+
+
+class TestJSONCodec:
+    def test_default(self):
+        codec = JSONCodec()
+        assert codec.loads(codec.dumps({"a": "ю", "b": [1, 2.5, None]})) == {"a": "ю", "b": [1, 2.5, None]}
+
+    def test_stdlib(self):
+        codec = JSONCodec(dumps=json.dumps, loads=json.loads)
+        assert codec.dumps({"a": 1}) == b'{"a": 1}'
+        assert repr(codec) == "JSONCodec(json)"
+
+    def test_request(self):
+        calls = []
+
+        def loads(content):
+            calls.append(content)
+            return json.loads(content)
+
+        no = fake_notion(lambda r: (200, {"object": "page", "echo": json.loads(r.body)}), codec=JSONCodec(loads=loads))
+        r = no.session.method("patch", "pages", id_="123", data={"archived": True})
+        assert r["echo"] == {"archived": True}
+        assert no.adapter.requests[0].headers["Content-Type"] == "application/json"
+        assert isinstance(calls[0], bytes)
+
+    def test_request__not_json(self):
+        no = fake_notion(lambda r: (200, b"<html></html>"))
+        with pytest.raises(ContentError):
+            no.session.method("get", "pages", id_="123")
+
+
+class TestLocalQuery:
+    pages = PageArray([
+        task_dict("11111111-0000-0000-0000-000000000001", "Write docs", 3, True, ("docs",), "2022-05-10", "Done",
+             ("01c67faf3aba45ffaa022407f87c86a5",)),
+        task_dict(
+            "11111111-0000-0000-0000-000000000002", "Fix bug", 5, False, ("bug", "urgent"), "2022-05-12T10:00:00.000Z"
+        ),
+        task_dict("11111111-0000-0000-0000-000000000003", "Release", None, False, (), None, "Todo"),
+    ])
+
+    def titles(self, pages):
+        return [str(p.title) for p in pages]
+
+    def test_filter_objects(self):
+        assert self.titles(query_pages(self.pages, Filter(property_name="Name", property_type="title", value="BUG"))) \
+            == ["Fix bug"]
+        done = Filter(property_name="Done", property_type="checkbox")
+        assert self.titles(query_pages(self.pages, done)) == ["Write docs"]
+        assert done.match(self.pages[0]) and not done.match(self.pages[1])
+        count = Filter(property_name="a:b", property_type="number", value="3", condition="greater_than")
+        assert self.titles(query_pages(self.pages, count)) == ["Fix bug"]
+        tags = Filter(property_name="Tags", property_type="multi_select", value="urgent")
+        assert self.titles(query_pages(self.pages, tags)) == ["Fix bug"]
+        status = Filter(property_name="Status", property_type="select", condition="is_empty")
+        assert self.titles(query_pages(self.pages, status)) == ["Fix bug"]
+        owner = Filter(property_name="Owner", property_type="people", value="01c67faf-3aba-45ff-aa02-2407f87c86a5")
+        assert self.titles(query_pages(self.pages, owner)) == ["Write docs"]
+
+    def test_empty_values(self):
+        assert not match_filter({"property": "Count", "number": {"less_than": 10}}, self.pages[2])
+        assert match_filter({"property": "Count", "number": {"is_empty": True}}, self.pages[2])
+        assert match_filter({"property": "Note", "rich_text": {"does_not_contain": "docs"}}, self.pages[1])
+
+    def test_dates(self):
+        on = {"property": "Due", "date": {"on_or_after": "2022-05-12"}}
+        assert self.titles(query_pages(self.pages, on)) == ["Fix bug"]
+        before = {"property": "Due", "date": {"before": "2022-05-12T09:00:00+00:00"}}
+        assert self.titles(query_pages(self.pages, before)) == ["Write docs"]
+        assert not any(match_filter({"property": "Due", "date": {"past_week": {}}}, p) for p in self.pages)
+        created = {"timestamp": "created_time", "created_time": {"equals": "2022-05-12"}}
+        assert len(query_pages(self.pages, created)) == 3
+
+    def test_compound(self):
+        filter_ = {"or": [
+            {"property": "Done", "checkbox": {"equals": True}},
+            {"and": [
+                {"property": "Tags", "multi_select": {"is_empty": True}},
+                {"property": "Status", "select": {"equals": "Todo"}},
+            ]},
+        ]}
+        assert self.titles(query_pages(self.pages, filter_)) == ["Write docs", "Release"]
+
+    def test_sort(self):
+        assert self.titles(sort_pages(self.pages, Sort("Count", "descending"))) == ["Fix bug", "Write docs", "Release"]
+        assert self.titles(Sort("Due").apply(self.pages)) == ["Write docs", "Fix bug", "Release"]
+        sorts = Sort("Done", "ascending")
+        sorts.add("Name", "descending")
+        assert self.titles(query_pages(self.pages, sorts=sorts, limit=2)) == ["Release", "Fix bug"]
+
+    def test_element(self):
+        no = fake_notion()
+        element = no.pages.from_object(self.pages[0])
+        assert element.local_query() is None
+        element.obj = self.pages
+        r = element.local_query({"property": "Name", "title": {"starts_with": "re"}})
+        assert isinstance(r.obj, PageArray)
+        assert self.titles(r.obj) == ["Release"]
+        assert no.adapter.requests == []
+
+
+class TestSingleFlight:
+    page_id = "878d628488d94894ab14f9b872cd6870"
+
+    def concurrent_gets(self, no, release, count=5):
+        results, errors = [], []
+
+        def get():
+            try:
+                results.append(no.session.method("get", "pages", id_=self.page_id))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=get) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while no.session.flights.coalesced < count - 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_coalesced(self):
+        release = threading.Event()
+
+        def handler(request):
+            release.wait(5)
+            return 200, task_dict(self.page_id, "Shared")
+
+        no = fake_notion(handler)
+        results, errors = self.concurrent_gets(no, release)
+        assert not errors
+        assert len(no.adapter.requests) == 1
+        # every caller gets its own copy
+        assert len(results) == 5 and all(r == results[0] for r in results)
+        assert len({id(r) for r in results}) == 5
+        assert len(no.session.flights) == 0
+        # finished requests are not cached
+        no.session.method("get", "pages", id_=self.page_id)
+        assert len(no.adapter.requests) == 2
+
+    def test_results_parsed(self):
+        release = threading.Event()
+
+        def handler(request):
+            release.wait(5)
+            return 200, task_dict(self.page_id, "Shared", people=("01c67faf3aba45ffaa022407f87c86a5",))
+
+        no = fake_notion(handler)
+        results, errors = self.concurrent_gets(no, release, count=2)
+        assert not errors and len(no.adapter.requests) == 1
+        # parsers and callers modify nested dicts of their result
+        first = Page(**results[0])
+        results[0]["properties"]["Name"]["title"].clear()
+        results[0]["properties"]["Owner"]["people"][0]["name"] = "Changed"
+        second = Page(**results[1])
+        assert str(first.title) == str(second.title) == "Shared"
+        assert second.properties["Owner"].value[0].name is None
+
+    def test_error_shared(self):
+        release = threading.Event()
+
+        def handler(request):
+            release.wait(5)
+            return 404, {"object": "error", "status": 404, "code": "object_not_found", "message": "Not found"}
+
+        no = fake_notion(handler)
+        results, errors = self.concurrent_gets(no, release)
+        assert not results
+        assert len(errors) == 5 and all(isinstance(e, ObjectNotFound) for e in errors)
+        assert len(no.adapter.requests) == 1
+
+    def test_not_coalesced(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def handler(request):
+            # every request is in flight at once
+            barrier.wait()
+            return 200, task_dict(self.page_id, "Shared")
+
+        no = fake_notion(handler, single_flight=False)
+        assert no.session.flights is None
+        threads = [
+            threading.Thread(target=no.session.method, args=("get", "pages"), kwargs={"id_": self.page_id})
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(no.adapter.requests) == 3
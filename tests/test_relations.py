@@ -0,0 +1,122 @@
+import threading
+
+from pytion.models import Page, PageArray
+from tests.samples import fake_notion, task_dict
+
+DOCS = "11111111-0000-0000-0000-000000000001"
+BUG = "11111111-0000-0000-0000-000000000002"
+RELEASE = "11111111-0000-0000-0000-000000000003"
+MISSING = "11111111-0000-0000-0000-000000000009"
+
+PAGES = {
+    DOCS.replace("-", ""): task_dict(DOCS, "Write docs"),
+    BUG.replace("-", ""): task_dict(BUG, "Fix bug", links=(DOCS,)),
+    RELEASE.replace("-", ""): task_dict(RELEASE, "Release", links=(BUG, DOCS)),
+}
+
+
+def handler(request):
+    id_ = request.url.rsplit("/", 1)[-1]
+    if id_ in PAGES:
+        return 200, PAGES[id_]
+    return 404, {"object": "error", "status": 404, "code": "object_not_found", "message": "Could not find page"}
+
+
+class TestRelationResolver:
+    def test_resolve(self):
+        no = fake_notion(handler)
+        rows = PageArray([
+            task_dict("21111111-0000-0000-0000-000000000001", "Row 1", links=(RELEASE, BUG)),
+            task_dict("21111111-0000-0000-0000-000000000002", "Row 2", links=(BUG, MISSING)),
+        ])
+        r = no.relations.resolve(rows, "Blocks")
+        assert [str(p.title) for p in r] == ["Release", "Fix bug"]
+        assert [str(p.title) for p in rows[0].properties["Blocks"].pages] == ["Release", "Fix bug"]
+        assert [str(p.title) for p in rows[1].properties["Blocks"].pages] == ["Fix bug"]
+        # every page is requested once
+        assert len(no.adapter.requests) == 3
+        assert no.relations.cache[MISSING.replace("-", "")] is None
+        no.relations.resolve(rows)
+        assert len(no.adapter.requests) == 3
+
+    def test_depth(self):
+        no = fake_notion(handler)
+        page = Page(**task_dict("21111111-0000-0000-0000-000000000001", "Row", links=(RELEASE,)))
+        r = no.pages.from_object(page).resolve_relations("Blocks", depth=3)
+        assert {str(p.title) for p in r.obj} == {"Release", "Fix bug", "Write docs"}
+        release = page.properties["Blocks"].pages[0]
+        assert [str(p.title) for p in release.properties["Blocks"].pages] == ["Fix bug", "Write docs"]
+        assert len(no.adapter.requests) == 3
+        r = no.pages.from_object(page).resolve_relations("Blocks", depth=1)
+        assert [str(p.title) for p in r.obj] == ["Release"]
+        assert len(no.adapter.requests) == 3
+
+    def test_concurrent(self):
+        threads = set()
+
+        def slow_handler(request):
+            threads.add(threading.get_ident())
+            return handler(request)
+
+        no = fake_notion(slow_handler)
+        page = Page(**task_dict("21111111-0000-0000-0000-000000000001", "Row", links=(RELEASE, BUG, DOCS)))
+        no.relations.resolve(page, workers=3)
+        assert len(page.properties["Blocks"].pages) == 3
+        assert threading.get_ident() not in threads
+
+
+def relation_items(ids, next_cursor=None):
+    return {
+        "object": "list",
+        "results": [{"object": "property_item", "id": "bl", "type": "relation", "relation": {"id": i}} for i in ids],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "type": "property_item",
+        "property_item": {"id": "bl", "next_url": None, "type": "relation", "relation": {}},
+    }
+
+
+class TestTruncatedProperties:
+    ids = [f"31111111-0000-0000-0000-{n:012d}" for n in range(30)]
+
+    def handler(self, request):
+        if "properties/bl" in request.url:
+            if "start_cursor" in request.url:
+                return 200, relation_items(self.ids[25:])
+            return 200, relation_items(self.ids[:25], next_cursor="cursor")
+        if "properties/title" in request.url:
+            return 200, {
+                "object": "list", "results": [], "next_cursor": None, "has_more": False, "type": "property_item",
+                "property_item": {"id": "title", "next_url": None, "type": "title", "title": {}},
+            }
+        return handler(request)
+
+    def test_truncated(self):
+        no = fake_notion(self.handler)
+        data = task_dict("21111111-0000-0000-0000-000000000001", "Row", links=self.ids[:25])
+        data["properties"]["Blocks"]["has_more"] = True
+        rows = PageArray([data, task_dict("21111111-0000-0000-0000-000000000002", "Row 2")])
+        assert rows[0].properties["Blocks"].is_truncated
+        assert not rows[1].properties["Blocks"].is_truncated
+        assert not rows[0].properties["Name"].is_truncated
+        assert no.pages.get_truncated_properties(obj=rows) == 1
+        pv = rows[0].properties["Blocks"]
+        assert (pv.name, pv.id, pv.type) == ("Blocks", "bl", "relation")
+        assert len(pv.value) == 30 and not pv.is_truncated
+        assert len(no.adapter.requests) == 2
+        assert no.pages.get_truncated_properties(obj=rows) == 0
+
+    def test_empty_item(self):
+        no = fake_notion(self.handler)
+        r = no.pages.get_page_property("title", id_="21111111000000000000000000000001")
+        assert r.obj.type == "title" and not r.obj.value
+
+    def test_resolver(self):
+        no = fake_notion(self.handler)
+        data = task_dict("21111111-0000-0000-0000-000000000001", "Row", links=self.ids[:25])
+        data["properties"]["Blocks"]["has_more"] = True
+        page = Page(**data)
+        no.relations.resolve(page, "Blocks")
+        assert len(page.properties["Blocks"].value) == 30
+        # 2 property item requests and 30 pages which are not found
+        assert len(no.adapter.requests) == 32
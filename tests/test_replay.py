@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+from pytion import Notion
+from pytion.exceptions import ObjectNotFound
+from pytion.replay import Replayer
+from tests.samples import fake_notion, task_dict
+
+DB = "0e9539099cff456d89e44684d6b6c701"
+MISSING = "878d628488d94894ab14f9b872cd6870"
+
+
+def query_handler(request):
+    # 3 pages of 2 rows by `start_cursor` of the body
+    if MISSING in request.url:
+        return 404, {"object": "error", "status": 404, "code": "object_not_found", "message": "Not found"}
+    cursor = int(json.loads(request.body or b"{}").get("start_cursor", 0))
+    rows = [task_dict(f"{n:032x}", f"Task {n}") for n in range(cursor, cursor + 2)]
+    has_more = cursor < 4
+    return 200, {
+        "object": "list", "results": rows, "has_more": has_more, "next_cursor": str(cursor + 2) if has_more else None,
+    }
+
+
+def record(path):
+    no = fake_notion(query_handler)
+    with no.session.record(str(path)) as recorder:
+        pages = no.databases.db_query(DB).obj
+        with pytest.raises(ObjectNotFound):
+            no.pages.get(MISSING)
+    # closed recorder passes requests through
+    no.databases.db_query(DB)
+    assert recorder.count == 4
+    assert len(no.adapter.requests) == 7
+    return pages
+
+
+class TestReplay:
+    def test_record_replay(self, tmp_path):
+        path = tmp_path / "workload.ndjson.gz"
+        pages = record(path)
+        assert len(pages) == 6
+
+        replayer = Replayer(str(path))
+        assert len(replayer) == 4
+        no = Notion(token="offline", transport=replayer)
+        for _ in range(2):
+            replayed = no.databases.db_query(DB).obj
+            assert [p.id for p in replayed] == [p.id for p in pages]
+            assert [str(p.title) for p in replayed] == [f"Task {n}" for n in range(6)]
+        with pytest.raises(ObjectNotFound):
+            no.pages.get(MISSING)
+        # session is not created in replay mode
+        assert no.session._session is None
+
+    def test_not_recorded(self, tmp_path):
+        path = tmp_path / "workload.ndjson.gz"
+        record(path)
+        no = Notion(token="offline", transport=Replayer(str(path)))
+        with pytest.raises(LookupError):
+            no.databases.db_query(DB, limit=10)
+
+    def test_latency(self, tmp_path):
+        path = tmp_path / "workload.ndjson.gz"
+        record(path)
+        no = Notion(token="offline", transport=Replayer(str(path), latency=0.02))
+        started = time.perf_counter()
+        no.databases.db_query(DB)
+        assert time.perf_counter() - started >= 0.06
+        with pytest.raises(ValueError):
+            Replayer(str(path), latency="slow")
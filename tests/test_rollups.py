@@ -0,0 +1,112 @@
+import pytest
+
+from pytion.models import Database, Page, PageArray, Property
+from pytion.rollups import RollupEngine, compute_rollup
+from tests.samples import database_dict, task_dict
+
+DOCS = "11111111-0000-0000-0000-000000000001"
+BUG = "11111111-0000-0000-0000-000000000002"
+RELEASE = "11111111-0000-0000-0000-000000000003"
+
+
+def rollup(function, relation="Blocks", target="Count", id_="r"):
+    return {"id": id_, "name": function, "type": "rollup", "rollup": {
+        "function": function, "relation_property_name": relation, "relation_property_id": "bl",
+        "rollup_property_name": target, "rollup_property_id": "x",
+    }}
+
+
+@pytest.fixture
+def related():
+    return PageArray([
+        task_dict(DOCS, "Write docs", 3, True, ("docs",), "2022-05-10"),
+        task_dict(BUG, "Fix bug", 5, False, ("bug", "docs"), "2022-05-12T10:00:00.000Z"),
+        task_dict(RELEASE, "Release", None, False, (), None),
+    ])
+
+
+@pytest.fixture
+def row():
+    return Page(**task_dict("21111111-0000-0000-0000-000000000001", "Row", links=(DOCS, BUG, RELEASE)))
+
+
+class TestRollups:
+    @pytest.mark.parametrize("function, target, value", [
+        ("count", "Count", 3),
+        ("count_values", "Tags", 3),
+        ("unique", "Tags", 2),
+        ("empty", "Count", 1),
+        ("not_empty", "Count", 2),
+        ("percent_empty", "Due", 1 / 3),
+        ("sum", "Count", 8),
+        ("average", "Count", 4),
+        ("median", "Count", 4),
+        ("min", "Count", 3),
+        ("max", "Count", 5),
+        ("range", "Count", 2),
+        ("checked", "Done", 1),
+        ("percent_unchecked", "Done", 2 / 3),
+    ])
+    def test_numbers(self, related, row, function, target, value):
+        related = {page.id: page for page in related}
+        pv = compute_rollup(Property(rollup(function, target=target)), row, related)
+        assert pv.type == "rollup"
+        assert pv.name == function
+        assert pv.value == pytest.approx(value)
+
+    def test_dates(self, related, row):
+        related = {page.id: page for page in related}
+        pv = compute_rollup(Property(rollup("date_range", target="Due")), row, related)
+        assert (pv.start.day, pv.end.day) == (10, 12)
+        pv = compute_rollup(Property(rollup("latest_date", target="Due")), row, related)
+        assert pv.start.hour == 10
+        assert compute_rollup(Property(rollup("earliest_date", target="Due")), row, {}).start is None
+
+    def test_array(self, related, row):
+        related = {page.id: page for page in related}
+        pv = compute_rollup(Property(rollup("show_original", target="Name")), row, related)
+        assert [str(v) for v in pv.value] == ["Write docs", "Fix bug", "Release"]
+        pv = compute_rollup(Property(rollup("show_unique", target="Done")), row, related)
+        assert pv.value == [True, False]
+
+    def test_engine(self, related, row):
+        db = Database(**database_dict(properties={"Total": rollup("sum", relation="bl", target="a:b", id_="t")}))
+        engine = RollupEngine(db, related)
+        engine.compute(row)
+        assert row.properties["Total"].value == 8
+        engine.add_related([Page(**task_dict(RELEASE, "Release", 10))])
+        engine.compute_all([row])
+        assert row.properties["Total"].value == 18
+        assert row.properties["Total"].id == "t"
+
+    def test_partial_cache(self, related, row, caplog):
+        cached = {page.id: page for page in related if page.id != BUG.replace("-", "")}
+        pv = compute_rollup(Property(rollup("count")), row, cached)
+        assert (pv.value, pv.missing) == (2, 1)
+        assert "1 of 3 related pages are not available" in caplog.text
+
+        requested = []
+
+        def fetch(ids):
+            requested.extend(ids)
+            return {id_: page for page in related for id_ in ids if page.id == id_}
+
+        db = Database(**database_dict(properties={"Total": rollup("sum", target="Count", id_="t")}))
+        engine = RollupEngine(db, cached, fetch=fetch)
+        engine.compute_all([row, row])
+        assert (row.properties["Total"].value, row.properties["Total"].missing) == (8, 0)
+        # fetched pages are cached by the engine
+        assert requested == [BUG.replace("-", "")]
+
+    def test_truncated_relation(self, related, row, caplog):
+        related = {page.id: page for page in related}
+        pv = compute_rollup(Property(rollup("sum")), row, related)
+        assert (pv.value, pv.missing, pv.truncated) == (8, 0, False)
+        row.properties["Blocks"].has_more = True
+        pv = compute_rollup(Property(rollup("sum")), row, related)
+        assert (pv.value, pv.missing, pv.truncated) == (8, 1, True)
+        assert "relation Blocks is truncated to 3 links" in caplog.text
+
+    def test_unsupported(self, row):
+        with pytest.raises(ValueError):
+            compute_rollup(Property(rollup("count_per_group")), row, {})
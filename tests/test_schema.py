@@ -0,0 +1,155 @@
+import json
+import re
+from datetime import datetime
+
+import pytest
+
+from pytion.exceptions import ValidationError
+from pytion.models import Database, LinkTo, PropertyValue, Property
+from tests.samples import fake_notion, database_dict, page_dict
+
+DB = "0e9539099cff456d89e44684d6b6c701"
+PAGE = "878d628488d94894ab14f9b872cd6870"
+PROPERTIES = {
+    "Count": {"id": "a%3Ab", "name": "Count", "type": "number", "number": {"format": "number"}},
+    "Done": {"id": "done", "name": "Done", "type": "checkbox", "checkbox": {}},
+    "Tags": {"id": "tags", "name": "Tags", "type": "multi_select", "multi_select": {"options": []}},
+    "Due": {"id": "due", "name": "Due", "type": "date", "date": {}},
+    "Stage": {"id": "st", "name": "Stage", "type": "status", "status": {
+        "options": [{"name": "Not started"}, {"name": "Done"}], "groups": [],
+    }},
+    "Kind": {"id": "kind", "name": "Kind", "type": "select", "select": {"options": []}},
+    "Total": {"id": "tot", "name": "Total", "type": "formula", "formula": {"expression": "1"}},
+}
+
+
+def schema_handler(requests_log):
+    def handler(request):
+        requests_log.append((request.method, request.path_url))
+        if request.path_url.startswith("/v1/databases"):
+            body = json.loads(request.body) if request.body else {}
+            properties = dict(PROPERTIES)
+            for name in body.get("properties", {}):
+                properties[name] = {"id": "new", "name": name, "type": "url", "url": {}}
+            return 200, database_dict(DB, properties=properties)
+        return 200, page_dict(PAGE, database_id=DB)
+    return handler
+
+
+@pytest.fixture
+def no():
+    log = []
+    no = fake_notion(schema_handler(log), validate_properties=True)
+    no.log = log
+    return no
+
+
+class TestSchema:
+    parent = LinkTo.create(database_id=DB)
+
+    def test_valid(self, no):
+        props = {
+            "Count": PropertyValue.create("number", 5),
+            "a:b": PropertyValue.create("number", 2.5),
+            "Tags": PropertyValue.create("multi_select", ["a", "b"]),
+            "Due": PropertyValue.create("date", datetime(2022, 5, 1)),
+            "Stage": PropertyValue.create("status", "Done"),
+            "Kind": PropertyValue.create("select", "new option"),
+        }
+        schema = no.schemas.get(DB)
+        assert schema.errors(props) == ["Count is provided twice"]
+        del props["a:b"]
+        no.pages.page_create(parent=self.parent, properties=props, title="Task")
+        no.pages.page_create(parent=self.parent, title="Task 2")
+        # schema is retrieved once
+        assert no.log == [("GET", f"/v1/databases/{DB}"), ("POST", "/v1/pages/"), ("POST", "/v1/pages/")]
+
+    @pytest.mark.parametrize(
+        "properties,message",
+        [
+            ({"Kind": PropertyValue.create("select", ["a"])}, "Kind (select) value ['a'] has wrong type list"),
+            ({"Count": PropertyValue.create("number", "5")}, "Count (number) value '5' has wrong type str"),
+            ({"Count": PropertyValue.create("rich_text", "5")}, "Count is expected to be number, not rich_text"),
+            ({"Cuont": PropertyValue.create("number", 5)}, "Cuont is not a property of the database"),
+            (
+                {"Total": PropertyValue.create("formula", {"type": "number", "number": 5})},
+                "Total is formula property and can not be written",
+            ),
+            ({"Stage": PropertyValue.create("status", "Doing")}, "Stage status 'Doing' is not an option"),
+        ],
+        ids=("select type", "number type", "wrong type", "misnamed", "read-only", "status option"),
+    )
+    def test_invalid(self, no, properties, message):
+        with pytest.raises(ValidationError, match=re.escape(message)):
+            no.pages.page_create(parent=self.parent, properties=properties, title="Task")
+        assert ("POST", "/v1/pages/") not in no.log
+
+    def test_missing_title(self, no):
+        with pytest.raises(ValidationError, match="title property Name is not provided"):
+            no.pages.page_create(parent=self.parent, properties={"Done": PropertyValue.create("checkbox", True)})
+        # not required by updates
+        page = no.pages.get(PAGE)
+        page.page_update(properties={"Done": PropertyValue.create("checkbox", True)})
+        with pytest.raises(ValidationError):
+            page.page_update(properties={"Done": PropertyValue.create("checkbox", "yes")})
+
+    def test_disabled(self):
+        # disabled by default
+        log = []
+        no = fake_notion(schema_handler(log))
+        no.pages.page_create(parent=self.parent, properties={"Cuont": PropertyValue.create("number", 5)})
+        assert log == [("POST", "/v1/pages/")]
+
+    def test_not_readable(self, caplog):
+        log = []
+
+        def handler(request):
+            log.append((request.method, request.path_url))
+            if request.method == "GET":
+                # insert-only integration
+                return 403, {"object": "error", "status": 403, "code": "restricted_resource", "message": "No access"}
+            return 200, page_dict(PAGE, database_id=DB)
+
+        no = fake_notion(handler, validate_properties=True)
+        no.pages.page_create(parent=self.parent, properties={"Count": PropertyValue.create("number", 5)}, title="T")
+        assert log == [("GET", f"/v1/databases/{DB}"), ("POST", "/v1/pages/")]
+        assert "Properties are not validated" in caplog.text
+
+    def test_stale(self, no):
+        assert "Link" not in no.schemas.get(DB)
+        # the property is added in Notion UI
+        PROPERTIES["Link"] = {"id": "link", "name": "Link", "type": "url", "url": {}}
+        try:
+            link = PropertyValue.create("url", "https://example.com")
+            no.pages.page_create(parent=self.parent, properties={"Link": link}, title="T")
+            assert [method for method, _ in no.log] == ["GET", "GET", "POST"]
+            # the schema is retrieved once more before raising
+            with pytest.raises(ValidationError, match="Cuont is not a property"):
+                no.pages.page_create(parent=self.parent, properties={"Cuont": link}, title="T")
+            assert [method for method, _ in no.log] == ["GET", "GET", "POST", "GET"]
+        finally:
+            del PROPERTIES["Link"]
+
+    def test_values_not_kept(self, no):
+        props = {"Kind": PropertyValue({"type": "select", "select": ["a"]}, name="Kind", keep_raw=False)}
+        with pytest.raises(ValidationError, match=re.escape("Kind (select) value ['a'] has wrong type list")):
+            no.pages.page_create(parent=self.parent, properties=props, title="Task")
+
+    def test_refresh(self, no):
+        assert "Link" not in no.schemas.get(DB)
+        no.databases.db_update(DB, properties={"Link": Property.create("url")})
+        assert no.schemas.get(DB)["Link"].type == "url"
+        link = PropertyValue.create("url", "https://example.com")
+        no.pages.page_create(parent=self.parent, properties={"Link": link}, title="T")
+        assert [method for method, _ in no.log] == ["GET", "PATCH", "POST"]
+        no.schemas.invalidate()
+        assert len(no.schemas) == 0
+
+    def test_filter(self, no):
+        schema = no.schemas.update(Database(**database_dict(DB, properties=PROPERTIES)))
+        assert schema.filter("a%3Ab", "5").filter == {"property": "a%3Ab", "number": {"equals": 5}}
+        assert schema.filter("Kind", "x").filter == {"property": "kind", "select": {"equals": "x"}}
+        assert schema["Name"].type == "title" and schema.title_name == "Name"
+        with pytest.raises(KeyError):
+            schema.filter("Missing", "x")
+        assert no.log == []
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from pytion.export import Exporter, read_export
+from pytion.models import Page, Database, BlockArray, PageArray
+from pytion.snapshot import SnapshotStore, convert_export
+from tests.samples import fake_notion, page_dict, database_dict, block_dict, task_dict
+from tests.test_export import Workspace, PAGE, DB, PARENT, CHILD
+
+PAGE_ID = PAGE.replace("-", "")
+DB_ID = DB.replace("-", "")
+
+
+class TestSnapshotStore:
+    def test_put_get(self, tmp_path):
+        path = str(tmp_path / "store")
+        pages = PageArray([task_dict(f"{n:032x}", f"Task {n}", count=n) for n in range(50)])
+        blocks = BlockArray([block_dict(id_=PARENT, text="first"), block_dict(id_=CHILD, text="second")])
+        with SnapshotStore(path, "a") as store:
+            for page in pages:
+                store.put(page)
+            store.put(Database(**database_dict(DB)))
+            store.put_blocks(pages[7].id, blocks)
+            assert store.get(f"{7:032x}").properties["Count"].value == 7
+            # new version is appended, the last one wins
+            store.put(Page(**task_dict(f"{7:032x}", "Renamed", count=70)))
+            assert str(store.get(f"{7:032x}").title) == "Renamed"
+
+        store = SnapshotStore(path, keep_raw=False)
+        assert len(store) == 51
+        assert f"{3:032x}" in store and PAGE_ID not in store
+        page = store.get(f"{7:032x}")
+        assert str(page.title) == "Renamed" and page.properties["Count"].value == 70
+        assert page._raw is None
+        assert isinstance(store.get(DB), Database)
+        assert [b.simple for b in store.blocks(f"{7:032x}")] == ["first", "second"]
+        assert store.blocks(f"{8:032x}") is None and store.get(PAGE) is None
+        assert sorted(store.ids()) == sorted([p.id for p in pages] + [DB_ID])
+        with pytest.raises(ValueError):
+            store.put(page)
+        with pytest.raises(ValueError):
+            store.get("not-an-id")
+        store.close()
+
+    def test_interrupted(self, tmp_path):
+        path = str(tmp_path)
+        with SnapshotStore(path, "a") as store:
+            store.put(Page(**page_dict(PAGE)))
+        # cut index entry and data without entry
+        with open(os.path.join(path, SnapshotStore.index_name), "ab") as f:
+            f.write(b"\x01\x02\x03")
+        with open(os.path.join(path, SnapshotStore.data_name), "ab") as f:
+            f.write(b'{"object": "pa')
+        with SnapshotStore(path, "a") as store:
+            assert len(store) == 1
+            store.put(Database(**database_dict(DB)))
+        assert SnapshotStore(path).ids() == [PAGE_ID, DB_ID]
+
+    def test_exporter(self, tmp_path):
+        no = fake_notion(Workspace())
+        Exporter(no, str(tmp_path), format_="snapshot", workers=1).run()
+        with SnapshotStore(str(tmp_path)) as store:
+            assert [b.id for b in store.blocks(PAGE)] == [PARENT.replace("-", ""), CHILD.replace("-", "")]
+            assert store.blocks(DB) is None
+        records = read_export(str(tmp_path))
+        assert records[PAGE_ID]["blocks"][1]["id"] == CHILD
+        assert records[DB_ID]["data"]["object"] == "database"
+
+    def test_convert(self, tmp_path):
+        no = fake_notion(Workspace())
+        no.export(str(tmp_path / "export"))
+        ndjson = str(tmp_path / "export" / Exporter.ndjson_name)
+        assert convert_export(ndjson, str(tmp_path / "store")) == 2
+        with SnapshotStore(str(tmp_path / "store")) as store:
+            assert str(store.get(PAGE).title) == "Pytion Tests"
+            assert len(store.blocks(PAGE)) == 2
@@ -0,0 +1,89 @@
+import json
+
+from pytion.models import Page, Database
+from pytion.titles import TitleIndex, trigrams
+from tests.samples import fake_notion, page_dict, database_dict
+
+ROADMAP = "878d6284-88d9-4894-ab14-f9b872cd6870"
+OLD_ROADMAP = "878d6284-88d9-4894-ab14-f9b872cd6871"
+NOTES = "878d6284-88d9-4894-ab14-f9b872cd6872"
+DB = "0e953909-9cff-456d-89e4-4684d6b6c701"
+
+
+def objects():
+    return [
+        Page(**page_dict(ROADMAP, "Q3 Roadmap", last_edited_time="2022-07-01T00:00:00.000Z")),
+        Page(**page_dict(OLD_ROADMAP, "q3  roadmap")),
+        Page(**page_dict(NOTES, "Meeting notes")),
+        Database(**database_dict(DB, "Roadmap")),
+    ]
+
+
+class TestTitleIndex:
+    def test_trigrams(self):
+        assert trigrams("Ab") == ["  a", " ab", "ab "]
+
+    def test_find(self):
+        index = TitleIndex()
+        assert index.update(objects()) == 4
+        # the most recently edited of equal titles is the first
+        assert index.resolve("Q3 ROADMAP") == ROADMAP.replace("-", "")
+        assert index.find("q3 roadmap", limit=0)[:2] == [
+            (1.0, ROADMAP.replace("-", "")), (1.0, OLD_ROADMAP.replace("-", ""))
+        ]
+        assert index.resolve("Roadmap", object_type="database") == DB.replace("-", "")
+        assert index.resolve("meeting note") == NOTES.replace("-", "")
+        assert index.resolve("meeting note", fuzzy=False) is None
+        assert index.resolve("unrelated words") is None
+
+    def test_update_and_remove(self):
+        index = TitleIndex()
+        index.update(objects())
+        index.update([Page(**page_dict(NOTES, "Weekly sync"))])
+        assert index.resolve("Meeting notes") is None and index.title(NOTES) == "Weekly sync"
+        index.update([Page(**page_dict(NOTES, "Weekly sync", archived=True))])
+        assert index.resolve("Weekly sync") is None and len(index) == 3
+        assert not any(NOTES.replace("-", "") in ids for ids in index.grams.values())
+
+    def test_save_load(self, tmp_path):
+        index = TitleIndex()
+        index.update(objects())
+        path = str(tmp_path / "titles.json")
+        index.save(path)
+        loaded = TitleIndex.load(path)
+        assert loaded.find("roadmap", limit=0) == index.find("roadmap", limit=0)
+        assert loaded.refreshed == index.refreshed == "2022-07-01T00:00:00+00:00"
+
+    def test_by_title(self):
+        def handler(request):
+            return 200, {"object": "list", "results": [page_dict(ROADMAP, "Q3 Roadmap")], "has_more": False}
+
+        no = fake_notion(handler)
+        assert no.pages.by_title("Q3 Roadmap") == ROADMAP.replace("-", "")
+        assert len(no.adapter.requests) == 1
+        # resolved locally
+        assert no.pages.by_title("q3 roadmap") == ROADMAP.replace("-", "")
+        assert len(no.adapter.requests) == 1
+        # similar title is resolved locally too
+        assert no.pages.by_title("Q3 Roadmp") == ROADMAP.replace("-", "")
+        assert len(no.adapter.requests) == 1
+        # not similar enough: searched
+        assert no.pages.by_title("Q3 Roadmp", threshold=0.9) is None
+        assert no.pages.by_title("Q3 Roadmp", fuzzy=False) is None
+        assert len(no.adapter.requests) == 3
+        assert no.databases.by_title("Q3 Roadmap") is None
+
+    def test_refresh(self):
+        sent = []
+
+        def handler(request):
+            sent.append(request.body)
+            return 200, {"object": "list", "results": [
+                page_dict(NOTES, "New title", last_edited_time="2022-08-01T00:00:00.000Z"),
+                page_dict(ROADMAP, "Q3 Roadmap", last_edited_time="2022-07-01T00:00:00.000Z"),
+            ], "has_more": False}
+
+        no = fake_notion(handler)
+        no.titles.update(objects())
+        assert no.titles.refresh(no, batch=10) == 2
+        assert no.titles.title(NOTES) == "New title" and len(sent) == 1 and json.loads(sent[0])["page_size"] == 10
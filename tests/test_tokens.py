@@ -0,0 +1,116 @@
+import threading
+import time
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+
+import pytest
+import requests
+from requests import Response
+
+from pytion import Notion
+from pytion.exceptions import Unauthorized
+from pytion.tokens import RateLimiter, TokenPool
+from tests.samples import FakeAdapter, page_dict
+
+PAGE = "878d6284-88d9-4894-ab14-f9b872cd6870"
+
+
+def pooled_notion(handler, tokens=("secret_1", "secret_2", "secret_3"), rate_limit=1000.0):
+    no = Notion(tokens=list(tokens), rate_limit=rate_limit)
+    no.adapter = FakeAdapter(handler)
+    for slot in no.session.pool.slots:
+        slot.session.mount("https://", no.adapter)
+    return no
+
+
+def authorization(request):
+    return request.headers["Authorization"].split()[-1]
+
+
+class TestTokenPool:
+    def test_rate_limiter(self):
+        limiter = RateLimiter(rate=2, burst=2)
+        assert [limiter.reserve(10.0) for _ in range(4)] == [0, 0, 0.5, 1.0]
+        assert limiter.delay(20.0) == 0
+
+    def test_spread(self):
+        no = pooled_notion(lambda request: (200, page_dict(PAGE)))
+        for _ in range(6):
+            no.pages.get(PAGE)
+        tokens = [authorization(r) for r in no.adapter.requests]
+        assert sorted(tokens) == ["secret_1"] * 2 + ["secret_2"] * 2 + ["secret_3"] * 2
+        assert all(r.headers["Notion-Version"] == no.version for r in no.adapter.requests)
+
+    def test_rate_limited(self):
+        def handler(request):
+            if authorization(request) == "secret_1":
+                return 429, {"object": "error", "status": 429, "code": "rate_limited", "message": "Slow down"}
+            return 200, page_dict(PAGE)
+
+        no = pooled_notion(handler, ("secret_1", "secret_2"))
+        assert no.pages.get(PAGE).obj.id == PAGE.replace("-", "")
+        slot = no.session.pool.slots[0]
+        assert slot.retired_until > time.monotonic() + 20
+        for _ in range(3):
+            no.pages.get(PAGE)
+        # the retired token is not used
+        assert [authorization(r) for r in no.adapter.requests] == ["secret_1"] + ["secret_2"] * 4
+
+    @pytest.mark.parametrize("retry_after, seconds", [
+        ("120", 120),
+        (timedelta(seconds=90), 90),
+        ("Wed, 21 Oct 2015 07:28:00 GMT", 0),
+        ("soon", 30),
+        (None, 30),
+    ], ids=("seconds", "http date", "past date", "malformed", "missing"))
+    def test_retry_after(self, retry_after, seconds):
+        pool = TokenPool(["secret_1"], retire_after=30)
+        slot = pool.acquire()
+        response = Response()
+        response.status_code = 429
+        if isinstance(retry_after, timedelta):
+            retry_after = format_datetime(datetime.now(timezone.utc) + retry_after, usegmt=True)
+        if retry_after is not None:
+            response.headers["Retry-After"] = retry_after
+        pool.release(slot, response)
+        assert slot.retired_until - time.monotonic() == pytest.approx(seconds, abs=2)
+
+    def test_unauthorized(self):
+        def handler(request):
+            return 401, {"object": "error", "status": 401, "code": "unauthorized", "message": "Bad token"}
+
+        no = pooled_notion(handler, ("secret_1", "secret_2"))
+        with pytest.raises(Unauthorized):
+            no.pages.get(PAGE)
+        # every token is tried once
+        assert sorted(authorization(r) for r in no.adapter.requests) == ["secret_1", "secret_2"]
+
+    def test_session_created_once(self, monkeypatch):
+        created = []
+
+        class SlowSession(requests.Session):
+            def __init__(self):
+                created.append(self)
+                time.sleep(0.05)
+                super().__init__()
+
+        monkeypatch.setattr(requests, "Session", SlowSession)
+        slot = TokenPool(["secret_1"]).slots[0]
+        sessions = []
+        threads = [threading.Thread(target=lambda: sessions.append(slot.session)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(created) == 1
+        assert all(session is created[0] for session in sessions)
+
+    def test_throughput(self):
+        # 3 tokens x 50 requests per second: 12 requests without delays (burst 3 each) + 3 waits of 20 ms
+        pool = TokenPool(["a", "b", "c"], rate=50)
+        start = time.monotonic()
+        slots = [pool.acquire() for _ in range(12)]
+        assert time.monotonic() - start < 0.15
+        assert [pool.slots.index(slot) for slot in slots[:3]] == [0, 1, 2]
+        with pytest.raises(ValueError):
+            TokenPool([])